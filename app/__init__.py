@@ -10,5 +10,7 @@ def create_app(config_class=Config):
     # 注册蓝图
     from app.core import bp as core_bp
     app.register_blueprint(core_bp)
+    from app.routes.inquiries import inquiries as inquiries_bp
+    app.register_blueprint(inquiries_bp)
 
     return app 
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""ASGI serving mode
+
+Chat runs as an async handler with AsyncOpenAI, so a slow model reply does
+not hold a worker thread. Every other route is served by the Flask app
+behind a2wsgi's WSGIMiddleware, which runs each request on one of
+ASGI_WSGI_THREADS threads and streams request and response bodies, so
+imports and exports are not buffered. Booking, availability and inquiry
+routes therefore share one implementation, with the same single-flight,
+hedging, admission and caching, in both modes.
+"""
+
+import asyncio
+import os
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from app import create_app
+from app.core.admission import Rejected, client_key
+from app.core.chat_inquiries import CHAT_SESSION_COOKIE, chat_session_id, record_chat
+from app.core.tenants import TENANT_HEADER
+
+# Threads serving Flask routes; requests beyond this wait for a free thread
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 40))
+
+
+def create_asgi_app():
+    flask_app = create_app()
+    # Importing the routes starts the tenant registry and assistant once per process
+    from app.core.routes import tenants, storage_assistant, admission
+
+    async def tenant_for(request):
+        """Acquire the request's facility services; None when it matches no tenant
+
+        The caller hands them back with tenants.release.
+        """
+        tenant_id = tenants.resolve(request.headers.get(TENANT_HEADER), request.headers.get('host'))
+        if tenant_id is None:
+            return None
+        return await asyncio.to_thread(tenants.acquire, tenant_id)
+
+    def rate_limited(request, route_class):
+        """429 response when the client is over its budget for this route class
+
+        Async handlers do not tie up worker threads, so only the per-client
+        buckets apply here, not the in-flight slot queues.
+        """
+        try:
+            admission.check_rate(
+                client_key(request.client.host if request.client else None), route_class
+            )
+        except Rejected as e:
+            return JSONResponse(
+                {'status': 'error', 'message': str(e)}, status_code=429,
+                headers={'Retry-After': str(e.retry_after)}
+            )
+        return None
+
+    async def chat(request):
+        """Handle chat messages."""
+        rejected = rate_limited(request, 'chat')
+        if rejected:
+            return rejected
+        try:
+            data = await request.json()
+            if not data or 'message' not in data:
+                return JSONResponse({'error': 'No message provided'}, status_code=400)
+
+            message = data['message']
+            print(f"\n📩 Received message: {message}")
+            response = await storage_assistant.get_response_async(message)
+            print(f"📤 Assistant response: {response}")
+
+            # Finished sessions become inquiries in the background
+            session_id = chat_session_id(data.get('session_id') or request.cookies.get(CHAT_SESSION_COOKIE))
+            tenant = await tenant_for(request)
+            if tenant is not None:
+                try:
+                    await asyncio.to_thread(record_chat, tenant.chat_sessions, session_id, message, response)
+                finally:
+                    tenants.release(tenant)
+            reply = JSONResponse({'response': response, 'session_id': session_id})
+            reply.set_cookie(CHAT_SESSION_COOKIE, session_id, httponly=True, samesite='lax')
+            return reply
+
+        except Exception as e:
+            print(f"❌ Error in chat endpoint: {str(e)}")
+            return JSONResponse({'error': 'An error occurred processing your request'}, status_code=500)
+
+    return Starlette(
+        routes=[
+            Route('/chat', chat, methods=['POST']),
+            # Everything else is served by the Flask app, one thread per request
+            Mount('/', app=WSGIMiddleware(flask_app, workers=ASGI_WSGI_THREADS))
+        ],
+        middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])]
+    )
@@ -0,0 +1,125 @@
+"""Admission control: per-client rate limits and weighted route priorities"""
+
+import math
+import os
+import threading
+from collections import OrderedDict, deque
+from app.integrations.airtable.rate_limit import RateLimiter
+
+# Requests handled at once; the rest wait in their class's queue
+MAX_IN_FLIGHT = int(os.getenv('MAX_IN_FLIGHT', 16))
+MAX_TRACKED_CLIENTS = 10000
+
+# Per route class: share of freed slots (weight), waiting room (queue),
+# longest wait in seconds, and each client's token bucket (rate/s, burst).
+# Bookings get the largest share so chat spikes cannot starve them.
+ROUTE_CLASSES = {
+    'booking': {'weight': 8, 'queue': 64, 'wait': 10, 'rate': 1, 'burst': 5},
+    'default': {'weight': 4, 'queue': 64, 'wait': 5, 'rate': 10, 'burst': 20},
+    'search': {'weight': 2, 'queue': 16, 'wait': 2, 'rate': 2, 'burst': 10},
+    'chat': {'weight': 1, 'queue': 16, 'wait': 2, 'rate': 0.5, 'burst': 5}
+}
+
+# Flask endpoint -> route class; unlisted endpoints are 'default'
+ENDPOINT_CLASSES = {
+    'core.create_booking': 'booking',
+    'core.hold_slot': 'booking',
+    'core.release_slot': 'booking',
+    'core.chat': 'chat',
+    'inquiries.search_inquiries': 'search'
+}
+
+
+class Rejected(Exception):
+    """Request turned away; retry_after is the suggested wait in seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    """Admit requests by client budget, then by weighted share of in-flight slots
+
+    Each client gets a token bucket per route class, keyed by IP address. Admitted requests take one of max_in_flight slots; when
+    none are free they wait in a bounded queue for their class. A freed slot
+    goes to the waiting class with the lowest virtual time (stride
+    scheduling), so classes share capacity in proportion to their weights.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, classes=ROUTE_CLASSES):
+        self.classes = classes
+        self.free = max_in_flight
+        self._lock = threading.Lock()
+        self._queues = {name: deque() for name in classes}
+        self._passes = {name: 0.0 for name in classes}
+        self._virtual_time = 0.0
+        self._buckets = OrderedDict()
+
+    def check_rate(self, client, route_class):
+        """Take a token from the client's bucket for this class, or raise Rejected"""
+        key = (client, route_class)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket:
+                self._buckets.move_to_end(key)
+            else:
+                settings = self.classes[route_class]
+                bucket = self._buckets[key] = RateLimiter(settings['rate'], settings['burst'])
+                if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                    self._buckets.popitem(last=False)
+        wait = bucket.try_acquire()
+        if wait:
+            raise Rejected('Too many requests from this client', wait)
+
+    def acquire(self, route_class):
+        """Wait for an in-flight slot, or raise Rejected when the queue is full or the wait too long"""
+        settings = self.classes[route_class]
+        with self._lock:
+            if self.free > 0 and not any(self._queues.values()):
+                self.free -= 1
+                return
+            queue = self._queues[route_class]
+            if len(queue) >= settings['queue']:
+                raise Rejected('Server busy, please retry', settings['wait'])
+            granted = threading.Event()
+            queue.append(granted)
+            # A class that was idle rejoins at the current virtual time
+            if len(queue) == 1:
+                self._passes[route_class] = max(self._passes[route_class], self._virtual_time)
+
+        if granted.wait(settings['wait']):
+            return
+        with self._lock:
+            # The slot may have been handed over just as the wait timed out
+            if granted.is_set():
+                return
+            queue.remove(granted)
+        raise Rejected('Server busy, please retry', settings['wait'])
+
+    def release(self):
+        """Hand the slot to the next waiter by weighted share, or free it"""
+        with self._lock:
+            waiting = [name for name, queue in self._queues.items() if queue]
+            if not waiting:
+                self.free += 1
+                return
+            route_class = min(waiting, key=lambda name: self._passes[name])
+            self._virtual_time = self._passes[route_class]
+            self._passes[route_class] += 1.0 / self.classes[route_class]['weight']
+            self._queues[route_class].popleft().set()
+
+    def queue_lengths(self):
+        with self._lock:
+            return {name: len(queue) for name, queue in self._queues.items()}
+
+
+def client_key(remote_addr):
+    """Rate limit key for a caller: its IP address
+
+    Client-supplied headers are not used, since a client could send a new
+    value with every request to get a fresh budget. Behind a reverse proxy,
+    wrap the app in werkzeug's ProxyFix so remote_addr is the client rather
+    than the proxy.
+    """
+    return f"ip:{remote_addr}"
@@ -0,0 +1,228 @@
+"""Columnar booking analytics: utilization against crew capacity and status rates"""
+
+import threading
+from datetime import datetime
+import numpy as np
+from app.integrations.airtable.models import BOOKINGS_TABLE, BOOKING_STATUS_OPTIONS
+from app.integrations.google_calendar import config as calendar_config
+from app.core.reminders import BOOKING_TIMEZONE, booking_start
+
+RECONCILE_INTERVAL = 900  # seconds between full rescans of the Bookings table
+
+# Statuses whose bookings occupied a crew
+OCCUPYING_STATUSES = ('Scheduled', 'In Progress', 'Completed')
+
+_STATUS_CODES = {status: code for code, status in enumerate(BOOKING_STATUS_OPTIONS)}
+_UNKNOWN_STATUS = len(BOOKING_STATUS_OPTIONS)
+_OCCUPYING = np.array([status in OCCUPYING_STATUSES for status in BOOKING_STATUS_OPTIONS] + [False])
+_WORKING_HOURS = np.arange(calendar_config.WORKING_HOURS['start'], calendar_config.WORKING_HOURS['end'])
+
+
+class BookingAnalytics:
+    """Bookings held as numpy columns, aggregated with vectorized operations
+
+    The Bookings table is scanned in the background when the tenant starts
+    and rescanned every RECONCILE_INTERVAL to pick up changes made in
+    Airtable itself; in between, booking writes made through AirtableService
+    update the rows in place. A request that arrives before the first scan
+    has finished waits for it rather than starting another. Columns are
+    rebuilt from the rows only when something changed.
+    """
+
+    def __init__(self, airtable_service, crews=1):
+        self.airtable_service = airtable_service
+        self.crews = crews
+        self._rows = None  # booking id -> (start minute, status code)
+        self._columns = None
+        self._during_scan = None  # booking changes made while a scan runs
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        airtable_service.booking_listeners.append(self.on_booking_changed)
+
+    @staticmethod
+    def _row(fields):
+        start = booking_start(fields)
+        if start is None:
+            return None
+        status = _STATUS_CODES.get(fields.get('Status'), _UNKNOWN_STATUS)
+        # Rows hold local wall-clock minutes, so weekday and hour buckets are local
+        return np.datetime64(start.replace(tzinfo=None), 'm'), status
+
+    def load(self):
+        """Rebuild the rows from a full scan of the Bookings table"""
+        with self._load_lock:
+            self._load()
+
+    def _load(self):
+        with self._lock:
+            self._during_scan = []
+        try:
+            rows = {}
+            for record in self.airtable_service.iter_records(
+                BOOKINGS_TABLE, fields=['Start Date', 'Status', 'Notes']
+            ):
+                row = self._row(record.get('fields', {}))
+                if row:
+                    rows[record['id']] = row
+            with self._lock:
+                # The scan may have read some bookings before these writes
+                for record in self._during_scan:
+                    self._apply(rows, record)
+                self._rows = rows
+                self._columns = None
+        finally:
+            with self._lock:
+                self._during_scan = None
+        print(f"✅ Booking analytics loaded ({len(rows)} bookings)")
+
+    def start(self):
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='booking-analytics', daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.load()
+            except Exception as e:
+                print(f"⚠️ Booking analytics scan failed: {str(e)}")
+            self._stop.wait(RECONCILE_INTERVAL)
+
+    def on_booking_changed(self, record):
+        """Listener for bookings created or updated through AirtableService"""
+        with self._lock:
+            if self._during_scan is not None:
+                self._during_scan.append(record)
+            if self._rows is None:
+                return
+            self._apply(self._rows, record)
+            self._columns = None
+
+    def _apply(self, rows, record):
+        existing = rows.get(record['id'])
+        fields = record.get('fields', {})
+        if existing and 'Start Date' not in fields:
+            # Status-only updates do not carry the date
+            row = (existing[0], _STATUS_CODES.get(fields.get('Status'), existing[1]))
+        else:
+            row = self._row(fields)
+        if row:
+            rows[record['id']] = row
+        else:
+            rows.pop(record['id'], None)
+
+    def columns(self):
+        """(starts as datetime64[m], status codes), waiting for the first scan if needed"""
+        if self._rows is None:
+            with self._load_lock:
+                if self._rows is None:
+                    self._load()
+        with self._lock:
+            if self._columns is None:
+                rows = list(self._rows.values())
+                self._columns = (
+                    np.array([row[0] for row in rows], dtype='datetime64[m]'),
+                    np.array([row[1] for row in rows], dtype=np.int64)
+                )
+            return self._columns
+
+    def utilization(self, start_date, end_date, now=None):
+        """Booked crew hours against working-hours capacity for [start_date, end_date]
+
+        Returns daily and weekly totals, a weekday x hour breakdown, and the
+        share of bookings in each status. Scheduled bookings whose start has
+        passed count as no-shows.
+        """
+        starts, statuses = self.columns()
+        first_day = np.datetime64(start_date, 'D')
+        days = (np.datetime64(end_date, 'D') - first_day).astype(int) + 1
+        if days <= 0:
+            raise ValueError("end date must not be before start date")
+
+        in_range = (starts >= first_day) & (starts < first_day + days)
+        starts, statuses = starts[in_range], statuses[in_range]
+        occupying = _OCCUPYING[statuses]
+        hours_each = calendar_config.BOOKING_DURATION / 60
+
+        day_index = (starts.astype('datetime64[D]') - first_day).astype(np.int64)
+        hour = (starts - starts.astype('datetime64[D]')).astype('timedelta64[h]').astype(np.int64)
+        # 1970-01-01 was a Thursday; shift so Monday is 0
+        weekday = (starts.astype('datetime64[D]').astype(np.int64) + 3) % 7
+
+        # Capacity: every crew for every working hour of every weekday
+        calendar_days = first_day + np.arange(days)
+        day_weekdays = (calendar_days.astype(np.int64) + 3) % 7
+        workdays = day_weekdays < 5
+        hours_per_day = len(_WORKING_HOURS) * self.crews
+        daily_capacity = workdays * hours_per_day
+
+        daily_booked = np.bincount(day_index[occupying], minlength=days) * hours_each
+
+        # Weeks start on Monday; the first and last may be partial
+        week_index = (np.arange(days) + day_weekdays[0]) // 7
+        weeks = week_index[-1] + 1
+        weekly_booked = np.bincount(week_index, weights=daily_booked, minlength=weeks)
+        weekly_capacity = np.bincount(week_index, weights=daily_capacity, minlength=weeks)
+        week_starts = calendar_days[0] - day_weekdays[0] + 7 * np.arange(weeks)
+
+        grid_booked = np.bincount(
+            weekday[occupying] * 24 + hour[occupying], minlength=7 * 24
+        ).reshape(7, 24) * hours_each
+        weekday_counts = np.bincount(day_weekdays, minlength=7)
+        grid_capacity = np.zeros((7, 24))
+        grid_capacity[:5, _WORKING_HOURS] = weekday_counts[:5, None] * self.crews
+
+        status_counts = np.bincount(statuses, minlength=_UNKNOWN_STATUS + 1)
+        now = np.datetime64(now or datetime.now(BOOKING_TIMEZONE).replace(tzinfo=None), 'm')
+        no_shows = int(np.count_nonzero((statuses == _STATUS_CODES['Scheduled']) & (starts < now)))
+        total = len(statuses)
+
+        def rate(count):
+            return round(count / total, 4) if total else 0.0
+
+        def ratio(booked, capacity):
+            return np.round(np.divide(booked, capacity, out=np.zeros(len(booked)), where=capacity > 0), 4)
+
+        return {
+            'from': str(first_day),
+            'to': str(first_day + days - 1),
+            'crews': self.crews,
+            'bookings': total,
+            'booked_hours': float(daily_booked.sum()),
+            'capacity_hours': float(daily_capacity.sum()),
+            'utilization': float(ratio(np.array([daily_booked.sum()]), np.array([daily_capacity.sum()]))[0]),
+            'daily': [
+                {'date': str(day), 'booked_hours': float(booked), 'capacity_hours': float(capacity), 'utilization': float(util)}
+                for day, booked, capacity, util in zip(
+                    calendar_days, daily_booked, daily_capacity, ratio(daily_booked, daily_capacity)
+                )
+            ],
+            'weekly': [
+                {'week_start': str(week), 'booked_hours': float(booked), 'capacity_hours': float(capacity), 'utilization': float(util)}
+                for week, booked, capacity, util in zip(
+                    week_starts, weekly_booked, weekly_capacity, ratio(weekly_booked, weekly_capacity)
+                )
+            ],
+            'by_weekday_hour': {
+                'booked_hours': grid_booked.tolist(),
+                'capacity_hours': grid_capacity.tolist(),
+                'utilization': np.round(
+                    np.divide(grid_booked, grid_capacity, out=np.zeros((7, 24)), where=grid_capacity > 0), 4
+                ).tolist()
+            },
+            'status_rates': {
+                status: rate(int(status_counts[code])) for status, code in _STATUS_CODES.items()
+            },
+            'cancel_rate': rate(int(status_counts[_STATUS_CODES['Cancelled']])),
+            'no_show_rate': rate(no_shows)
+        }
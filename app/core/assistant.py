@@ -1,7 +1,7 @@
 import os
 import sys
 import traceback
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from app.core.knowledge_base.storage_info import STORAGE_UNITS, STORAGE_TIPS, LOCATION_FEATURES
 
 
@@ -23,6 +23,11 @@ class StorageAssistant:
                 api_key=api_key,
                 project=project_id
             )
+            # ASGI 模式使用的异步客户端
+            self.async_client = AsyncOpenAI(
+                api_key=api_key,
+                project=project_id
+            )
             print("✅ Successfully initialized OpenAI client")
         except Exception as e:
             print(f"❌ Error initializing OpenAI client: {str(e)}")
@@ -53,46 +58,62 @@ class StorageAssistant:
         Keep responses concise and provide personalized recommendations based on customer needs.
         """
 
-    def get_response(self, message):
-        """Get assistant response"""
+    def _build_request(self, message):
+        """Add the user message to the context and build the completion request"""
         self.context.append({"role": "user", "content": message})
+        print("\n📤 Sending request to OpenAI API...")
+        print(f"User message: {message}")
+        print(f"Context length: {len(self.context)}")
+        return dict(
+            model="gpt-4o-mini",  # 使用 gpt-4o-mini 模型
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                *self.context
+            ],
+            temperature=0.7,
+            max_tokens=1000
+        )
 
-        try:
-            print("\n📤 Sending request to OpenAI API...")
-            print(f"User message: {message}")
-            print(f"Context length: {len(self.context)}")
+    def _handle_response(self, response):
+        print("✅ Received response from OpenAI API")
 
-            # ✅ 向 OpenAI 发送消息请求
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # 使用 gpt-4o-mini 模型
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    *self.context
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
+        assistant_message = response.choices[0].message.content
+        print(f"🤖 Assistant response: {assistant_message}")
 
-            print("✅ Received response from OpenAI API")
+        self.context.append({"role": "assistant", "content": assistant_message})
 
-            assistant_message = response.choices[0].message.content
-            print(f"🤖 Assistant response: {assistant_message}")
+        # 控制上下文长度
+        if len(self.context) > 10:
+            self.context = self.context[-10:]
 
-            self.context.append({"role": "assistant", "content": assistant_message})
+        return assistant_message
 
-            # 控制上下文长度
-            if len(self.context) > 10:
-                self.context = self.context[-10:]
+    def get_response(self, message):
+        """Get assistant response"""
+        try:
+            # ✅ 向 OpenAI 发送消息请求
+            response = self.client.chat.completions.create(**self._build_request(message))
+            return self._handle_response(response)
 
-            return assistant_message
+        except Exception as e:
+            return self._handle_error(e)
+
+    async def get_response_async(self, message):
+        """Get assistant response without blocking the event loop"""
+        try:
+            response = await self.async_client.chat.completions.create(**self._build_request(message))
+            return self._handle_response(response)
 
         except Exception as e:
-            print(f"\n❌ Error getting response: {str(e)}", file=sys.stderr)
-            print(f"Error type: {type(e)}", file=sys.stderr)
-            print(traceback.format_exc(), file=sys.stderr)
+            return self._handle_error(e)
+
+    def _handle_error(self, e):
+        print(f"\n❌ Error getting response: {str(e)}", file=sys.stderr)
+        print(f"Error type: {type(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
 
-            # 打印 response body（如果有）
-            if hasattr(e, 'response'):
-                print("Response error:", getattr(e.response, 'text', 'No response text'), file=sys.stderr)
+        # 打印 response body（如果有）
+        if hasattr(e, 'response'):
+            print("Response error:", getattr(e.response, 'text', 'No response text'), file=sys.stderr)
 
-            return "Sorry, I cannot process your request at the moment. Please try again later."
+        return "Sorry, I cannot process your request at the moment. Please try again later."
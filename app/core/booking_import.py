@@ -0,0 +1,238 @@
+"""Bulk booking import from streamed CSV or NDJSON uploads"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from app.integrations.airtable.customer_index import contact_key
+from app.integrations.google_calendar.capacity import CapacityScheduler
+
+# Rows accumulated before calendar and Airtable writes are flushed together
+IMPORT_CHUNK_SIZE = 50
+# Airtable creates at most 10 records per request
+AIRTABLE_BATCH_SIZE = 10
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+REQUIRED_COLUMNS = ('start_time', 'name', 'contact')
+
+
+def iter_rows(stream, fmt):
+    """Yield (row_number, row dict or error string) from a binary stream, one row at a time"""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+    else:
+        for row_number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield row_number, f"Invalid JSON: {str(e)}"
+                continue
+            if not isinstance(row, dict):
+                yield row_number, "Each line must be a JSON object"
+                continue
+            yield row_number, {k.lower(): v for k, v in row.items()}
+
+
+def detect_format(fmt, filename=None, content_type=None):
+    """Work out the upload format from an explicit value, filename or content type"""
+    if fmt:
+        fmt = fmt.lower()
+    elif filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        fmt = 'ndjson'
+    elif content_type and 'ndjson' in content_type:
+        fmt = 'ndjson'
+    else:
+        fmt = 'csv'
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported format. Must be one of: {list(IMPORT_FORMATS)}")
+    return fmt
+
+
+class BookingImporter:
+    """Import bookings in chunks, reusing customers and batching remote writes
+
+    Each row is booked on a crew calendar picked the way live bookings are,
+    skipping crews that customers' slot holds keep when slot_holds is given.
+    """
+
+    def __init__(self, airtable_service, calendar_service, slot_holds=None):
+        self.airtable_service = airtable_service
+        self.calendar_service = calendar_service
+        self.slot_holds = slot_holds
+        self.customers = {}  # normalized contact -> customer id
+
+    def run(self, rows):
+        """Consume (row_number, row) pairs and yield one result dict per row"""
+        pending = []
+        for row_number, row in rows:
+            try:
+                pending.append(self._prepare(row_number, row))
+            except ValueError as e:
+                yield {'row': row_number, 'status': 'error', 'error': str(e)}
+                continue
+
+            if len(pending) >= IMPORT_CHUNK_SIZE:
+                yield from self._flush(pending)
+                pending = []
+
+        if pending:
+            yield from self._flush(pending)
+
+    def _prepare(self, row_number, row):
+        if isinstance(row, str):
+            raise ValueError(row)
+
+        missing_fields = [field for field in REQUIRED_COLUMNS if not row.get(field)]
+        if missing_fields:
+            raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+        try:
+            start_datetime = datetime.fromisoformat(str(row['start_time']).replace('Z', '+00:00'))
+        except ValueError as e:
+            raise ValueError(f"Invalid datetime format: {str(e)}")
+
+        contact = str(row['contact']).strip()
+        customer_info = {'Name': row['name'], 'Address': row.get('address', '')}
+        if '@' in contact:
+            customer_info['Email'] = contact
+        else:
+            customer_info['Phone'] = contact
+        return {
+            'row': row_number,
+            'start': start_datetime,
+            'name': row['name'],
+            'contact': contact,
+            'address': row.get('address') or 'No address provided',
+            'customer_info': customer_info
+        }
+
+    def _resolve_customers(self, pending):
+        """Find or create the chunk's new customers with batched Airtable calls
+
+        Customers seen earlier in the import are reused. Yields an error
+        result for each row whose customer could not be resolved and returns
+        the rest, each with its 'customer_id' set.
+        """
+        new = {}
+        for item in pending:
+            key = contact_key(item['contact'])
+            if key not in self.customers:
+                new.setdefault(key, item['customer_info'])
+        if new:
+            try:
+                self.customers.update(self.airtable_service.find_or_create_customers(list(new.values())))
+            except Exception as e:
+                print(f"❌ Error resolving imported customers: {str(e)}")
+                for item in pending:
+                    yield {'row': item['row'], 'status': 'error', 'error': f"Failed to process customer information: {str(e)}"}
+                return []
+
+        for item in pending:
+            item['customer_id'] = self.customers[contact_key(item['contact'])]
+        return pending
+
+    def _assign_crews(self, pending):
+        """Pick a crew for each row from one fresh load of the chunk's days
+
+        Yields an error result for every row that gets no crew and returns
+        the rows that did, each with its 'crew' set.
+        """
+        starts = [self.calendar_service.to_local(item['start']) for item in pending]
+        first = min(starts)
+        try:
+            scheduler = CapacityScheduler(self.calendar_service).load(
+                first, days=(max(starts).date() - first.date()).days + 1, fresh=True
+            )
+        except Exception as e:
+            print(f"❌ Error loading crew availability for import: {str(e)}")
+            for item in pending:
+                yield {'row': item['row'], 'status': 'error', 'error': f"Failed to check crew availability: {str(e)}"}
+            return []
+
+        assigned = []
+        for item, start in zip(pending, starts):
+            exclude = self.slot_holds.reserved_crews(start) if self.slot_holds else ()
+            # Marks the crew busy, so later rows in the chunk see this booking
+            item['crew'] = scheduler.assign(start, exclude=exclude)
+            if not item['crew']:
+                yield {'row': item['row'], 'status': 'error', 'error': 'No collection crews are available for this time slot'}
+                continue
+            assigned.append(item)
+        return assigned
+
+    def _flush(self, pending):
+        print(f"📦 Importing {len(pending)} bookings")
+        pending = yield from self._resolve_customers(pending)
+        if not pending:
+            return
+        pending = yield from self._assign_crews(pending)
+        if not pending:
+            return
+        events = self.calendar_service.create_bookings_batch([
+            (
+                item['start'],
+                {'name': item['name'], 'contact': item['contact'], 'address': item['address']},
+                item['crew']['calendar_id']
+            )
+            for item in pending
+        ])
+
+        scheduled = []
+        for item, event in zip(pending, events):
+            if event.get('status') != 'success':
+                yield {
+                    'row': item['row'],
+                    'status': 'error',
+                    'error': f"Failed to create calendar event: {event.get('message')}"
+                }
+                continue
+            item['event_id'] = event['event_id']
+            scheduled.append(item)
+
+        for offset in range(0, len(scheduled), AIRTABLE_BATCH_SIZE):
+            yield from self._write_bookings(scheduled[offset:offset + AIRTABLE_BATCH_SIZE])
+
+    def _write_bookings(self, scheduled):
+        booking_data = [
+            {
+                'Customer': [item['customer_id']],
+                'Start Date': item['start'].strftime("%Y-%m-%d"),
+                'Status': 'Scheduled',
+                'Calendar Event ID': item['event_id'],
+                'Notes': (
+                    f"Time: {item['start'].strftime('%I:%M %p')}\n"
+                    f"Address: {item['address']}\n"
+                    f"Contact: {item['contact']}"
+                )
+            }
+            for item in scheduled
+        ]
+
+        try:
+            bookings = self.airtable_service.create_bookings_batch(booking_data)
+        except Exception as e:
+            print(f"❌ Error creating imported bookings in Airtable: {str(e)}")
+            # Clean up calendar events so a retried import does not double book
+            for item in scheduled:
+                try:
+                    self.calendar_service.delete_event(item['event_id'], calendar_id=item['crew']['calendar_id'])
+                except Exception as cleanup_error:
+                    print(f"⚠️ Failed to clean up calendar event: {str(cleanup_error)}")
+            for item in scheduled:
+                yield {'row': item['row'], 'status': 'error', 'error': f"Failed to create booking: {str(e)}"}
+            return
+
+        for item, booking in zip(scheduled, bookings):
+            yield {
+                'row': item['row'],
+                'status': 'success',
+                'booking_id': booking['id'],
+                'customer_id': item['customer_id'],
+                'calendar_event_id': item['event_id']
+            }
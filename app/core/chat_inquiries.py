@@ -0,0 +1,456 @@
+"""Turn finished chat sessions into Inquiries records, in batches off the request path"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from app.integrations.airtable.models import INQUIRY_TYPE_OPTIONS, INQUIRY_TYPES, PRIORITIES
+
+SESSION_IDLE = int(os.getenv('CHAT_SESSION_IDLE', 900))  # seconds of quiet before a chat counts as finished
+CLASSIFY_INTERVAL = int(os.getenv('CHAT_CLASSIFY_INTERVAL', 60))  # seconds between pipeline runs
+CLASSIFY_BATCH = int(os.getenv('CHAT_CLASSIFY_BATCH', 20))  # conversations per LLM request
+CLAIM_TTL = 600  # seconds before a batch claimed by a crashed worker is retried
+MAX_ATTEMPTS = 6  # failed attempts before a session is parked for an operator
+MAX_TRANSCRIPT_CHARS = 4000  # per conversation in the classification prompt
+MAX_SUBJECT_LENGTH = 100
+CLASSIFIER_MODEL = 'gpt-4o-mini'
+
+# Conversation id: sent back as a cookie, or by API clients in the request body
+CHAT_SESSION_COOKIE = 'chat_session'
+_SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+_EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+_PHONE_PATTERN = re.compile(r'\+?\d[\d\s().-]{7,}\d')
+
+
+def chat_session_id(requested):
+    """The client's conversation id if it looks like one, otherwise a new one"""
+    if isinstance(requested, str) and _SESSION_ID_PATTERN.match(requested):
+        return requested
+    return uuid.uuid4().hex
+
+
+def record_chat(sessions, session_id, message, response):
+    """Log an exchange for the pipeline; a failure is logged, never raised into the chat reply"""
+    try:
+        sessions.record(session_id, message, response)
+    except Exception as e:
+        print(f"⚠️ Failed to log chat session {session_id}: {str(e)}")
+
+
+class ChatClaim:
+    """A finished session claimed for classification
+
+    inquiry holds the inquiry fields once the session has been classified;
+    it is kept across failed writes so a retry does not call the LLM again.
+    """
+
+    __slots__ = ('session_id', 'claimed_at', 'messages', 'inquiry')
+
+    def __init__(self, session_id, claimed_at, messages, inquiry=None):
+        self.session_id = session_id
+        self.claimed_at = claimed_at
+        self.messages = messages
+        self.inquiry = inquiry
+
+
+class ChatSessionLog:
+    """SQLite log of chat messages grouped by session
+
+    Sessions that have been quiet for SESSION_IDLE seconds are claimed in a
+    transaction, so each is classified by one worker even when several share
+    the file. Messages that arrive after a claim stay for the next run. A
+    session that fails is retried with exponential backoff and parked after
+    MAX_ATTEMPTS, so one bad conversation cannot hold up the rest.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('CHAT_SESSIONS_PATH', 'chat_sessions.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    last_message_at REAL NOT NULL,
+                    claimed_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    retry_at REAL NOT NULL DEFAULT 0,
+                    parked INTEGER NOT NULL DEFAULT 0,
+                    inquiry TEXT
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_messages (
+                    session_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, created_at)"
+            )
+
+    def record(self, session_id, message, response):
+        """Append one exchange; a local insert, cheap enough for the chat handler"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO chat_messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                    [(session_id, 'user', message, now), (session_id, 'assistant', response, now)]
+                )
+                # New messages make any earlier classification stale
+                self._conn.execute(
+                    "INSERT INTO chat_sessions (session_id, last_message_at) VALUES (?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET last_message_at = excluded.last_message_at, inquiry = NULL",
+                    (session_id, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def claim_finished(self, limit, idle=SESSION_IDLE, now=None):
+        """Claim up to limit idle sessions that are due, as ChatClaims"""
+        now = now or time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT session_id, inquiry FROM chat_sessions WHERE last_message_at <= ? "
+                    "AND (claimed_at IS NULL OR claimed_at <= ?) AND retry_at <= ? AND parked = 0 "
+                    "ORDER BY attempts, last_message_at LIMIT ?",
+                    (now - idle, now - CLAIM_TTL, now, limit)
+                ).fetchall()
+                claimed = []
+                for session_id, inquiry in rows:
+                    self._conn.execute(
+                        "UPDATE chat_sessions SET claimed_at = ? WHERE session_id = ?", (now, session_id)
+                    )
+                    messages = [
+                        {'role': role, 'content': content}
+                        for role, content in self._conn.execute(
+                            "SELECT role, content FROM chat_messages WHERE session_id = ? AND created_at <= ? "
+                            "ORDER BY created_at, rowid",
+                            (session_id, now)
+                        )
+                    ]
+                    claimed.append(ChatClaim(session_id, now, messages, json.loads(inquiry) if inquiry else None))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def save_inquiries(self, claims):
+        """Keep the classified inquiry of each claim for retries"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE chat_sessions SET inquiry = ? WHERE session_id = ? AND claimed_at = ?",
+                [(json.dumps(claim.inquiry), claim.session_id, claim.claimed_at) for claim in claims]
+            )
+
+    def complete(self, claims):
+        """Drop the messages of sessions whose inquiries exist; later messages start a new session"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for claim in claims:
+                    self._conn.execute(
+                        "DELETE FROM chat_messages WHERE session_id = ? AND created_at <= ?",
+                        (claim.session_id, claim.claimed_at)
+                    )
+                    self._conn.execute(
+                        "DELETE FROM chat_sessions WHERE session_id = ? AND last_message_at <= ?",
+                        (claim.session_id, claim.claimed_at)
+                    )
+                    self._conn.execute(
+                        "UPDATE chat_sessions SET claimed_at = NULL, attempts = 0, retry_at = 0, inquiry = NULL "
+                        "WHERE session_id = ?",
+                        (claim.session_id,)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def fail(self, claims, now=None):
+        """Put sessions back with backoff; returns the ids parked after MAX_ATTEMPTS"""
+        now = now or time.time()
+        parked = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for claim in claims:
+                    row = self._conn.execute(
+                        "SELECT attempts FROM chat_sessions WHERE session_id = ? AND claimed_at = ?",
+                        (claim.session_id, claim.claimed_at)
+                    ).fetchone()
+                    if not row:
+                        continue
+                    attempts = row[0] + 1
+                    if attempts >= MAX_ATTEMPTS:
+                        parked.append(claim.session_id)
+                    self._conn.execute(
+                        "UPDATE chat_sessions SET claimed_at = NULL, attempts = ?, retry_at = ?, parked = ? "
+                        "WHERE session_id = ?",
+                        (attempts, now + CLASSIFY_INTERVAL * 2 ** attempts, int(attempts >= MAX_ATTEMPTS),
+                         claim.session_id)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return parked
+
+    def parked_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chat_sessions WHERE parked = 1").fetchone()[0]
+
+
+def transcript(messages, limit=None):
+    """Plain-text transcript, keeping the end of the conversation when it is too long"""
+    text = '\n'.join(
+        f"{'Customer' if message['role'] == 'user' else 'Assistant'}: {message['content']}"
+        for message in messages
+    )
+    if limit and len(text) > limit:
+        text = '...' + text[-limit:]
+    return text
+
+
+class StubClassifier:
+    """Keyword rules standing in for the LLM in tests and local development"""
+
+    RULES = (
+        ('Complaint', 'High', ('complain', 'unacceptable', 'damaged', 'refund', 'angry')),
+        ('Technical Support', 'High', ('gate code', 'access', 'locked out', "can't get in", 'broken')),
+        ('Booking Request', 'Medium', ('book', 'reserve', 'move in', 'schedule')),
+        ('Availability Check', 'Medium', ('available', 'availability', 'vacancy')),
+        ('Pricing Inquiry', 'Medium', ('price', 'cost', 'how much', 'rate', 'discount')),
+        ('Storage Size Question', 'Low', ('size', 'fit', 'square feet', 'sq ft', 'how big')),
+        ('Feedback', 'Low', ('thank', 'great service', 'feedback', 'suggest')),
+    )
+
+    def classify(self, conversations):
+        results = []
+        for messages in conversations:
+            customer_text = ' '.join(m['content'] for m in messages if m['role'] == 'user')
+            lowered = customer_text.lower()
+            inquiry_type, priority = 'Other', 'Low'
+            for rule_type, rule_priority, keywords in self.RULES:
+                if any(keyword in lowered for keyword in keywords):
+                    inquiry_type, priority = rule_type, rule_priority
+                    break
+            first = next((m['content'] for m in messages if m['role'] == 'user'), '')
+            results.append({'type': inquiry_type, 'priority': priority, 'subject': first})
+        return results
+
+
+class OpenAIClassifier:
+    """Classify many conversations with one chat completion
+
+    Conversations are numbered in the prompt and the model answers with a
+    JSON object listing a type, priority and subject for each number. Any
+    conversation the model skips falls back to the stub rules.
+    """
+
+    def __init__(self, client, model=CLASSIFIER_MODEL):
+        self.client = client
+        self.model = model
+        self.fallback = StubClassifier()
+        self.system_prompt = f"""
+        You triage customer chats for a self storage facility. For each numbered
+        conversation, choose:
+        - type: one of {INQUIRY_TYPE_OPTIONS}
+        - priority: Low, Medium, High or Urgent
+        - subject: a short subject line (under 80 characters) for the inquiry
+        Reply with JSON only: {{"results": [{{"id": 0, "type": "...", "priority": "...", "subject": "..."}}]}}
+        """
+
+    def classify(self, conversations):
+        prompt = '\n\n'.join(
+            f"### Conversation {index}\n{transcript(messages, MAX_TRANSCRIPT_CHARS)}"
+            for index, messages in enumerate(conversations)
+        )
+        print(f"\n📤 Classifying {len(conversations)} chat sessions in one request...")
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0
+        )
+        answers = {}
+        for result in json.loads(response.choices[0].message.content).get('results', []):
+            if isinstance(result, dict) and isinstance(result.get('id'), int):
+                answers[result['id']] = result
+        missing = [index for index in range(len(conversations)) if index not in answers]
+        if missing:
+            print(f"⚠️ Classifier skipped {len(missing)} conversations, using keyword rules")
+            for index, result in zip(missing, self.fallback.classify([conversations[i] for i in missing])):
+                answers[index] = result
+        return [answers[index] for index in range(len(conversations))]
+
+
+@lru_cache(maxsize=None)
+def default_classifier():
+    """OpenAI when CHAT_CLASSIFIER is 'openai' (the default with an API key), else the stub rules"""
+    backend = os.getenv('CHAT_CLASSIFIER') or ('openai' if os.getenv('OPENAI_API_KEY') else 'stub')
+    if backend != 'openai':
+        print("ℹ️ Classifying chat sessions with keyword rules")
+        return StubClassifier()
+    from openai import OpenAI
+    return OpenAIClassifier(OpenAI(api_key=os.getenv('OPENAI_API_KEY'), project=os.getenv('OPENAI_PROJECT_ID')))
+
+
+class ChatInquiryPipeline:
+    """Every CLASSIFY_INTERVAL, classify finished chat sessions and create their inquiries
+
+    Each batch takes one classifier request and one batched Airtable write.
+    Customers are linked when the chat mentions an email or phone number
+    that matches one. When a batch fails, its conversations or records are
+    retried one at a time, so only the bad ones go back to the log.
+    """
+
+    def __init__(self, airtable_service, sessions, classifier=None, batch_size=CLASSIFY_BATCH):
+        self.airtable_service = airtable_service
+        self.sessions = sessions
+        self.classifier = classifier
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._worker = None
+
+    def start(self):
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='chat-inquiries', daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
+    def _customer_for(self, messages):
+        for message in messages:
+            if message['role'] != 'user':
+                continue
+            for pattern in (_EMAIL_PATTERN, _PHONE_PATTERN):
+                for contact in pattern.findall(message['content']):
+                    try:
+                        customer = self.airtable_service.find_customer(contact)
+                    except Exception as e:
+                        print(f"⚠️ Customer lookup for chat session failed: {str(e)}")
+                        continue
+                    if customer:
+                        return customer['id']
+        return None
+
+    def _inquiry(self, messages, result):
+        inquiry_type = result.get('type')
+        priority = result.get('priority')
+        subject = ' '.join(str(result.get('subject') or '').split()) or 'Chat conversation'
+        if len(subject) > MAX_SUBJECT_LENGTH:
+            subject = subject[:MAX_SUBJECT_LENGTH - 3].rstrip() + '...'
+        fields = {
+            'Subject': subject,
+            'Type': inquiry_type if inquiry_type in INQUIRY_TYPES else 'Other',
+            'Priority': priority if priority in PRIORITIES else 'Medium',
+            'Message': transcript(messages)
+        }
+        customer_id = self._customer_for(messages)
+        if customer_id:
+            fields['Customer'] = [customer_id]
+        return fields
+
+    def _fail(self, claims, error, now):
+        print(f"❌ Failed to turn {len(claims)} chat sessions into inquiries: {str(error)}")
+        for session_id in self.sessions.fail(claims, now=now):
+            print(f"🅿️ Parked chat session {session_id} after {MAX_ATTEMPTS} attempts")
+
+    def _classify(self, classifier, claims, now):
+        """Fill in claim.inquiry; a failed batch is retried one conversation at a time"""
+        try:
+            results = classifier.classify([claim.messages for claim in claims])
+        except Exception as e:
+            if len(claims) == 1:
+                self._fail(claims, e, now)
+                return
+            print(f"⚠️ Classifying {len(claims)} chat sessions failed, retrying one at a time: {str(e)}")
+            for claim in claims:
+                self._classify(classifier, [claim], now)
+            return
+        for claim, result in zip(claims, results):
+            claim.inquiry = self._inquiry(claim.messages, result)
+        self.sessions.save_inquiries(claims)
+
+    def _create(self, claims, now):
+        """Create inquiries for classified claims; returns how many were created"""
+        try:
+            self.airtable_service.create_inquiries_batch(
+                [claim.inquiry for claim in claims], created_by='Chat Classifier'
+            )
+            self.sessions.complete(claims)
+            return len(claims)
+        except Exception as e:
+            # Records written before the failure must not be created again
+            written = len(getattr(e, 'created', []))
+            self.sessions.complete(claims[:written])
+            if len(claims) - written == 1:
+                self._fail(claims[written:], e, now)
+                return written
+            print(f"⚠️ Inquiry batch failed after {written} records, retrying the rest one at a time")
+        created = written
+        for claim in claims[written:]:
+            try:
+                self.airtable_service.create_inquiries_batch([claim.inquiry], created_by='Chat Classifier')
+            except Exception as e:
+                self._fail([claim], e, now)
+                continue
+            self.sessions.complete([claim])
+            created += 1
+        return created
+
+    def run_once(self, now=None):
+        """Process every finished session that is due; returns the number of inquiries created"""
+        classifier = self.classifier or default_classifier()
+        now = now or time.time()
+        created = 0
+        while True:
+            batch = self.sessions.claim_finished(self.batch_size, now=now)
+            if not batch:
+                return created
+            self.sessions.complete([claim for claim in batch if not claim.messages])
+            batch = [claim for claim in batch if claim.messages]
+            unclassified = [claim for claim in batch if claim.inquiry is None]
+            if unclassified:
+                self._classify(classifier, unclassified, now)
+            ready = [claim for claim in batch if claim.inquiry is not None]
+            if ready:
+                count = self._create(ready, now)
+                created += count
+                print(f"✅ Created {count} inquiries from chat sessions")
+
+    def _run(self):
+        while not self._stop.wait(CLASSIFY_INTERVAL):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"⚠️ Chat inquiry pipeline failed: {str(e)}")
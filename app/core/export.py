@@ -0,0 +1,90 @@
+"""Streaming CSV/NDJSON export of Airtable tables"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, timedelta
+from app.integrations.airtable.models import (
+    CUSTOMERS_TABLE, BOOKINGS_TABLE, INQUIRIES_TABLE,
+    CUSTOMER_FIELDS, BOOKING_FIELDS, INQUIRY_FIELDS
+)
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# Export name -> (Airtable table, formula expression used for date filtering, columns)
+EXPORT_TABLES = {
+    'customers': (CUSTOMERS_TABLE, 'CREATED_TIME()', list(CUSTOMER_FIELDS)),
+    'bookings': (BOOKINGS_TABLE, '{Start Date}', list(BOOKING_FIELDS)),
+    'inquiries': (INQUIRIES_TABLE, 'CREATED_TIME()', list(INQUIRY_FIELDS)),
+}
+
+
+def build_date_formula(date_expr, start=None, end=None):
+    """Build an inclusive date range filter; start and end are YYYY-MM-DD strings"""
+    clauses = []
+    if start:
+        start = date.fromisoformat(start)
+        clauses.append(f"NOT(IS_BEFORE({date_expr}, '{start.isoformat()}'))")
+    if end:
+        end = date.fromisoformat(end) + timedelta(days=1)
+        clauses.append(f"IS_BEFORE({date_expr}, '{end.isoformat()}')")
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return f"AND({', '.join(clauses)})"
+
+
+def _cell(value):
+    if isinstance(value, list):
+        return ';'.join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return '' if value is None else value
+
+
+def iter_csv(records, columns):
+    """Yield CSV text one row at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['id'] + columns)
+    for record in records:
+        fields = record.get('fields', {})
+        writer.writerow([record.get('id')] + [_cell(fields.get(column)) for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    # Header only when there were no records
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(records):
+    for record in records:
+        yield json.dumps({'id': record.get('id'), 'fields': record.get('fields', {})}) + '\n'
+
+
+def gzip_stream(chunks):
+    """Gzip-compress a stream of text chunks without buffering the whole body"""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_table(airtable_service, name, fmt='csv', start=None, end=None):
+    """Return a generator of text chunks for one export table"""
+    if name not in EXPORT_TABLES:
+        raise ValueError(f"Unknown export. Must be one of: {list(EXPORT_TABLES)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format. Must be one of: {list(EXPORT_FORMATS)}")
+
+    table_name, date_expr, columns = EXPORT_TABLES[name]
+    formula = build_date_formula(date_expr, start, end)
+    records = airtable_service.iter_records(table_name, formula=formula)
+    if fmt == 'csv':
+        return iter_csv(records, columns)
+    return iter_ndjson(records)
@@ -0,0 +1,106 @@
+"""ETag response cache and conditional GETs for polled read endpoints"""
+
+import hashlib
+import json
+from flask import current_app, request
+from app.core.shared_cache import LocalStore
+
+# Seconds a computed response stays fresh, and the Cache-Control sent with it.
+# Slots also depend on calendar edits made outside the app, so they expire
+# quickly; inquiry data only changes through AirtableService and is
+# invalidated on write, so clients revalidate on every poll.
+ROUTE_CACHE = {
+    'slots': (30, 'private, max-age=10'),
+    'customer-inquiries': (300, 'private, no-cache'),
+    'inquiry-history': (300, 'private, no-cache')
+}
+MAX_ENTRIES = 1000
+
+
+class CachedResponse:
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+
+
+def compute_etag(body):
+    """Strong ETag from a hash of the serialized response body"""
+    return hashlib.sha1(body).hexdigest()
+
+
+class ResponseCache:
+    """Serialized JSON responses keyed by route and arguments
+
+    Entries carry tags such as 'inquiry:<id>' or 'customer:<id>'.
+    AirtableService writes invalidate the matching tags, so a fresh entry can
+    answer If-None-Match without a round trip to Airtable. Entries live in
+    store, which may be shared with the other workers on the host; keys and
+    tags are prefixed with namespace so tenants sharing a store stay apart.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, store=None, namespace=''):
+        self.store = store or LocalStore(max_entries)
+        self.namespace = namespace
+
+    def _tags(self, tags):
+        return [f"{self.namespace}/{tag}" for tag in tags]
+
+    def get(self, key):
+        return self.store.get((self.namespace,) + key)
+
+    def put(self, key, payload, tags, ttl):
+        body = json.dumps(payload, sort_keys=True, default=str).encode()
+        entry = CachedResponse(body, compute_etag(body))
+        self.store.put((self.namespace,) + key, entry, self._tags(tags), ttl)
+        return entry
+
+    def dump(self):
+        """Live entries as (key, body, etag, tags, seconds left) for a snapshot"""
+        prefix = len(self.namespace) + 1
+        return [
+            (key[1:], entry.body, entry.etag, sorted(tag[prefix:] for tag in tags), ttl)
+            for key, entry, tags, ttl in self.store.entries(self.namespace)
+        ]
+
+    def restore(self, key, body, etag, tags, ttl):
+        """Add an entry from a snapshot; body may be a memoryview over the mapped file
+
+        A shared store outlives any one worker and may have seen invalidations
+        since the snapshot was written, so only local stores are restored.
+        """
+        if ttl > 0 and isinstance(self.store, LocalStore):
+            self.store.put((self.namespace,) + key, CachedResponse(body, etag), self._tags(tags), ttl)
+
+    def invalidate(self, *tags):
+        self.store.invalidate(*self._tags(tags))
+
+    def on_inquiry_changed(self, inquiry):
+        """Listener for inquiry and history writes made through AirtableService"""
+        customers = inquiry.get('fields', {}).get('Customer') or []
+        self.invalidate(f"inquiry:{inquiry['id']}", *(f"customer:{customer_id}" for customer_id in customers))
+
+    def on_booking_changed(self, booking):
+        """Listener for booking writes; new bookings take crew capacity"""
+        self.invalidate('slots')
+
+
+def conditional_json(cache, route, key, tags, compute):
+    """Serve compute()'s JSON with an ETag, answering 304 when the client's copy is current
+
+    compute only runs when there is no fresh cache entry for key.
+    """
+    ttl, cache_control = ROUTE_CACHE[route]
+    key = (route,) + tuple(key)
+    entry = cache.get(key)
+    if entry is None:
+        entry = cache.put(key, compute(), tags, ttl)
+
+    if entry.etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(bytes(entry.body), mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
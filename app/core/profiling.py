@@ -0,0 +1,98 @@
+"""On-demand sampling profiler and slow-request phase timing"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from flask import g, has_request_context
+
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+MAX_PROFILE_SECONDS = 60
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+SLOW_REQUEST_THRESHOLD = float(os.getenv('SLOW_REQUEST_THRESHOLD', 2.0))  # seconds
+SLOW_REQUEST_LOG_SIZE = 100
+
+
+class SamplingProfiler:
+    """Sample every thread's stack on an interval and count collapsed stacks
+
+    The output is the "collapsed" format read by flamegraph.pl and
+    speedscope: one line per distinct stack, frames joined by ';' from the
+    outermost call, followed by the number of samples. Only one profile runs
+    at a time; nothing is sampled between runs.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._running = threading.Lock()
+
+    def run(self, seconds):
+        """Profile for `seconds` and return collapsed stacks; None if a profile is already running"""
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            counts = Counter()
+            own_thread = threading.get_ident()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != own_thread:
+                        counts[self._collapse(frame)] += 1
+                time.sleep(self.interval)
+            return '\n'.join(f"{stack} {count}" for stack, count in counts.most_common())
+        finally:
+            self._running.release()
+
+    @staticmethod
+    def _collapse(frame):
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(frames))
+
+
+@contextmanager
+def phase(name):
+    """Time a step of the current request for the slow-request log"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context():
+            phases = g.setdefault('phases', {})
+            phases[name] = phases.get(name, 0) + time.perf_counter() - start
+
+
+class SlowRequestLog:
+    """Keep the most recent requests slower than the threshold, with their phase timings"""
+
+    def __init__(self, threshold=SLOW_REQUEST_THRESHOLD, size=SLOW_REQUEST_LOG_SIZE):
+        self.threshold = threshold
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, method, path, status, seconds, phases):
+        if seconds < self.threshold:
+            return
+        timings = {name: round(elapsed * 1000, 1) for name, elapsed in phases.items()}
+        timings['other'] = round((seconds - sum(phases.values())) * 1000, 1)
+        entry = {
+            'at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'method': method,
+            'path': path,
+            'status': status,
+            'total_ms': round(seconds * 1000, 1),
+            'phases_ms': timings
+        }
+        print(f"🐢 Slow request: {method} {path} took {entry['total_ms']}ms {timings}")
+        with self._lock:
+            self._entries.append(entry)
+
+    def recent(self):
+        with self._lock:
+            return list(reversed(self._entries))
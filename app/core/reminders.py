@@ -0,0 +1,344 @@
+"""Booking reminders scheduled on a hierarchical timer wheel"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+import pytz
+from app.integrations.airtable.models import BOOKINGS_TABLE
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process sends its own reminders
+    fcntl = None
+
+REMINDER_LEAD_HOURS = float(os.getenv('REMINDER_LEAD_HOURS', 24))
+REMINDER_TICK = 1.0  # seconds; reminders fire at most one tick late
+RELOAD_INTERVAL = int(os.getenv('REMINDER_RELOAD_INTERVAL', 300))  # seconds between booking rescans
+OWNER_RETRY = 30  # seconds between attempts to take over sending reminders
+SENT_RETENTION = 7 * 86400  # seconds sent reminders are remembered
+
+# Slots per wheel level: seconds, minutes, hours, days
+WHEEL_SLOTS = (60, 60, 24, 64)
+
+DEFAULT_BOOKING_TIME = '09:00 AM'
+# Booking dates and times are wall-clock times in the calendar's time zone
+BOOKING_TIMEZONE = pytz.timezone('America/Los_Angeles')
+_TIME_PATTERN = re.compile(r'Time:\s*(\d{1,2}:\d{2}\s*[AP]M)', re.IGNORECASE)
+
+
+class _Timer:
+    __slots__ = ('key', 'expiry', 'payload', 'cancelled')
+
+    def __init__(self, key, expiry, payload):
+        self.key = key
+        self.expiry = expiry
+        self.payload = payload
+        self.cancelled = False
+
+
+class TimerWheel:
+    """Hierarchical timing wheel with O(1) add and cancel
+
+    Timers live in the coarsest level whose range covers them and cascade
+    into finer levels as their time approaches. Timers beyond the top level
+    wait in an overflow list that is re-checked once per top-level turn.
+    """
+
+    def __init__(self, tick=REMINDER_TICK, slots=WHEEL_SLOTS, now=None):
+        self.tick = tick
+        self.slots = slots
+        self.spans = [math.prod(slots[:level]) for level in range(len(slots))]
+        self.levels = [[[] for _ in range(count)] for count in slots]
+        self.overflow = []
+        self.timers = {}
+        self._ready = []
+        self.current = int((now if now is not None else time.time()) / tick)
+
+    def __len__(self):
+        return len(self.timers)
+
+    def add(self, key, when, payload=None):
+        """Schedule payload for timestamp `when`, replacing any timer with the same key"""
+        self.cancel(key)
+        timer = _Timer(key, math.ceil(when / self.tick), payload)
+        self.timers[key] = timer
+        self._insert(timer)
+
+    def cancel(self, key):
+        timer = self.timers.pop(key, None)
+        if timer:
+            timer.cancelled = True
+        return timer is not None
+
+    def _insert(self, timer):
+        delta = timer.expiry - self.current
+        if delta <= 0:
+            self._ready.append(timer)
+            return
+        for level, (count, span) in enumerate(zip(self.slots, self.spans)):
+            if delta < count * span:
+                self.levels[level][(timer.expiry // span) % count].append(timer)
+                return
+        self.overflow.append(timer)
+
+    def _cascade(self, level):
+        index = (self.current // self.spans[level]) % self.slots[level]
+        bucket = self.levels[level][index]
+        self.levels[level][index] = []
+        for timer in bucket:
+            if not timer.cancelled:
+                self._insert(timer)
+
+    def advance(self, now=None):
+        """Move the wheel up to `now` and return the payloads that are due"""
+        target = int((now if now is not None else time.time()) / self.tick)
+        due = []
+        while True:
+            for timer in self._ready:
+                if not timer.cancelled and self.timers.get(timer.key) is timer:
+                    del self.timers[timer.key]
+                    due.append(timer.payload)
+            self._ready = []
+            if self.current >= target:
+                return due
+
+            self.current += 1
+            top_span = self.spans[-1] * self.slots[-1]
+            if self.current % top_span == 0 and self.overflow:
+                overflow, self.overflow = self.overflow, []
+                for timer in overflow:
+                    if not timer.cancelled:
+                        self._insert(timer)
+            # Coarse levels first so timers cascading down are picked up this tick
+            for level in range(len(self.slots) - 1, 0, -1):
+                if self.current % self.spans[level] == 0:
+                    self._cascade(level)
+            self._cascade(0)
+
+
+def booking_start(fields):
+    """A booking's start as an aware datetime in BOOKING_TIMEZONE
+
+    Start Date is a date, or an ISO datetime such as '2026-03-02T18:00:00.000Z',
+    which is converted to local time first. The time of day is the one
+    recorded in Notes, else the time in Start Date, else DEFAULT_BOOKING_TIME.
+    """
+    start_date = fields.get('Start Date')
+    if not start_date:
+        return None
+    try:
+        start = datetime.fromisoformat(str(start_date).replace('Z', '+00:00'))
+        if start.tzinfo is not None:
+            start = start.astimezone(BOOKING_TIMEZONE).replace(tzinfo=None)
+        match = _TIME_PATTERN.search(fields.get('Notes') or '')
+        if match or 'T' not in str(start_date):
+            booking_time = datetime.strptime(
+                (match.group(1) if match else DEFAULT_BOOKING_TIME).upper(), "%I:%M %p"
+            )
+            start = start.replace(hour=booking_time.hour, minute=booking_time.minute, second=0, microsecond=0)
+    except ValueError:
+        return None
+    return BOOKING_TIMEZONE.localize(start)
+
+
+class LogNotifier:
+    """Stand-in notifier that logs reminders instead of sending them"""
+
+    def send(self, booking_id, start, fields):
+        print(f"🔔 Reminder: booking {booking_id} starts at {start.isoformat()} ({fields.get('Booking Summary', '')})")
+
+
+class SentReminders:
+    """SQLite record of the reminders already sent
+
+    Sending claims the (booking, start time) pair first, so a worker that
+    takes over from another, or restarts, does not send a reminder twice.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sent_reminders (
+                    booking_id TEXT NOT NULL,
+                    start TEXT NOT NULL,
+                    sent_at REAL NOT NULL,
+                    PRIMARY KEY (booking_id, start)
+                )
+                """
+            )
+
+    @staticmethod
+    def _key(start):
+        # Local wall-clock time, as rows were keyed before starts were aware
+        return start.replace(tzinfo=None).isoformat()
+
+    def claim(self, booking_id, start):
+        """True if this reminder had not been sent yet"""
+        with self._lock:
+            return self._conn.execute(
+                "INSERT OR IGNORE INTO sent_reminders (booking_id, start, sent_at) VALUES (?, ?, ?)",
+                (booking_id, self._key(start), time.time())
+            ).rowcount == 1
+
+    def was_sent(self, booking_id, start):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM sent_reminders WHERE booking_id = ? AND start = ?", (booking_id, self._key(start))
+            ).fetchone() is not None
+
+    def unclaim(self, booking_id, start):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM sent_reminders WHERE booking_id = ? AND start = ?", (booking_id, self._key(start))
+            )
+
+    def prune(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM sent_reminders WHERE sent_at < ?", (time.time() - SENT_RETENTION,))
+
+
+class ReminderScheduler:
+    """Fire a reminder REMINDER_LEAD_HOURS before each Scheduled booking
+
+    Every worker starts a scheduler, but only the one holding the lock file
+    next to the sent-reminders database runs the wheel; the others wait to
+    take over if it exits. The owner rescans upcoming bookings every
+    RELOAD_INTERVAL and follows changes made through its own AirtableService
+    in between. Before sending, the booking is read again, so bookings
+    cancelled or moved in Airtable itself get no reminder.
+    """
+
+    def __init__(self, airtable_service, notifier=None, lead_hours=REMINDER_LEAD_HOURS, path=None):
+        self.airtable_service = airtable_service
+        self.notifier = notifier or LogNotifier()
+        self.lead = timedelta(hours=lead_hours)
+        self.path = path or os.getenv('REMINDERS_PATH', 'reminders.db')
+        self.sent = SentReminders(self.path)
+        self.wheel = TimerWheel()
+        self.owner = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        airtable_service.booking_listeners.append(self.on_booking_changed)
+
+    def start(self):
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='booking-reminders', daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
+    def load(self):
+        """Schedule reminders for every upcoming Scheduled booking, dropping any that are gone"""
+        formula = "AND({Status} = 'Scheduled', NOT(IS_BEFORE({Start Date}, TODAY())))"
+        count = 0
+        seen = set()
+        for record in self.airtable_service.iter_records(
+            BOOKINGS_TABLE, formula=formula, fields=['Booking Summary', 'Start Date', 'Status', 'Notes']
+        ):
+            seen.add(record['id'])
+            if self.schedule(record):
+                count += 1
+        with self._lock:
+            for booking_id in [key for key in self.wheel.timers if key not in seen]:
+                self.wheel.cancel(booking_id)
+        self.sent.prune()
+        print(f"✅ Reminder scheduler loaded ({count} reminders)")
+
+    def schedule(self, record):
+        """Schedule (or reschedule) the reminder for a booking record"""
+        fields = record.get('fields', {})
+        start = booking_start(fields)
+        now = datetime.now(BOOKING_TIMEZONE)
+        if not start or start <= now or fields.get('Status', 'Scheduled') != 'Scheduled':
+            self.cancel(record['id'])
+            return False
+        if self.sent.was_sent(record['id'], start):
+            return False
+        remind_at = max(start - self.lead, now)
+        with self._lock:
+            self.wheel.add(record['id'], remind_at.timestamp(), (record['id'], start, fields))
+        return True
+
+    def cancel(self, booking_id):
+        with self._lock:
+            return self.wheel.cancel(booking_id)
+
+    def on_booking_changed(self, record):
+        """Listener for bookings created or updated through AirtableService"""
+        if self.owner:
+            self.schedule(record)
+
+    def send(self, booking_id, start, fields):
+        """Send one due reminder, unless the booking changed or it was already sent"""
+        try:
+            booking = self.airtable_service.get_booking(booking_id)
+        except Exception as e:
+            # Better a reminder for a booking that just changed than none at all
+            print(f"⚠️ Could not recheck booking {booking_id}, sending anyway: {str(e)}")
+            booking = {'id': booking_id, 'fields': fields}
+        current = booking['fields'] if booking else {}
+        if current.get('Status', 'Scheduled') != 'Scheduled' or booking_start(current) != start:
+            print(f"ℹ️ Skipping reminder for booking {booking_id}: no longer scheduled at {start.isoformat()}")
+            if booking:
+                self.schedule(booking)
+            return
+        if not self.sent.claim(booking_id, start):
+            return
+        try:
+            self.notifier.send(booking_id, start, current)
+        except Exception as e:
+            print(f"⚠️ Failed to send reminder for booking {booking_id}: {str(e)}")
+            self.sent.unclaim(booking_id, start)
+
+    def _run(self):
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            while not self._take_ownership(lock_file):
+                if self._stop.wait(OWNER_RETRY):
+                    return
+            self.owner = True
+            print(f"✅ Sending booking reminders from this worker (pid {os.getpid()})")
+            try:
+                self._send_due()
+            finally:
+                self.owner = False
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _take_ownership(self, lock_file):
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _send_due(self):
+        next_load = 0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_load:
+                try:
+                    self.load()
+                except Exception as e:
+                    print(f"⚠️ Failed to load booking reminders: {str(e)}")
+                next_load = time.monotonic() + RELOAD_INTERVAL
+            with self._lock:
+                due = self.wheel.advance()
+            for booking_id, start, fields in due:
+                self.send(booking_id, start, fields)
+            self._stop.wait(self.wheel.tick)
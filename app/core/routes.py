@@ -1,18 +1,108 @@
-from flask import render_template, request, jsonify
+from flask import render_template, request, jsonify, Response, stream_with_context, after_this_request, g
 from app.core import bp
 from app.integrations.openai.service import OpenAIService
-from app.integrations.google_calendar.service import GoogleCalendarService
-from app.integrations.airtable.service import AirtableService
+from app.integrations.google_calendar.capacity import CapacityScheduler
+from app.integrations.airtable.triage import DEFAULT_LEASE
 from datetime import datetime, timedelta
 from app.core.assistant import StorageAssistant
+from app.core.booking_import import BookingImporter, detect_format, iter_rows
+from app.core.export import export_table, gzip_stream
+from app.core.tenants import TenantRegistry, current_tenant, airtable_service, calendar_service, slot_holds, response_cache
+from app.core.http_cache import conditional_json
+from app.core.chat_inquiries import CHAT_SESSION_COOKIE, chat_session_id, record_chat
+from app.core.admission import AdmissionController, Rejected, ENDPOINT_CLASSES, client_key
+from app.core.profiling import (
+    SamplingProfiler, SlowRequestLog, phase, ADMIN_TOKEN, MAX_PROFILE_SECONDS
+)
+import hmac
+import json
+import time
 
 openai_service = OpenAIService()
-calendar_service = GoogleCalendarService()
-airtable_service = AirtableService()
+
+# Per-facility Airtable, calendar, slot hold and reminder services
+tenants = TenantRegistry()
+tenants.start_pinned()
+tenants.snapshot.start(tenants.active_services)
 
 # Initialize the storage assistant
 storage_assistant = StorageAssistant()
 
+# Per-client rate limits and weighted in-flight slots, shared by all tenants
+admission = AdmissionController()
+
+# Opt-in profiling surface for the /admin endpoints
+profiler = SamplingProfiler()
+slow_requests = SlowRequestLog()
+
+# Fixed booking times offered each day
+SLOT_TIMES = [
+    "09:00:00",  # 9 AM
+    "10:00:00",  # 10 AM
+    "11:00:00",  # 11 AM
+    "13:00:00",  # 1 PM (after lunch)
+    "14:00:00",  # 2 PM
+    "15:00:00",  # 3 PM
+    "16:00:00"   # 4 PM
+]
+
+def open_time_slots(calendar, holds, date_str):
+    """Fixed slots for a date where some crew is neither booked nor held"""
+    time_slots = [f"{date_str}T{slot_time}" for slot_time in SLOT_TIMES]
+    scheduler = CapacityScheduler(calendar).load(datetime.fromisoformat(date_str), days=1)
+    free = {slot['start']: slot['free_crews'] for slot in scheduler.free_crews()}
+    held = holds.active_counts([datetime.fromisoformat(slot) for slot in time_slots])
+    return [slot for slot, count in zip(time_slots, held) if free.get(slot, 0) > count]
+
+def too_many_requests(error):
+    response = jsonify({'status': 'error', 'message': str(error)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@bp.after_app_request
+def record_slow_request(response):
+    started = g.get('request_started')
+    if started is not None:
+        slow_requests.record(
+            request.method, request.path, response.status_code,
+            time.perf_counter() - started, g.get('phases', {})
+        )
+    return response
+
+@bp.before_app_request
+def admit_request():
+    """Apply the client's rate limit and wait for a slot by route priority"""
+    if request.endpoint is None or request.endpoint.endswith('static'):
+        return
+    route_class = ENDPOINT_CLASSES.get(request.endpoint, 'default')
+    try:
+        admission.check_rate(client_key(request.remote_addr), route_class)
+        with phase('admission_wait'):
+            admission.acquire(route_class)
+    except Rejected as e:
+        return too_many_requests(e)
+    g.admitted = True
+
+@bp.teardown_app_request
+def release_admission(exc):
+    if g.pop('admitted', False):
+        admission.release()
+
+@bp.before_app_request
+def bind_tenant():
+    """Route the request to its facility's services"""
+    if not tenants.bind():
+        return jsonify({'status': 'error', 'message': 'Unknown facility'}), 404
+
+@bp.teardown_app_request
+def unbind_tenant(exc):
+    tenants.unbind()
+
 @bp.route('/')
 def index():
     """Render the chat interface"""
@@ -35,10 +125,17 @@ def chat():
         print(f"\n📩 Received message: {message}")
         
         # Get response from storage assistant
-        response = storage_assistant.get_response(message)
+        with phase('llm_call'):
+            response = storage_assistant.get_response(message)
         print(f"📤 Assistant response: {response}")
+
+        # Finished sessions become inquiries in the background
+        session_id = chat_session_id(data.get('session_id') or request.cookies.get(CHAT_SESSION_COOKIE))
+        record_chat(current_tenant().chat_sessions, session_id, message, response)
         
-        return jsonify({'response': response})
+        reply = jsonify({'response': response, 'session_id': session_id})
+        reply.set_cookie(CHAT_SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+        return reply
         
     except Exception as e:
         print(f"❌ Error in chat endpoint: {str(e)}")
@@ -46,6 +143,54 @@ def chat():
             'error': 'An error occurred processing your request'
         }), 500
 
+@bp.route('/api/inquiries/stats', methods=['GET'])
+def get_inquiry_stats():
+    """Get inquiry counts by status, priority, type and age"""
+    return jsonify(airtable_service.inquiry_stats.snapshot())
+
+@bp.route('/api/inquiries/claim', methods=['POST'])
+def claim_inquiry():
+    """Lease the next inquiry to an agent by priority and SLA deadline"""
+    try:
+        data = request.get_json() or {}
+        if not data.get('agent'):
+            return jsonify({'error': 'Agent is required'}), 400
+        
+        try:
+            lease_seconds = int(data.get('lease_seconds', DEFAULT_LEASE))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'lease_seconds must be a whole number of seconds'}), 400
+        if lease_seconds <= 0:
+            return jsonify({'error': 'lease_seconds must be positive'}), 400
+        
+        claim = airtable_service.claim_next_inquiry(data['agent'], lease_seconds)
+        if not claim:
+            return jsonify({'status': 'empty', 'message': 'No inquiries waiting'})
+        return jsonify({'status': 'success', **claim})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/inquiries/<inquiry_id>/release', methods=['POST'])
+def release_inquiry(inquiry_id):
+    """Release an agent's lease on an inquiry"""
+    try:
+        data = request.get_json() or {}
+        if not data.get('agent'):
+            return jsonify({'error': 'Agent is required'}), 400
+        
+        released = airtable_service.release_inquiry(
+            inquiry_id,
+            data['agent'],
+            requeue=data.get('requeue', True)
+        )
+        if not released:
+            return jsonify({'error': 'No active lease for this agent'}), 409
+        return jsonify({'status': 'success'})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/booking/available-slots', methods=['GET'])
 def get_available_slots():
     """Get available booking slots"""
@@ -57,20 +202,9 @@ def get_available_slots():
                 'message': 'Date is required'
             }), 400
 
-        # Generate fixed time slots for the selected date
-        time_slots = [
-            f"{date_str}T09:00:00",  # 9 AM
-            f"{date_str}T10:00:00",  # 10 AM
-            f"{date_str}T11:00:00",  # 11 AM
-            f"{date_str}T13:00:00",  # 1 PM (after lunch)
-            f"{date_str}T14:00:00",  # 2 PM
-            f"{date_str}T15:00:00",  # 3 PM
-            f"{date_str}T16:00:00"   # 4 PM
-        ]
-        
-        return jsonify({
+        return conditional_json(response_cache, 'slots', [date_str], ['slots'], lambda: {
             'status': 'success',
-            'slots': time_slots
+            'slots': open_time_slots(calendar_service, slot_holds, date_str)
         })
             
     except Exception as e:
@@ -80,6 +214,65 @@ def get_available_slots():
             'message': str(e)
         }), 400
 
+@bp.route('/booking/hold', methods=['POST'])
+def hold_slot():
+    """Hold a time slot while the customer completes the booking form"""
+    try:
+        data = request.get_json() or {}
+        if 'start_time' not in data:
+            return jsonify({'status': 'error', 'message': 'start_time is required'}), 400
+        
+        start_datetime = calendar_service.to_local(
+            datetime.fromisoformat(data['start_time'].replace('Z', '+00:00'))
+        )
+        scheduler = CapacityScheduler(calendar_service).load(start_datetime, days=1)
+        hold = slot_holds.place(start_datetime, scheduler.free_crew_names(start_datetime), replaces=data.get('hold_id'))
+        if not hold:
+            return jsonify({
+                'status': 'error',
+                'message': 'This time slot is no longer available'
+            }), 409
+        response_cache.invalidate('slots')
+        
+        print(f"⏳ Slot held: {hold}")
+        return jsonify({'status': 'success', **hold})
+        
+    except Exception as e:
+        print(f"Error holding time slot: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+@bp.route('/booking/hold/<hold_id>', methods=['DELETE'])
+def release_slot(hold_id):
+    """Release a slot hold the customer no longer needs"""
+    slot_holds.release(hold_id)
+    response_cache.invalidate('slots')
+    return jsonify({'status': 'success'})
+
+@bp.route('/booking/capacity', methods=['GET'])
+def get_capacity():
+    """Get the number of free collection crews for every slot in a date range"""
+    try:
+        date_str = request.args.get('date')
+        start_date = datetime.fromisoformat(date_str) if date_str else datetime.now()
+        days = int(request.args.get('days', 1))
+        
+        scheduler = CapacityScheduler(calendar_service).load(start_date, days=days)
+        return jsonify({
+            'status': 'success',
+            'crews': scheduler.names,
+            'slots': scheduler.free_crews(not_before=datetime.now())
+        })
+        
+    except Exception as e:
+        print(f"Error getting crew capacity: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
 @bp.route('/booking/create', methods=['POST'])
 def create_booking():
     """Create a new booking"""
@@ -112,6 +305,36 @@ def create_booking():
             print(f"❌ {error_msg}")
             return jsonify({'error': error_msg}), 400
             
+        # Turn the customer's slot hold into this booking, or take one now.
+        # Either way contention is settled locally before touching the calendar.
+        start_local = calendar_service.to_local(start_datetime)
+        try:
+            with phase('capacity_check'):
+                scheduler = CapacityScheduler(calendar_service).load(start_local, days=1, fresh=True)
+            hold_id = data.get('hold_id')
+            held_crew = slot_holds.claim(hold_id, start_local) if hold_id else None
+            if not held_crew:
+                # No hold, or it expired: take one now if a crew is still free
+                hold = slot_holds.place(start_local, scheduler.free_crew_names(start_local), replaces=hold_id)
+                hold_id = hold['hold_id'] if hold else None
+                held_crew = slot_holds.claim(hold_id, start_local) if hold else None
+        except Exception as e:
+            error_msg = f"Failed to check crew availability: {str(e)}"
+            print(f"❌ {error_msg}")
+            return jsonify({'error': error_msg}), 500
+        if not held_crew:
+            return jsonify({
+                'status': 'error',
+                'message': 'This time slot is no longer available'
+            }), 409
+        
+        @after_this_request
+        def release_hold(response):
+            # The calendar event now blocks the crew, or the booking failed
+            slot_holds.release(hold_id)
+            response_cache.invalidate('slots')
+            return response
+            
         # Prepare customer data
         customer_info = {
             'Name': data['name'],
@@ -131,7 +354,8 @@ def create_booking():
         
         # Create or update customer
         try:
-            customer = airtable_service.find_or_create_customer(customer_info)
+            with phase('customer_lookup'):
+                customer = airtable_service.find_or_create_customer(customer_info)
             if not customer:
                 raise ValueError("Failed to create/find customer")
             print(f"✅ Customer processed: {customer}")
@@ -149,16 +373,32 @@ def create_booking():
         print("\n" + "-"*50)
         print("📅 STEP 2: Creating Calendar Event")
         
+        # Book the crew the hold reserved, if the calendar still shows it free
+        try:
+            crew = scheduler.assign(start_local, crew=held_crew)
+        except Exception as e:
+            error_msg = f"Failed to check crew availability: {str(e)}"
+            print(f"❌ {error_msg}")
+            return jsonify({'error': error_msg}), 500
+        if not crew:
+            return jsonify({
+                'status': 'error',
+                'message': 'No collection crews are available for this time slot'
+            }), 409
+        print(f"👷 Assigned crew: {crew['crew']}")
+        
         # Create calendar event
         try:
-            calendar_event = calendar_service.create_booking(
-                start_datetime,
-                {
-                    'name': data['name'],
-                    'contact': data['contact'],
-                    'address': data.get('address', 'No address provided')
-                }
-            )
+            with phase('calendar_insert'):
+                calendar_event = calendar_service.create_booking(
+                    start_datetime,
+                    {
+                        'name': data['name'],
+                        'contact': data['contact'],
+                        'address': data.get('address', 'No address provided')
+                    },
+                    calendar_id=crew['calendar_id']
+                )
             print(f"✅ Calendar event created: {calendar_event}")
         except Exception as e:
             error_msg = f"Failed to create calendar event: {str(e)}"
@@ -183,7 +423,8 @@ def create_booking():
         print(f"📋 Prepared booking data: {booking_data}")
         
         try:
-            booking = airtable_service.create_booking(booking_data)
+            with phase('airtable_insert'):
+                booking = airtable_service.create_booking(booking_data)
             if not booking:
                 raise ValueError("No booking data returned from Airtable")
             
@@ -210,8 +451,8 @@ def create_booking():
                 print(f"Booking data: {booking_data}")
             # Clean up calendar event if Airtable booking fails
             try:
-                calendar_service.delete_event(calendar_event['id'])
-                print(f"✅ Cleaned up calendar event: {calendar_event['id']}")
+                calendar_service.delete_event(calendar_event['event_id'], calendar_id=crew['calendar_id'])
+                print(f"✅ Cleaned up calendar event: {calendar_event['event_id']}")
             except Exception as cleanup_error:
                 print(f"⚠️ Failed to clean up calendar event: {str(cleanup_error)}")
             
@@ -229,5 +470,111 @@ def create_booking():
             'status': 'error',
             'message': 'An unexpected error occurred',
             'error': str(e)
-        }), 500 
+        }), 500
+
+@bp.route('/booking/import', methods=['POST'])
+def import_bookings():
+    """Import bookings from a CSV or NDJSON upload, streaming one result per row"""
+    upload = request.files.get('file')
+    try:
+        fmt = detect_format(
+            request.args.get('format'),
+            filename=upload.filename if upload else None,
+            content_type=request.content_type
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    stream = upload.stream if upload else request.stream
+    importer = BookingImporter(airtable_service, calendar_service, slot_holds)
+    print(f"\n📥 Starting {fmt} booking import")
+
+    def generate():
+        imported = failed = 0
+        for result in importer.run(iter_rows(stream, fmt)):
+            if result['status'] == 'success':
+                imported += 1
+            else:
+                failed += 1
+            yield json.dumps(result) + '\n'
+        print(f"✅ Booking import finished: {imported} imported, {failed} failed")
+        yield json.dumps({'status': 'done', 'imported': imported, 'failed': failed}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@bp.route('/export/<table>', methods=['GET'])
+def export(table):
+    """Stream a table export as CSV or NDJSON, optionally filtered by date range"""
+    fmt = request.args.get('format', 'csv').lower()
+    try:
+        chunks = export_table(
+            airtable_service,
+            table,
+            fmt=fmt,
+            start=request.args.get('from'),
+            end=request.args.get('to')
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    headers = {'Content-Disposition': f'attachment; filename={table}.{fmt}'}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        chunks = gzip_stream(chunks)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+@bp.route('/analytics/utilization', methods=['GET'])
+def get_utilization():
+    """Booked crew hours vs capacity by day, week, weekday and hour, plus status rates"""
+    try:
+        end_date = datetime.fromisoformat(request.args['to']) if request.args.get('to') else datetime.now()
+        start_date = (
+            datetime.fromisoformat(request.args['from']) if request.args.get('from')
+            else end_date - timedelta(days=29)
+        )
+        return jsonify({
+            'status': 'success',
+            **current_tenant().analytics.utilization(start_date, end_date)
+        })
+        
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error computing utilization: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def admin_authorized():
+    """Admin endpoints are off unless ADMIN_TOKEN is set, and then require it"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+@bp.route('/admin/profile', methods=['POST'])
+def run_profile():
+    """Sample all threads for N seconds and return collapsed stacks for a flamegraph"""
+    if not admin_authorized():
+        return jsonify({'error': 'Not found'}), 404
+    try:
+        seconds = float(request.args.get('seconds', 10))
+    except ValueError:
+        return jsonify({'error': 'seconds must be a number'}), 400
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        return jsonify({'error': f'seconds must be between 0 and {MAX_PROFILE_SECONDS}'}), 400
+    
+    print(f"🔬 Profiling for {seconds}s")
+    stacks = profiler.run(seconds)
+    if stacks is None:
+        return jsonify({'error': 'A profile is already running'}), 409
+    return Response(stacks + '\n', mimetype='text/plain')
 
+@bp.route('/admin/slow-requests', methods=['GET'])
+def get_slow_requests():
+    """Recent requests over SLOW_REQUEST_THRESHOLD with per-phase timings"""
+    if not admin_authorized():
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify({
+        'threshold_seconds': slow_requests.threshold,
+        'requests': slow_requests.recent()
+    })
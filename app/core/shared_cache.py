@@ -0,0 +1,328 @@
+"""Cache store shared by the worker processes on a host, with an in-process fallback"""
+
+import os
+import queue
+import secrets
+import threading
+import time
+from multiprocessing.connection import Listener, Client
+
+try:
+    import fcntl
+except ImportError:  # Windows: no unix sockets or flock, caches stay in-process
+    fcntl = None
+
+# Unix socket for the shared store; unset keeps every cache in-process
+SHARED_CACHE_SOCKET = os.getenv('SHARED_CACHE_SOCKET')
+# Unset: the first worker generates a key in a 0600 file next to the socket
+SHARED_CACHE_AUTHKEY = os.getenv('SHARED_CACHE_AUTHKEY')
+MAX_SHARED_ENTRIES = int(os.getenv('MAX_SHARED_ENTRIES', 10000))
+RECONNECT_DELAY = 1  # seconds between attempts to reach a restarted store
+SUBSCRIBER_BACKLOG = 1000  # invalidations queued for a subscriber before it is cut off
+
+
+def socket_authkey(path):
+    """SHARED_CACHE_AUTHKEY, or a random key shared through {path}.key
+
+    The key file is created once, readable only by the service user, so
+    only processes running as that user can reach the cache.
+    """
+    if SHARED_CACHE_AUTHKEY:
+        return SHARED_CACHE_AUTHKEY.encode()
+    key_path = f"{path}.key"
+    with open(f"{path}.lock", 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            descriptor = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(key_path, 'rb') as key_file:
+                return key_file.read()
+        key = secrets.token_hex(32).encode()
+        with os.fdopen(descriptor, 'wb') as key_file:
+            key_file.write(key)
+        print(f"🔑 Generated shared cache key in {key_path}")
+        return key
+
+
+class LocalStore:
+    """Values with tags and a TTL, kept in this process
+
+    This is the fallback when no shared socket is configured, and also what
+    the socket server keeps its entries in. Keys are tuples whose first item
+    is a namespace, usually the tenant id.
+    """
+
+    def __init__(self, max_entries=MAX_SHARED_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}  # key -> (value, tags, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            if entry[2] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[0]
+
+    def put(self, key, value, tags, ttl):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._prune()
+            self._entries[key] = (value, frozenset(tags), time.monotonic() + ttl)
+
+    def _prune(self):
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry[2] <= now]:
+            del self._entries[key]
+        # Still full: drop the entries closest to expiry
+        overflow = len(self._entries) - self.max_entries + 1
+        if overflow > 0:
+            for key in sorted(self._entries, key=lambda key: self._entries[key][2])[:overflow]:
+                del self._entries[key]
+
+    def invalidate(self, *tags):
+        tags = set(tags)
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[1] & tags]:
+                del self._entries[key]
+
+    def entries(self, namespace):
+        """Live entries in a namespace as (key, value, tags, seconds left)"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value, tags, expires_at - now)
+                for key, (value, tags, expires_at) in self._entries.items()
+                if key[0] == namespace and expires_at > now
+            ]
+
+    def subscribe(self, callback):
+        """Only one process uses a local store, so there is nobody to hear from"""
+
+    def unsubscribe(self, callback):
+        pass
+
+
+class StoreServer:
+    """A LocalStore served over a unix socket to the other workers
+
+    Each connection sends (operation, args) and gets the result back.
+    Connections that send 'subscribe' instead receive every invalidation
+    as (tags, origin pid).
+    """
+
+    def __init__(self, path, authkey):
+        self.store = LocalStore()
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._listener = Listener(path, 'AF_UNIX', authkey=authkey)
+        os.chmod(path, 0o600)
+
+    def start(self):
+        threading.Thread(target=self._accept, name='shared-cache-server', daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except Exception as e:
+                print(f"⚠️ Shared cache connection refused: {str(e)}")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            while True:
+                operation, args = conn.recv()
+                if operation == 'subscribe':
+                    outbox = queue.Queue(SUBSCRIBER_BACKLOG)
+                    with self._lock:
+                        self._subscribers.append(outbox)
+                    self._send_invalidations(conn, outbox)
+                    return
+                if operation == 'invalidate':
+                    tags, origin = args
+                    self.store.invalidate(*tags)
+                    self._broadcast(tags, origin)
+                    conn.send(None)
+                else:
+                    conn.send(getattr(self.store, operation)(*args))
+        except EOFError:
+            conn.close()
+        except Exception as e:
+            print(f"⚠️ Shared cache request failed: {str(e)}")
+            conn.close()
+
+    def _send_invalidations(self, conn, outbox):
+        """Forward queued invalidations to one subscriber, on its connection's thread"""
+        try:
+            while True:
+                message = outbox.get()
+                if message is None:
+                    break
+                conn.send(message)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                if outbox in self._subscribers:
+                    self._subscribers.remove(outbox)
+            conn.close()
+
+    def _broadcast(self, tags, origin):
+        """Queue an invalidation for every subscriber; a slow one never holds up the rest"""
+        with self._lock:
+            outboxes = list(self._subscribers)
+        for outbox in outboxes:
+            try:
+                outbox.put_nowait((tags, origin))
+            except queue.Full:
+                # Too far behind: disconnect it, and it drops everything when it reconnects
+                print("⚠️ Shared cache subscriber fell behind, disconnecting it")
+                with self._lock:
+                    if outbox in self._subscribers:
+                        self._subscribers.remove(outbox)
+                while True:
+                    try:
+                        outbox.get_nowait()
+                    except queue.Empty:
+                        break
+                outbox.put_nowait(None)
+
+
+class SocketStore:
+    """Client for the StoreServer on SHARED_CACHE_SOCKET, with the LocalStore API
+
+    The first worker to find no server running starts one in its own
+    process; the others connect to it. If that worker exits, the next
+    request to fail elects a new host, and subscribers are told to drop
+    everything, since invalidations may have been missed in between.
+    Failed calls count as cache misses.
+    """
+
+    def __init__(self, path, authkey=None):
+        self.path = path
+        self.authkey = authkey or socket_authkey(path)
+        self._server = None
+        self._callbacks = []
+        self._local = threading.local()
+        self._ensure_server()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _connect(self):
+        return Client(self.path, 'AF_UNIX', authkey=self.authkey)
+
+    def _ensure_server(self):
+        """Start a server in this process unless a live one answers on the socket"""
+        try:
+            self._connect().close()
+            return
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._connect().close()
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                if os.path.exists(self.path):
+                    os.unlink(self.path)  # left behind by a worker that exited
+            self._server = StoreServer(self.path, self.authkey)
+            self._server.start()
+            print(f"✅ Shared cache serving on {self.path} (pid {os.getpid()})")
+
+    def _call(self, operation, *args):
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None)
+            try:
+                if conn is None:
+                    conn = self._local.conn = self._connect()
+                conn.send((operation, args))
+                return conn.recv()
+            except (EOFError, OSError) as e:
+                self._local.conn = None
+                if attempt:
+                    print(f"⚠️ Shared cache unavailable: {str(e)}")
+                    return None
+                try:
+                    self._ensure_server()
+                except Exception as e:
+                    print(f"⚠️ Failed to start shared cache: {str(e)}")
+                    return None
+
+    def get(self, key):
+        return self._call('get', key)
+
+    def put(self, key, value, tags, ttl):
+        self._call('put', key, value, tags, ttl)
+
+    def invalidate(self, *tags):
+        self._call('invalidate', tags, os.getpid())
+
+    def entries(self, namespace):
+        return self._call('entries', namespace) or []
+
+    def subscribe(self, callback):
+        """Call callback(tags) for invalidations made by other workers; tags is None after a reconnect"""
+        self._callbacks.append(callback)
+        if len(self._callbacks) == 1:
+            self._start_listener()
+
+    def unsubscribe(self, callback):
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def _start_listener(self):
+        threading.Thread(target=self._listen, name='shared-cache-invalidations', daemon=True).start()
+
+    def _listen(self):
+        connected_before = False
+        while True:
+            try:
+                conn = self._connect()
+                conn.send(('subscribe', ()))
+                if connected_before:
+                    self._notify(None)
+                connected_before = True
+                while True:
+                    tags, origin = conn.recv()
+                    if origin != os.getpid():
+                        self._notify(tags)
+            except Exception:
+                time.sleep(RECONNECT_DELAY)
+                try:
+                    self._ensure_server()
+                except Exception as e:
+                    print(f"⚠️ Failed to start shared cache: {str(e)}")
+
+    def _notify(self, tags):
+        for callback in self._callbacks:
+            try:
+                callback(tags)
+            except Exception as e:
+                print(f"⚠️ Invalidation listener failed: {str(e)}")
+
+    def _after_fork(self):
+        # Connections and threads are not shared with a forked worker
+        self._local = threading.local()
+        self._server = None
+        if self._callbacks:
+            self._start_listener()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def shared_store():
+    """The process-wide cache store: SocketStore if SHARED_CACHE_SOCKET is set, else LocalStore"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if SHARED_CACHE_SOCKET and fcntl is None:
+                print("⚠️ SHARED_CACHE_SOCKET needs fcntl; keeping caches in-process")
+            _store = SocketStore(SHARED_CACHE_SOCKET) if SHARED_CACHE_SOCKET and fcntl else LocalStore()
+        return _store
@@ -0,0 +1,171 @@
+"""Short-lived slot holds so concurrent customers cannot double book a slot"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from app.integrations.google_calendar import config as calendar_config
+
+HOLD_TTL = 300  # seconds a customer keeps a slot while filling in the form
+CLAIM_TTL = 120  # seconds a claimed hold survives while the booking is created
+
+HELD = 'held'
+CONVERTING = 'converting'
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _minutes(value):
+    """Minutes since epoch for a naive calendar-local datetime"""
+    return int((value.replace(tzinfo=None) - _EPOCH).total_seconds() // 60)
+
+
+class SlotHoldStore:
+    """SQLite-backed reservation table for slots that are being booked
+
+    A hold reserves one named crew for the booking window around its slot.
+    The crew is picked when the hold is placed, in the same SQLite
+    transaction that checks the other holds, so two customers holding the
+    same time always get different crews. Converting a hold into a booking
+    hands back that crew. Times are naive calendar-local datetimes.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('SLOT_HOLDS_PATH', 'slot_holds.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS slot_holds (
+                    hold_id TEXT PRIMARY KEY,
+                    slot_start INTEGER NOT NULL,
+                    slot_end INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    crew TEXT
+                )
+                """
+            )
+            # Hold files from before holds named their crew
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(slot_holds)")}
+            if 'crew' not in columns:
+                self._conn.execute("ALTER TABLE slot_holds ADD COLUMN crew TEXT")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_slot_holds_window ON slot_holds (slot_start, slot_end)"
+            )
+
+    def _window(self, slot_start):
+        """The interval a booking at slot_start keeps a crew busy, buffers included"""
+        start = _minutes(slot_start)
+        return (
+            start - calendar_config.BUFFER_TIME,
+            start + calendar_config.BOOKING_DURATION + calendar_config.BUFFER_TIME
+        )
+
+    def _count_overlapping(self, slot_start, now, unnamed=False):
+        lo, hi = self._window(slot_start)
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM slot_holds WHERE slot_start < ? AND slot_end > ? AND expires_at > ?"
+            + (" AND crew IS NULL" if unnamed else ""),
+            (hi, lo, now)
+        ).fetchone()[0]
+
+    def _reserved(self, slot_start, now):
+        lo, hi = self._window(slot_start)
+        return {
+            crew for crew, in self._conn.execute(
+                "SELECT crew FROM slot_holds WHERE slot_start < ? AND slot_end > ? AND expires_at > ? "
+                "AND crew IS NOT NULL",
+                (hi, lo, now)
+            )
+        }
+
+    def reserved_crews(self, slot_start):
+        """Crews that active holds keep for bookings around slot_start"""
+        with self._lock:
+            return self._reserved(slot_start, time.time())
+
+    def place(self, slot_start, crews, replaces=None):
+        """Hold a slot with the first of `crews` that no other hold around it has
+
+        crews are the crews the calendar shows free for the slot, in order of
+        preference. `replaces` releases the caller's previous hold in the same
+        transaction, so changing the selected time never holds two slots.
+        Returns the hold as a dict, or None when every free crew is held.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM slot_holds WHERE expires_at <= ?", (now,))
+                if replaces:
+                    self._conn.execute(
+                        "DELETE FROM slot_holds WHERE hold_id = ? AND status = ?", (replaces, HELD)
+                    )
+                reserved = self._reserved(slot_start, now)
+                available = [crew for crew in crews if crew not in reserved]
+                # Holds placed before crews were recorded still take up one crew each
+                unnamed = self._count_overlapping(slot_start, now, unnamed=True)
+                if len(available) <= unnamed:
+                    self._conn.execute("COMMIT")
+                    return None
+                crew = available[0]
+
+                hold_id = uuid.uuid4().hex
+                start = _minutes(slot_start)
+                expires_at = now + HOLD_TTL
+                self._conn.execute(
+                    "INSERT INTO slot_holds (hold_id, slot_start, slot_end, status, expires_at, crew) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (hold_id, start, start + calendar_config.BOOKING_DURATION, HELD, expires_at, crew)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {
+            'hold_id': hold_id,
+            'crew': crew,
+            'start_time': slot_start.isoformat(),
+            'expires_at': datetime.fromtimestamp(expires_at).isoformat(timespec='seconds')
+        }
+
+    def claim(self, hold_id, slot_start):
+        """Atomically turn an active hold for slot_start into a booking in progress
+
+        Returns the crew the hold reserved, or None if the hold is gone.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT crew FROM slot_holds WHERE hold_id = ? AND slot_start = ? AND status = ? "
+                    "AND expires_at > ? AND crew IS NOT NULL",
+                    (hold_id, _minutes(slot_start), HELD, now)
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE slot_holds SET status = ?, expires_at = ? WHERE hold_id = ?",
+                        (CONVERTING, now + CLAIM_TTL, hold_id)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[0] if row else None
+
+    def release(self, hold_id):
+        """Drop a hold, either because the booking now exists or it was abandoned"""
+        with self._lock:
+            self._conn.execute("DELETE FROM slot_holds WHERE hold_id = ?", (hold_id,))
+
+    def active_counts(self, slot_starts):
+        """Number of active holds overlapping each slot, in input order"""
+        now = time.time()
+        with self._lock:
+            return [self._count_overlapping(slot_start, now) for slot_start in slot_starts]
@@ -0,0 +1,139 @@
+"""Cache snapshots so new workers start warm after a deploy or recycle"""
+
+import atexit
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+SNAPSHOT_PATH = os.getenv('CACHE_SNAPSHOT_PATH', 'cache_snapshot.bin')
+SNAPSHOT_INTERVAL = int(os.getenv('CACHE_SNAPSHOT_INTERVAL', 60))  # seconds
+MAX_SNAPSHOT_AGE = 3600  # older snapshots are ignored
+WARM_ENTRY_TTL = 60  # restored responses are recomputed within this many seconds
+
+MAGIC = b'SBSNAP1\n'
+_HEADER = struct.Struct('>8sQ')  # magic, index length
+
+
+class CacheSnapshot:
+    """Periodic on-disk snapshot of each tenant's customer index and response cache
+
+    The file is a small JSON index followed by the cached response bodies.
+    Loading maps the file and hands out memoryviews into it, so bodies are
+    only paged in when a response is actually sent; 304 revalidations never
+    touch them. After a restore the customer index is revalidated against
+    Airtable in the background.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH, interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._tenants = {}
+        self._map = None
+        self._stop = threading.Event()
+        self._worker = None
+
+    def load(self):
+        """Read the snapshot file, if there is a recent one"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as snapshot_file:
+                mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, index_length = _HEADER.unpack_from(mapped)
+            if magic != MAGIC:
+                raise ValueError("not a cache snapshot")
+            index = json.loads(mapped[_HEADER.size:_HEADER.size + index_length])
+            age = time.time() - index['saved_at']
+            if age > MAX_SNAPSHOT_AGE:
+                print(f"ℹ️ Ignoring cache snapshot from {age:.0f}s ago")
+                return
+            self._map = mapped
+            self._blob_start = _HEADER.size + index_length
+            self._age = age
+            self._tenants = index['tenants']
+            print(f"✅ Cache snapshot loaded ({len(self._tenants)} tenants, {age:.0f}s old)")
+        except Exception as e:
+            print(f"⚠️ Failed to load cache snapshot: {str(e)}")
+
+    def restore(self, tenant_id, services):
+        """Warm a tenant's freshly built services from the snapshot"""
+        section = self._tenants.pop(tenant_id, None)
+        if not section:
+            return
+        body = memoryview(self._map)
+        for key, tags, etag, ttl, offset, length in section.get('responses', []):
+            start = self._blob_start + offset
+            services.responses.restore(
+                tuple(key), body[start:start + length], etag, tags, min(ttl - self._age, WARM_ENTRY_TTL)
+            )
+        customers = section.get('customers', [])
+        services.airtable.customer_index.restore(customers)
+        print(f"♨️ Warmed tenant {tenant_id}: {len(customers)} customers, "
+              f"{len(section.get('responses', []))} responses")
+        if customers:
+            threading.Thread(
+                target=services.airtable.revalidate_customer_index, name='customer-revalidate', daemon=True
+            ).start()
+
+    def save(self, active):
+        """Write the caches of the running tenants ({tenant_id: TenantServices})"""
+        if not self.path:
+            return
+        blobs = []
+        offset = 0
+        tenants = {}
+        for tenant_id, services in active.items():
+            responses = []
+            for key, body, etag, tags, ttl in services.responses.dump():
+                responses.append([list(key), tags, etag, ttl, offset, len(body)])
+                blobs.append(body)
+                offset += len(body)
+            tenants[tenant_id] = {
+                'customers': services.airtable.customer_index.dump(),
+                'responses': responses
+            }
+        index = json.dumps({'saved_at': time.time(), 'tenants': tenants}, separators=(',', ':')).encode()
+
+        # Workers share the file: write privately, then swap it in atomically.
+        # It holds customer contact details, so only the service user may read it.
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(descriptor, 0o600)  # an old temp file keeps its mode otherwise
+        with os.fdopen(descriptor, 'wb') as snapshot_file:
+            snapshot_file.write(_HEADER.pack(MAGIC, len(index)))
+            snapshot_file.write(index)
+            for body in blobs:
+                snapshot_file.write(body)
+        os.replace(temp_path, self.path)
+
+    def start(self, active_services):
+        """Save every interval; active_services returns the running tenants"""
+        if not self.path or (self._worker and self._worker.is_alive()):
+            return
+        self._active_services = active_services
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='cache-snapshot', daemon=True)
+        self._worker.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if not self._worker:
+            return
+        self._stop.set()
+        self._worker.join()
+        self._worker = None
+        # One last snapshot so the next worker starts from the latest state
+        self._save_active()
+
+    def _save_active(self):
+        try:
+            self.save(self._active_services())
+        except Exception as e:
+            print(f"⚠️ Failed to save cache snapshot: {str(e)}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._save_active()
@@ -0,0 +1,243 @@
+"""Multi-facility tenancy: per-tenant service instances with LRU eviction"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from flask import g, request
+from werkzeug.local import LocalProxy
+from app.integrations.airtable.service import AirtableService
+from app.integrations.google_calendar.service import GoogleCalendarService
+from app.integrations.google_calendar.credentials import CredentialManager
+from app.core.slot_holds import SlotHoldStore
+from app.core.reminders import ReminderScheduler
+from app.core.http_cache import ResponseCache
+from app.core.analytics import BookingAnalytics
+from app.core.snapshot import CacheSnapshot
+from app.core.shared_cache import shared_store
+from app.core.chat_inquiries import ChatSessionLog, ChatInquiryPipeline
+
+TENANT_HEADER = 'X-Tenant-ID'
+DEFAULT_TENANT = 'default'
+MAX_ACTIVE_TENANTS = int(os.getenv('MAX_ACTIVE_TENANTS', 16))
+
+
+def load_tenant_configs():
+    """Read tenant settings from the TENANTS_FILE JSON file, if configured
+
+    Each entry maps a tenant id to its hosts, Airtable base and calendars:
+    {"north": {"hosts": ["north.example.com"], "airtable_base_id": "app...",
+    "calendar_id": "...", "crew_calendars": {"crew-a": "..."}, "pinned": true}}.
+    Without a file the process serves one tenant from the environment.
+    """
+    path = os.getenv('TENANTS_FILE')
+    if not path:
+        return {DEFAULT_TENANT: {'pinned': True}}
+    with open(path) as tenants_file:
+        return json.load(tenants_file)
+
+
+class TenantServices:
+    """Everything a request for one facility needs, with its own pools and caches
+
+    users counts the requests holding these services; the registry only
+    stops an evicted tenant once the last of them has finished.
+    """
+
+    def __init__(self, tenant_id, settings, credentials, verify=True):
+        print(f"\n🏢 Starting services for tenant: {tenant_id}")
+        self.tenant_id = tenant_id
+        self.users = 0
+        self.retired = False
+        suffix = '' if tenant_id == DEFAULT_TENANT else f"_{tenant_id}"
+        self.airtable = AirtableService(
+            base_id=settings.get('airtable_base_id'),
+            api_key=settings.get('airtable_api_key'),
+            queue_path=settings.get('history_queue_path') or (
+                f"inquiry_history_queue{suffix}.db" if suffix else None
+            ),
+            verify=verify,
+            triage_lock_path=f"triage{suffix}.lock" if suffix else None
+        )
+        self.calendar = GoogleCalendarService(
+            calendar_id=settings.get('calendar_id'),
+            crew_calendars=settings.get('crew_calendars'),
+            credentials=credentials
+        )
+        self.slot_holds = SlotHoldStore(f"slot_holds{suffix}.db" if suffix else None)
+        self.reminders = ReminderScheduler(self.airtable, path=f"reminders{suffix}.db" if suffix else None)
+        self.reminders.start()
+        # Shared with the other workers when SHARED_CACHE_SOCKET is set
+        self.responses = ResponseCache(store=shared_store(), namespace=tenant_id)
+        self.airtable.customer_index.shared(shared_store(), tenant_id)
+        self.airtable.inquiry_listeners.append(self.responses.on_inquiry_changed)
+        self.airtable.booking_listeners.append(self.responses.on_booking_changed)
+        self.analytics = BookingAnalytics(self.airtable, crews=len(self.calendar.crew_calendars))
+        self.analytics.start()
+        self.chat_sessions = ChatSessionLog(f"chat_sessions{suffix}.db" if suffix else None)
+        self.chat_inquiries = ChatInquiryPipeline(self.airtable, self.chat_sessions)
+        self.chat_inquiries.start()
+
+    def stop(self):
+        print(f"💤 Stopping idle tenant: {self.tenant_id}")
+        self.reminders.stop()
+        self.chat_inquiries.stop()
+        self.analytics.stop()
+        self.airtable.customer_index.unshare()
+        self.airtable.stop()
+
+
+class TenantRegistry:
+    """Route requests to per-tenant services by header or host
+
+    Services are created on first use and kept in LRU order. When more than
+    max_active tenants are running, the least recently used tenant that is
+    not pinned is evicted and rebuilt on its next request. An evicted tenant
+    is stopped when the last request using it releases it.
+
+    Pinned tenants are started and checked against Airtable up front. Other
+    tenants start on their first request without the table checks, which
+    then run in the background once per process.
+    """
+
+    def __init__(self, configs=None, max_active=MAX_ACTIVE_TENANTS):
+        self.configs = configs if configs is not None else load_tenant_configs()
+        self.max_active = max_active
+        self.hosts = {
+            host.lower(): tenant_id
+            for tenant_id, settings in self.configs.items()
+            for host in settings.get('hosts', [])
+        }
+        # Tenants share one Google account, so token refresh runs once per process
+        self.credentials = CredentialManager()
+        self._active = OrderedDict()
+        self._lock = threading.Lock()
+        self._starting = {}
+        self._verified = set()
+        self.snapshot = CacheSnapshot()
+        self.snapshot.load()
+
+    def resolve(self, tenant_id=None, host=None):
+        """Work out the tenant id for a request; None when it matches no tenant"""
+        if tenant_id:
+            return tenant_id if tenant_id in self.configs else None
+        if host:
+            tenant_id = self.hosts.get(host.split(':')[0].lower())
+            if tenant_id:
+                return tenant_id
+        if len(self.configs) == 1:
+            return next(iter(self.configs))
+        return DEFAULT_TENANT if DEFAULT_TENANT in self.configs else None
+
+    def acquire(self, tenant_id):
+        """Return the running services for a tenant, starting them if needed
+
+        The caller holds a reference until it calls release(services).
+        """
+        with self._lock:
+            services = self._active.get(tenant_id)
+            if services:
+                self._active.move_to_end(tenant_id)
+                services.users += 1
+                return services
+            starting = self._starting.setdefault(tenant_id, threading.Lock())
+
+        # Build outside the registry lock so one slow tenant does not block others
+        with starting:
+            with self._lock:
+                services = self._active.get(tenant_id)
+                if services:
+                    services.users += 1
+                    return services
+                verify = tenant_id not in self._verified and self.configs[tenant_id].get('pinned')
+            services = TenantServices(tenant_id, self.configs[tenant_id], self.credentials, verify=bool(verify))
+            self.snapshot.restore(tenant_id, services)
+            with self._lock:
+                services.users += 1
+                self._active[tenant_id] = services
+                self._starting.pop(tenant_id, None)
+                unverified = tenant_id not in self._verified
+                self._verified.add(tenant_id)
+                evicted = self._evict()
+        if unverified and not verify:
+            threading.Thread(
+                target=self._verify, args=(services,), name='tenant-verify', daemon=True
+            ).start()
+        for idle in evicted:
+            self._stop_later(idle)
+        return services
+
+    def release(self, services):
+        """Drop a request's reference; stops the services if they were evicted meanwhile"""
+        with self._lock:
+            services.users -= 1
+            idle = services.retired and services.users == 0
+        if idle:
+            self._stop_later(services)
+
+    def get(self, tenant_id):
+        """Start a tenant's services without holding on to them"""
+        services = self.acquire(tenant_id)
+        self.release(services)
+        return services
+
+    def _stop_later(self, services):
+        # Stopping flushes queues and joins workers; keep that off the request
+        threading.Thread(target=services.stop, name='tenant-stop', daemon=True).start()
+
+    def _verify(self, services):
+        try:
+            services.airtable.verify_tables()
+        except Exception as e:
+            print(f"❌ Airtable checks failed for tenant {services.tenant_id}: {str(e)}")
+            with self._lock:
+                self._verified.discard(services.tenant_id)
+
+    def active_services(self):
+        with self._lock:
+            return dict(self._active)
+
+    def _evict(self):
+        """Take idle tenants out of the LRU; returns those no request is using"""
+        evicted = []
+        for tenant_id in list(self._active):
+            if len(self._active) <= self.max_active:
+                break
+            if self.configs[tenant_id].get('pinned'):
+                continue
+            services = self._active.pop(tenant_id)
+            services.retired = True
+            if services.users == 0:
+                evicted.append(services)
+        return evicted
+
+    def start_pinned(self):
+        """Start pinned tenants up front so their first request is not a cold start"""
+        for tenant_id, settings in self.configs.items():
+            if settings.get('pinned'):
+                self.get(tenant_id)
+
+    def bind(self):
+        """Attach the tenant for the current request to flask.g; False if unknown"""
+        tenant_id = self.resolve(request.headers.get(TENANT_HEADER), request.host)
+        if tenant_id is None:
+            return False
+        g.tenant = self.acquire(tenant_id)
+        return True
+
+    def unbind(self):
+        """Release the current request's tenant, if one was bound"""
+        services = g.pop('tenant', None)
+        if services is not None:
+            self.release(services)
+
+
+def current_tenant():
+    return g.tenant
+
+
+# Proxies so request handlers can keep using service names directly
+airtable_service = LocalProxy(lambda: current_tenant().airtable)
+calendar_service = LocalProxy(lambda: current_tenant().calendar)
+slot_holds = LocalProxy(lambda: current_tenant().slot_holds)
+response_cache = LocalProxy(lambda: current_tenant().responses)
@@ -0,0 +1,116 @@
+"""In-process index of customers by contact, for the booking path's lookups"""
+
+import threading
+import time
+
+CUSTOMER_INDEX_TTL = 3600  # seconds before a cached lookup is re-fetched
+MAX_INDEXED_CUSTOMERS = 50000
+
+
+def contact_key(contact):
+    """Normalize an email or phone the way find_customer matches it"""
+    contact = contact.strip()
+    return contact.lower() if '@' in contact else contact
+
+
+class CustomerIndex:
+    """Customer records (lookup fields only) keyed by normalized email or phone
+
+    Entries expire after CUSTOMER_INDEX_TTL and are replaced whenever
+    AirtableService creates or updates the customer. Each worker keeps its
+    own index; once shared() is called, replacements are broadcast so other
+    workers drop their copies.
+    """
+
+    def __init__(self, ttl=CUSTOMER_INDEX_TTL, max_entries=MAX_INDEXED_CUSTOMERS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # contact key -> (record, stored_at)
+        self._lock = threading.Lock()
+        self._store = None
+        self._prefix = None
+
+    def shared(self, store, namespace):
+        """Broadcast replacements through store, and drop contacts other workers replace"""
+        self._store = store
+        self._prefix = f"{namespace}/contact:"
+        store.subscribe(self.on_invalidated)
+
+    def unshare(self):
+        if self._store:
+            self._store.unsubscribe(self.on_invalidated)
+            self._store = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, contact):
+        key = contact_key(contact)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            if time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            return entry[0]
+
+    def put(self, record, *contacts, stored_at=None):
+        """Index a customer record under each non-empty contact"""
+        stored_at = stored_at or time.time()
+        with self._lock:
+            for contact in contacts:
+                if contact:
+                    self._entries[contact_key(contact)] = (record, stored_at)
+            while len(self._entries) > self.max_entries:
+                # Dicts keep insertion order, so this drops the oldest entry
+                del self._entries[next(iter(self._entries))]
+
+    def replace(self, record, *contacts):
+        """Index a customer that was just written, telling other workers their copy is stale"""
+        self.put(record, *contacts)
+        if self._store:
+            self._store.invalidate(*(self._prefix + contact_key(contact) for contact in contacts if contact))
+
+    def on_invalidated(self, tags):
+        """Listener for invalidations from other workers; None means drop everything"""
+        with self._lock:
+            if tags is None:
+                self._entries.clear()
+                return
+            for tag in tags:
+                if tag.startswith(self._prefix):
+                    self._entries.pop(tag[len(self._prefix):], None)
+
+    def dump(self):
+        """Entries as [contact, record, stored_at] lists for a snapshot"""
+        with self._lock:
+            return [[key, record, stored_at] for key, (record, stored_at) in self._entries.items()]
+
+    def restore(self, entries):
+        now = time.time()
+        for key, record, stored_at in entries:
+            if now - stored_at < self.ttl:
+                self.put(record, key, stored_at=stored_at)
+
+    def revalidate(self, records):
+        """Refresh every indexed contact from a customer scan; contacts no longer found are dropped
+
+        Entries stored after the scan started are newer than it and are kept.
+        """
+        started = time.time()
+        current = {}
+        for record in records:
+            fields = record.get('fields', {})
+            for contact in (fields.get('Email'), fields.get('Phone')):
+                if contact:
+                    current[contact_key(contact)] = record
+        now = time.time()
+        with self._lock:
+            for key in list(self._entries):
+                if self._entries[key][1] >= started:
+                    continue
+                if key in current:
+                    self._entries[key] = (current[key], now)
+                else:
+                    del self._entries[key]
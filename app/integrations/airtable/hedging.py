@@ -0,0 +1,139 @@
+"""Hedged requests for idempotent Airtable reads"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+HEDGED_READS = os.getenv('AIRTABLE_HEDGED_READS', '').lower() in ('1', 'true', 'yes')
+HEDGE_PERCENTILE = 95  # hedge reads still running at this latency percentile
+HEDGE_BUDGET = 0.05  # hedges allowed as a fraction of reads
+MAX_SAVED_HEDGES = 10  # budget that can build up while reads are fast
+MIN_HEDGE_DELAY = 0.05  # seconds
+LATENCY_WINDOW = 200  # recent latencies kept per (table, operation)
+MIN_SAMPLES = 20  # no hedging until the percentile is meaningful
+MAX_WORKERS = 64
+
+
+class HedgedReader:
+    """Send a second identical read when the first is slower than usual
+
+    Latencies are tracked per (table, operation), so quick record gets and
+    slow filtered scans of the same table keep separate percentiles. With a
+    rate limiter, time spent waiting for tokens is left out: a read is timed,
+    and its hedge deadline runs, from when it got its first token. A read that
+    has not returned by the HEDGE_PERCENTILE latency gets a duplicate, and
+    whichever response arrives first is used. No hedge is sent while the
+    limiter is backlogged, since it would only queue behind other requests.
+    Each read earns HEDGE_BUDGET of a hedge, so hedges stay a small, capped
+    share of traffic and the common fast read costs nothing extra.
+    """
+
+    def __init__(self, limiter=None, percentile=HEDGE_PERCENTILE, budget=HEDGE_BUDGET, max_workers=MAX_WORKERS):
+        self.limiter = limiter
+        self.percentile = percentile
+        self.budget = budget
+        self._latencies = {}
+        self._delays = {}
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='airtable-hedge')
+        self.stats = {'reads': 0, 'hedged': 0, 'hedge_won': 0, 'backlogged': 0}
+
+    def _record(self, key, elapsed):
+        with self._lock:
+            samples = self._latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW))
+            samples.append(elapsed)
+            if len(samples) >= MIN_SAMPLES:
+                ordered = sorted(samples)
+                index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+                self._delays[key] = max(ordered[index], MIN_HEDGE_DELAY)
+
+    def _take_hedge(self):
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.stats['hedged'] += 1
+                return True
+            return False
+
+    def _run(self, key, sent, fn, args, kwargs):
+        waited = [0.0]
+
+        def on_token(seconds):
+            waited[0] += seconds
+            sent.set()
+
+        started = time.monotonic()
+        try:
+            if self.limiter is None:
+                sent.set()
+                result = fn(*args, **kwargs)
+            else:
+                with self.limiter.tracking(on_token):
+                    result = fn(*args, **kwargs)
+        finally:
+            sent.set()
+        self._record(key, time.monotonic() - started - waited[0])
+        return result
+
+    def _submit(self, key, fn, args, kwargs):
+        """Start fn on the pool; the future's `sent` event is set once it has a rate-limit token"""
+        sent = threading.Event()
+        future = self._executor.submit(self._run, key, sent, fn, args, kwargs)
+        future.sent = sent
+        return future
+
+    def call(self, table, operation, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs), hedging it if it runs past the tracked percentile
+
+        table and operation key the latency statistics, e.g. ('Bookings', 'get').
+        """
+        key = (table, operation)
+        with self._lock:
+            self.stats['reads'] += 1
+            self._tokens = min(self._tokens + self.budget, MAX_SAVED_HEDGES)
+            delay = self._delays.get(key)
+
+        primary = self._submit(key, fn, args, kwargs)
+        if delay is None:
+            return primary.result()
+        primary.sent.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        if self.limiter is not None and self.limiter.backlogged():
+            with self._lock:
+                self.stats['backlogged'] += 1
+            return primary.result()
+        if not self._take_hedge():
+            return primary.result()
+
+        print(f"⏱️ Hedging slow {table} {operation} read after {delay * 1000:.0f}ms")
+        hedge = self._submit(key, fn, args, kwargs)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self.stats['hedge_won'] += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                **self.stats,
+                'delays_ms': {
+                    f"{table}.{operation}": round(delay * 1000, 1)
+                    for (table, operation), delay in self._delays.items()
+                }
+            }
+
+    def stop(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,292 @@
+"""Durable write-behind queue for Inquiry_History entries"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Airtable accepts at most 10 records per batch create request
+BATCH_SIZE = 10
+FLUSH_INTERVAL = 1.0  # seconds between idle polls
+MAX_ATTEMPTS = 5
+MAX_BACKOFF = 60  # seconds
+CLAIM_TTL = 300  # seconds before rows claimed by a crashed worker are sent again
+
+PENDING = 'pending'
+SENDING = 'sending'
+FAILED = 'failed'
+
+# Queues with a running worker, drained by one exit handler for the process
+_running = set()
+_running_lock = threading.Lock()
+
+
+def _stop_running():
+    with _running_lock:
+        queues = list(_running)
+    for history_queue in queues:
+        history_queue.stop()
+
+
+atexit.register(_stop_running)
+
+
+class HistoryWriteQueue:
+    """Append-only SQLite queue that flushes history entries to Airtable in batches.
+
+    Entries are acknowledged as soon as they are committed locally. A background
+    worker drains them in insertion order, so entries for the same inquiry reach
+    Inquiry_History in the order they were written. Workers claim rows before
+    sending them, so several processes can share one queue file without sending
+    an entry twice or overtaking an earlier entry for the same inquiry.
+    """
+
+    def __init__(self, table, path=None):
+        self.table = table
+        self.path = path or os.getenv('INQUIRY_HISTORY_QUEUE_PATH', 'inquiry_history_queue.db')
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+        self.owner = uuid.uuid4().hex
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS history_queue (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    inquiry_id TEXT NOT NULL,
+                    fields TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    owner TEXT,
+                    claimed_at REAL
+                )
+                """
+            )
+            # Queue files from before rows were claimed
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(history_queue)")}
+            for column, column_type in (('owner', 'TEXT'), ('claimed_at', 'REAL')):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE history_queue ADD COLUMN {column} {column_type}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_history_queue_status ON history_queue (status, seq)"
+            )
+
+    def start(self):
+        """Start the background flush worker"""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='inquiry-history-writer', daemon=True)
+        self._worker.start()
+        with _running_lock:
+            _running.add(self)
+        print(f"✅ Inquiry history queue started ({self.pending_count()} pending)")
+
+    def stop(self, flush=True):
+        """Stop the worker, optionally draining what is left first"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+        with _running_lock:
+            _running.discard(self)
+        if flush:
+            self.flush()
+
+    def enqueue(self, inquiry_id, fields):
+        """Persist a history entry locally and return its acknowledgement"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO history_queue (inquiry_id, fields, created_at) VALUES (?, ?, ?)",
+                (inquiry_id, json.dumps(fields), time.time())
+            )
+            seq = cursor.lastrowid
+        if self.pending_count() >= BATCH_SIZE:
+            self._wakeup.set()
+        return {
+            'id': None,
+            'queued': True,
+            'queue_seq': seq,
+            'fields': fields
+        }
+
+    def pending_for(self, inquiry_id):
+        """Return entries for an inquiry that are still on their way to Airtable
+
+        Parked entries are left out; they only go out after requeue_failed.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, fields FROM history_queue WHERE inquiry_id = ? AND status != ? ORDER BY seq",
+                (inquiry_id, FAILED)
+            ).fetchall()
+        return [{'id': None, 'queued': True, 'queue_seq': seq, 'fields': json.loads(fields)} for seq, fields in rows]
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM history_queue WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+    def requeue_failed(self):
+        """Move parked entries back to pending so the worker retries them"""
+        with self._lock:
+            count = self._conn.execute(
+                "UPDATE history_queue SET status = ?, attempts = 0 WHERE status = ?", (PENDING, FAILED)
+            ).rowcount
+        if count:
+            self._wakeup.set()
+        return count
+
+    def flush(self):
+        """Synchronously push every pending entry; returns the number written"""
+        written = 0
+        while True:
+            sent = self._flush_batch()
+            if sent <= 0:
+                return written
+            written += sent
+
+    def _claim_batch(self):
+        """Claim the oldest pending rows that no earlier row for the same inquiry is holding back
+
+        Rows claimed by a worker that stopped answering are taken over after
+        CLAIM_TTL.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE history_queue SET status = ?, owner = NULL, claimed_at = NULL "
+                    "WHERE status = ? AND claimed_at <= ?",
+                    (PENDING, SENDING, now - CLAIM_TTL)
+                )
+                rows = self._conn.execute(
+                    """
+                    SELECT seq, inquiry_id, fields, attempts FROM history_queue AS entry
+                    WHERE status = ? AND NOT EXISTS (
+                        SELECT 1 FROM history_queue AS earlier
+                        WHERE earlier.inquiry_id = entry.inquiry_id AND earlier.seq < entry.seq
+                        AND earlier.status != ?
+                    )
+                    ORDER BY seq LIMIT ?
+                    """,
+                    (PENDING, PENDING, BATCH_SIZE)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE history_queue SET status = ?, owner = ?, claimed_at = ? WHERE seq = ?",
+                    [(SENDING, self.owner, now, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _flush_batch(self):
+        """Send the oldest pending batch. Returns rows written, 0 when idle, -1 on failure
+
+        If the batch request fails, its rows are sent one at a time so a
+        single bad entry does not hold back the others.
+        """
+        rows = self._claim_batch()
+        if not rows:
+            return 0
+
+        try:
+            self.table.batch_insert([json.loads(fields) for _, _, fields, _ in rows])
+        except Exception as e:
+            print(f"⚠️ Failed to flush {len(rows)} inquiry history entries: {str(e)}")
+            if len(rows) == 1:
+                self._record_failure(rows, str(e))
+                return -1
+            return self._send_one_by_one(rows)
+
+        self._delete(rows)
+        return len(rows)
+
+    def _send_one_by_one(self, rows):
+        written = 0
+        blocked = set()  # inquiries with a failed entry; their later entries wait
+        for row in rows:
+            seq, inquiry_id, fields, _ = row
+            if inquiry_id in blocked:
+                self._release([row])
+                continue
+            try:
+                self.table.insert(json.loads(fields))
+            except Exception as e:
+                print(f"⚠️ Failed to write inquiry history entry {seq}: {str(e)}")
+                blocked.add(inquiry_id)
+                self._record_failure([row], str(e))
+                continue
+            self._delete([row])
+            written += 1
+        return written or -1
+
+    def _delete(self, rows):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM history_queue WHERE seq = ? AND owner = ?", [(row[0], self.owner) for row in rows]
+            )
+
+    def _release(self, rows):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE history_queue SET status = ?, owner = NULL, claimed_at = NULL WHERE seq = ? AND owner = ?",
+                [(PENDING, row[0], self.owner) for row in rows]
+            )
+
+    def _record_failure(self, rows, error):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE history_queue SET status = ?, owner = NULL, claimed_at = NULL, "
+                    "attempts = attempts + 1, last_error = ? WHERE seq = ? AND owner = ?",
+                    [(PENDING, error, row[0], self.owner) for row in rows]
+                )
+                exhausted = [row for row in rows if row[3] + 1 >= MAX_ATTEMPTS]
+                for seq, inquiry_id, _, _ in exhausted:
+                    # Park the entry together with everything queued after it for the same
+                    # inquiry, so later history never lands ahead of an earlier entry.
+                    self._conn.execute(
+                        "UPDATE history_queue SET status = ? WHERE inquiry_id = ? AND seq >= ? AND status = ?",
+                        (FAILED, inquiry_id, seq, PENDING)
+                    )
+                    print(f"❌ Parked inquiry history for {inquiry_id} after {MAX_ATTEMPTS} attempts")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _run(self):
+        backoff = FLUSH_INTERVAL
+        while not self._stop.is_set():
+            try:
+                sent = self._flush_batch()
+            except Exception as e:
+                print(f"❌ Inquiry history worker error: {str(e)}")
+                sent = -1
+
+            if sent > 0:
+                backoff = FLUSH_INTERVAL
+                continue
+
+            if sent < 0:
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                self._stop.wait(backoff)
+            else:
+                self._wakeup.wait(FLUSH_INTERVAL)
+                self._wakeup.clear()
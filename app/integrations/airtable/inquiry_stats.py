@@ -0,0 +1,172 @@
+"""Incrementally maintained inquiry dashboard counters"""
+
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from .models import INQUIRY_STATUS_OPTIONS, PRIORITY_OPTIONS, INQUIRY_TYPE_OPTIONS
+
+RECONCILE_INTERVAL = 900  # seconds between full-scan reconciliations
+
+# Statuses that no longer count towards open inquiry age
+CLOSED_STATUSES = frozenset(['Resolved', 'Closed'])
+
+# (label, minimum age in days) from oldest to newest
+AGE_BUCKETS = (
+    ('over_7_days', 7),
+    ('3_to_7_days', 3),
+    ('1_to_3_days', 1),
+    ('under_1_day', 0),
+)
+
+
+def _created_day(record):
+    created = record.get('createdTime')
+    if not created:
+        return datetime.now(timezone.utc).date()
+    return datetime.fromisoformat(created.replace('Z', '+00:00')).date()
+
+
+def _age_bucket(day, today):
+    age = max((today - day).days, 0)
+    for label, minimum in AGE_BUCKETS:
+        if age >= minimum:
+            return label
+
+
+class InquiryStats:
+    """Counts of inquiries by status, priority, type and open-inquiry age
+
+    Counters are adjusted as inquiries are created or change status, and
+    periodically rebuilt from a full scan to correct any drift. Changes made
+    while a scan runs are replayed on top of its result. Reading the counts
+    never touches Airtable.
+    """
+
+    def __init__(self, scan):
+        # scan() yields inquiry records with Status, Priority and Type fields
+        self.scan = scan
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self._during_scan = None  # changes made while reconcile() scans
+        self._reset({})
+
+    def _reset(self, inquiries):
+        self.inquiries = inquiries  # id -> (status, priority, type, created day)
+        self.by_status = Counter()
+        self.by_priority = Counter()
+        self.by_type = Counter()
+        self.open_by_day = Counter()
+        # Open inquiries per age bucket, kept current for one day at a time
+        self._ages = None
+        self._ages_day = None
+        for state in inquiries.values():
+            self._count(state, 1)
+        self.reconciled_at = None
+
+    def _count(self, state, delta):
+        status, priority, inquiry_type, day = state
+        self.by_status[status] += delta
+        self.by_priority[priority] += delta
+        self.by_type[inquiry_type] += delta
+        if status not in CLOSED_STATUSES:
+            self.open_by_day[day] += delta
+            if self._ages_day is not None:
+                self._ages[_age_bucket(day, self._ages_day)] += delta
+
+    def _state(self, record, status=None):
+        fields = record.get('fields', {})
+        return (
+            status or fields.get('Status'),
+            fields.get('Priority'),
+            fields.get('Type'),
+            _created_day(record)
+        )
+
+    def record_created(self, record):
+        with self._lock:
+            if self._during_scan is not None:
+                self._during_scan.append((self._apply_created, (record,)))
+            self._apply_created(record)
+
+    def _apply_created(self, record):
+        if record['id'] in self.inquiries:
+            return
+        state = self._state(record)
+        self.inquiries[record['id']] = state
+        self._count(state, 1)
+
+    def record_status(self, record, status):
+        """Move an inquiry to a new status; record is the updated Airtable record"""
+        with self._lock:
+            if self._during_scan is not None:
+                self._during_scan.append((self._apply_status, (record, status)))
+            self._apply_status(record, status)
+
+    def _apply_status(self, record, status):
+        previous = self.inquiries.get(record['id'])
+        if previous is None:
+            state = self._state(record, status)
+        else:
+            self._count(previous, -1)
+            state = (status,) + previous[1:]
+        self.inquiries[record['id']] = state
+        self._count(state, 1)
+
+    def reconcile(self):
+        """Rebuild every counter from a full scan of the Inquiries table"""
+        with self._lock:
+            self._during_scan = []
+        try:
+            inquiries = {}
+            for record in self.scan():
+                inquiries[record['id']] = self._state(record)
+            with self._lock:
+                self._reset(inquiries)
+                # The scan may have read some records before these changes were made
+                for apply, args in self._during_scan:
+                    apply(*args)
+                self.reconciled_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        finally:
+            with self._lock:
+                self._during_scan = None
+        print(f"✅ Inquiry stats reconciled ({len(inquiries)} inquiries)")
+
+    def start(self):
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='inquiry-stats-reconcile', daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"⚠️ Inquiry stats reconciliation failed: {str(e)}")
+            self._stop.wait(RECONCILE_INTERVAL)
+
+    def snapshot(self):
+        """Current counts in constant time; the age buckets are rebuilt once a day"""
+        today = datetime.now(timezone.utc).date()
+        with self._lock:
+            if self._ages_day != today:
+                self._ages = {label: 0 for label, _ in AGE_BUCKETS}
+                for day, count in self.open_by_day.items():
+                    self._ages[_age_bucket(day, today)] += count
+                self._ages_day = today
+            return {
+                'total': len(self.inquiries),
+                'by_status': {option: self.by_status[option] for option in INQUIRY_STATUS_OPTIONS},
+                'by_priority': {option: self.by_priority[option] for option in PRIORITY_OPTIONS},
+                'by_type': {option: self.by_type[option] for option in INQUIRY_TYPE_OPTIONS},
+                'open_by_age': dict(self._ages),
+                'reconciled_at': self.reconciled_at
+            }
@@ -88,3 +88,175 @@ BOOKING_STATUS_OPTIONS = [
     'Completed',
     'Cancelled'
 ]
+
+# Precompiled lookups so validation is a set membership test rather than a list scan
+CUSTOMER_FIELD_NAMES = frozenset(CUSTOMER_FIELDS)
+BOOKING_FIELD_NAMES = frozenset(BOOKING_FIELDS)
+INQUIRY_FIELD_NAMES = frozenset(INQUIRY_FIELDS)
+INQUIRY_HISTORY_FIELD_NAMES = frozenset(INQUIRY_HISTORY_FIELDS)
+
+CUSTOMER_STATUSES = frozenset(CUSTOMER_STATUS_OPTIONS)
+INQUIRY_STATUSES = frozenset(INQUIRY_STATUS_OPTIONS)
+PRIORITIES = frozenset(PRIORITY_OPTIONS)
+INQUIRY_TYPES = frozenset(INQUIRY_TYPE_OPTIONS)
+BOOKING_STATUSES = frozenset(BOOKING_STATUS_OPTIONS)
+
+
+def escape_formula_value(value):
+    """Escape a value for use inside a single-quoted Airtable formula string"""
+    return str(value).replace('\\', '\\\\').replace("'", "\\'")
+
+
+def parse_field_list(value, allowed):
+    """Parse a comma-separated field projection; None when empty, ValueError on unknown fields
+
+    The names come back sorted and de-duplicated, so equivalent projections
+    produce the same list.
+    """
+    if not value:
+        return None
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return sorted(set(fields)) or None
+
+
+def formula_eq(field, value):
+    """Build a `{Field} = 'value'` comparison with the value escaped"""
+    return f"{{{field}}} = '{escape_formula_value(value)}'"
+
+
+class Record:
+    """Base for compact typed views over Airtable records
+
+    Subclasses declare FIELD_MAP as (attribute, Airtable field) pairs and
+    OPTIONS as (attribute, allowed set, option list) triples for single
+    select fields. Attributes left as None are omitted when serializing.
+    """
+
+    __slots__ = ('id',)
+    FIELD_MAP = ()
+    OPTIONS = ()
+
+    def __init__(self, id=None, **values):
+        self.id = id
+        for attr, _ in self.FIELD_MAP:
+            setattr(self, attr, values.pop(attr, None))
+        if values:
+            raise TypeError(f"Unknown {type(self).__name__} fields: {', '.join(values)}")
+
+    @classmethod
+    def from_airtable(cls, record):
+        """Build from an Airtable record dict ({'id': ..., 'fields': {...}})"""
+        obj = cls.__new__(cls)
+        obj.id = record.get('id')
+        fields = record.get('fields', {})
+        for attr, name in cls.FIELD_MAP:
+            setattr(obj, attr, fields.get(name))
+        return obj
+
+    @classmethod
+    def fields(cls, *attrs):
+        """Airtable field names for attributes, for projecting a read"""
+        names = dict(cls.FIELD_MAP)
+        return [names[attr] for attr in attrs]
+
+    def to_airtable(self):
+        """Serialize to an Airtable fields dict"""
+        fields = {}
+        for attr, name in self.FIELD_MAP:
+            value = getattr(self, attr)
+            if value is not None:
+                fields[name] = value
+        return fields
+
+    def to_record(self):
+        return {'id': self.id, 'fields': self.to_airtable()}
+
+    def validate(self):
+        """Check single select values against their allowed options"""
+        for attr, allowed, options in self.OPTIONS:
+            value = getattr(self, attr)
+            if value is not None and value not in allowed:
+                raise ValueError(f"Invalid {attr}. Must be one of: {options}")
+        return self
+
+    def __repr__(self):
+        values = ', '.join(f"{attr}={getattr(self, attr)!r}" for attr, _ in self.FIELD_MAP)
+        return f"{type(self).__name__}(id={self.id!r}, {values})"
+
+
+class Customer(Record):
+    FIELD_MAP = (
+        ('name', 'Name'),
+        ('email', 'Email'),
+        ('phone', 'Phone'),
+        ('address', 'Address'),
+        ('last_contact', 'Last Contact'),
+        ('status', 'Status'),
+        ('notes', 'Notes'),
+        ('inquiries', 'Inquiries'),
+        ('bookings', 'Bookings'),
+    )
+    __slots__ = tuple(attr for attr, _ in FIELD_MAP)
+    OPTIONS = (
+        ('status', CUSTOMER_STATUSES, CUSTOMER_STATUS_OPTIONS),
+    )
+
+
+class Booking(Record):
+    FIELD_MAP = (
+        ('summary', 'Booking Summary'),
+        ('customer', 'Customer'),
+        ('start_date', 'Start Date'),
+        ('end_date', 'End Date'),
+        ('status', 'Status'),
+        ('notes', 'Notes'),
+        ('calendar_event_id', 'Calendar Event ID'),
+    )
+    __slots__ = tuple(attr for attr, _ in FIELD_MAP)
+    OPTIONS = (
+        ('status', BOOKING_STATUSES, BOOKING_STATUS_OPTIONS),
+    )
+
+
+class Inquiry(Record):
+    FIELD_MAP = (
+        ('subject', 'Subject'),
+        ('customer', 'Customer'),
+        ('type', 'Type'),
+        ('message', 'Message'),
+        ('status', 'Status'),
+        ('priority', 'Priority'),
+        ('assigned_to', 'Assigned to'),
+        ('history', 'Inquiries History'),
+    )
+    __slots__ = tuple(attr for attr, _ in FIELD_MAP)
+    OPTIONS = (
+        ('type', INQUIRY_TYPES, INQUIRY_TYPE_OPTIONS),
+        ('status', INQUIRY_STATUSES, INQUIRY_STATUS_OPTIONS),
+        ('priority', PRIORITIES, PRIORITY_OPTIONS),
+    )
+
+
+class HistoryEntry(Record):
+    FIELD_MAP = (
+        ('summary', 'Log Summary'),
+        ('inquiry', 'Inquiry'),
+        ('action', 'Action'),
+        ('message', 'Message'),
+        ('created_by', 'Created By'),
+    )
+    __slots__ = tuple(attr for attr, _ in FIELD_MAP)
+
+
+# Field projections: reads request only what their callers use, leaving
+# long text and link arrays on the server
+PROBE_FIELDS = {
+    CUSTOMERS_TABLE: Customer.fields('name'),
+    BOOKINGS_TABLE: Booking.fields('summary'),
+    INQUIRIES_TABLE: Inquiry.fields('subject'),
+    INQUIRY_HISTORY_TABLE: HistoryEntry.fields('summary')
+}
+CUSTOMER_LOOKUP_FIELDS = Customer.fields('name', 'email', 'phone', 'address', 'status')
@@ -0,0 +1,84 @@
+"""Per-base request rate limiting and connection pooling for Airtable"""
+
+import threading
+import time
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+
+# Airtable allows 5 requests per second per base
+REQUESTS_PER_SECOND = 5
+POOL_SIZE = 10
+
+
+class RateLimiter:
+    """Token bucket that blocks callers until a request may be sent"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waiting = 0  # callers sleeping until a token frees up
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _refill(self, now):
+        return min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+
+    def try_acquire(self):
+        """Take a token without blocking; returns 0 on success, else the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = self._refill(now)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        started = time.monotonic()
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                break
+            with self._lock:
+                self.waiting += 1
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        on_token = getattr(self._local, 'on_token', None)
+        if on_token:
+            on_token(time.monotonic() - started)
+
+    def backlogged(self):
+        """True when a request sent now would have to wait for a token"""
+        with self._lock:
+            return self.waiting > 0 or self._refill(time.monotonic()) < 1
+
+    @contextmanager
+    def tracking(self, on_token):
+        """Call on_token(seconds waited) each time this thread gets a token"""
+        self._local.on_token = on_token
+        try:
+            yield
+        finally:
+            self._local.on_token = None
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTP adapter that takes a rate limiter token before each request
+
+    Mounting one adapter on every table's session gives a base a single
+    connection pool and a single request budget.
+    """
+
+    def __init__(self, limiter, pool_size=POOL_SIZE):
+        self.limiter = limiter
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        return super().send(request, **kwargs)
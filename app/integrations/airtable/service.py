@@ -2,18 +2,48 @@ import os
 from datetime import datetime, timezone
 from airtable import Airtable
 from .models import *
+from .history_queue import HistoryWriteQueue
+from .single_flight import SingleFlight
+from .inquiry_stats import InquiryStats
+from .triage import TriageQueue, ASSIGN_LOCK_PATH, DEFAULT_LEASE, TRIAGE_STATUSES
+from .rate_limit import RateLimiter, RateLimitedAdapter
+from .hedging import HedgedReader, HEDGED_READS
+from .customer_index import CustomerIndex, contact_key
+import threading
 import requests
 
+# RECORD_ID() clauses per request when fetching linked records, keeping the
+# filterByFormula query string well under Airtable's URL length limit
+LINKED_RECORD_BATCH = 50
+
+# Records per Airtable create request
+BATCH_WRITE_SIZE = 10
+
+
+class BatchWriteError(Exception):
+    """A batched write failed part way; created holds the records written before it failed"""
+
+    def __init__(self, message, created):
+        super().__init__(message)
+        self.created = created
+
 class AirtableService:
-    def __init__(self):
-        """Initialize Airtable service"""
+    def __init__(self, base_id=None, api_key=None, queue_path=None, hedged_reads=None, verify=True,
+                 triage_lock_path=None):
+        """Initialize Airtable service
+
+        base_id and api_key default to the AIRTABLE_BASE_ID and AIRTABLE_API_KEY
+        environment variables; hedged_reads defaults to AIRTABLE_HEDGED_READS.
+        triage_lock_path defaults to TRIAGE_LOCK_PATH; services for different
+        bases need different lock files. With verify=False the table checks are left to a verify_tables() call.
+        """
         print("\n==================================================")
         print("🔄 INITIALIZING AIRTABLE SERVICE")
         print("==================================================")
         
         # Check if environment variables are set
-        self.api_key = os.getenv('AIRTABLE_API_KEY')
-        self.base_id = os.getenv('AIRTABLE_BASE_ID')
+        self.api_key = api_key or os.getenv('AIRTABLE_API_KEY')
+        self.base_id = base_id or os.getenv('AIRTABLE_BASE_ID')
         
         print(f"API Key present: {'✅' if self.api_key else '❌'}")
         print(f"Base ID present: {'✅' if self.base_id else '❌'}")
@@ -25,6 +55,66 @@ class AirtableService:
         
         print(f"\nInitializing with base_id: {self.base_id}")
         
+        # Concurrent identical reads share one in-flight request
+        self._reads = SingleFlight()
+        
+        # Booking-path customer lookups by email or phone
+        self.customer_index = CustomerIndex()
+        
+        # One request budget for the whole base, shared with the hedger
+        self.rate_limiter = RateLimiter()
+        
+        # Opt-in: duplicate reads that run past the usual latency
+        self.hedger = HedgedReader(self.rate_limiter) if (HEDGED_READS if hedged_reads is None else hedged_reads) else None
+        
+        # Callables notified with the booking record after each booking write
+        self.booking_listeners = []
+        
+        # Callables notified with the inquiry record after each inquiry or history write
+        self.inquiry_listeners = []
+        
+        try:
+            print("\nConnecting to tables:")
+            self.customers = Airtable(self.base_id, CUSTOMERS_TABLE, api_key=self.api_key)
+            self.bookings = Airtable(self.base_id, BOOKINGS_TABLE, api_key=self.api_key)
+            self.inquiries = Airtable(self.base_id, INQUIRIES_TABLE, api_key=self.api_key)
+            self.inquiry_history = Airtable(self.base_id, INQUIRY_HISTORY_TABLE, api_key=self.api_key)
+            if verify:
+                self.verify_tables()
+            
+            # One connection pool and one request budget for the whole base
+            adapter = RateLimitedAdapter(self.rate_limiter)
+            for table in (self.customers, self.bookings, self.inquiries, self.inquiry_history):
+                table.session.mount('https://', adapter)
+            
+            # History entries are written behind the main inquiry mutation
+            self.history_queue = HistoryWriteQueue(self.inquiry_history, queue_path)
+            self.history_queue.start()
+            
+            # Dashboard counters, rebuilt from a full scan in the background
+            self.inquiry_stats = InquiryStats(
+                lambda: self.iter_records(INQUIRIES_TABLE, fields=['Status', 'Priority', 'Type'])
+            )
+            self.inquiry_stats.start()
+            
+            # Work queue for agents, filled from one scan in the background
+            self.triage = TriageQueue(triage_lock_path or ASSIGN_LOCK_PATH)
+            threading.Thread(target=self._load_triage, name='triage-load', daemon=True).start()
+            
+            print("\n✅ All tables initialized successfully")
+            print("="*50 + "\n")
+            
+        except Exception as e:
+            print(f"\n❌ Error initializing tables: {str(e)}")
+            print(f"Error type: {type(e)}")
+            print("="*50 + "\n")
+            raise
+        
+    def verify_tables(self):
+        """List the base's tables and read one record from each table we use
+
+        Raises ValueError when a table cannot be read.
+        """
         # Try to list all tables in the base
         try:
             headers = {
@@ -43,57 +133,65 @@ class AirtableService:
         except Exception as e:
             print(f"\n❌ Error listing tables: {str(e)}")
         
-        print("\nConnecting to tables:")
+        # Test connection to each table
+        def test_table_access(table_name):
+            try:
+                print(f"Testing access to table: {table_name}")
+                table = Airtable(self.base_id, table_name, api_key=self.api_key)
+                # Try to get one record to verify access
+                table.get_all(maxRecords=1, fields=PROBE_FIELDS[table_name])
+                return True
+            except Exception as e:
+                print(f"❌ Error accessing {table_name}: {str(e)}")
+                return False
         
-        try:
-            # Initialize tables
-            print("\nConnecting to tables:")
-            
-            # Test connection to each table
-            def test_table_access(table_name):
-                try:
-                    print(f"Testing access to table: {table_name}")
-                    table = Airtable(self.base_id, table_name, api_key=self.api_key)
-                    # Try to get one record to verify access
-                    table.get_all(maxRecords=1)
-                    return True
-                except Exception as e:
-                    print(f"❌ Error accessing {table_name}: {str(e)}")
-                    return False
-            
-            # Initialize each table
-            self.customers = Airtable(self.base_id, CUSTOMERS_TABLE, api_key=self.api_key)
-            if test_table_access(CUSTOMERS_TABLE):
-                print(f"✅ {CUSTOMERS_TABLE} - Access verified")
-            else:
-                raise ValueError(f"Could not access {CUSTOMERS_TABLE} table")
-                
-            self.bookings = Airtable(self.base_id, BOOKINGS_TABLE, api_key=self.api_key)
-            if test_table_access(BOOKINGS_TABLE):
-                print(f"✅ {BOOKINGS_TABLE} - Access verified")
+        for table_name in (CUSTOMERS_TABLE, BOOKINGS_TABLE, INQUIRIES_TABLE, INQUIRY_HISTORY_TABLE):
+            if test_table_access(table_name):
+                print(f"✅ {table_name} - Access verified")
             else:
-                raise ValueError(f"Could not access {BOOKINGS_TABLE} table")
-                
-            self.inquiries = Airtable(self.base_id, INQUIRIES_TABLE, api_key=self.api_key)
-            if test_table_access(INQUIRIES_TABLE):
-                print(f"✅ {INQUIRIES_TABLE} - Access verified")
-            else:
-                raise ValueError(f"Could not access {INQUIRIES_TABLE} table")
-                
-            self.inquiry_history = Airtable(self.base_id, INQUIRY_HISTORY_TABLE, api_key=self.api_key)
-            if test_table_access(INQUIRY_HISTORY_TABLE):
-                print(f"✅ {INQUIRY_HISTORY_TABLE} - Access verified")
-            else:
-                raise ValueError(f"Could not access {INQUIRY_HISTORY_TABLE} table")
-            
-            print("\n✅ All tables initialized successfully")
-            print("="*50 + "\n")
-            
-        except Exception as e:
-            print(f"\n❌ Error initializing tables: {str(e)}")
-            print(f"Error type: {type(e)}")
-            print("="*50 + "\n")
-            raise
+                raise ValueError(f"Could not access {table_name} table")
+        
+    def stop(self):
+        """Stop background workers, flushing queued history entries"""
+        self.inquiry_stats.stop()
+        self.history_queue.stop()
+        if self.hedger:
+            self.hedger.stop()
+        
+    def _get_all(self, table, **options):
+        """Read records, coalescing concurrent calls with the same table and options
+
+        Callers sharing a flight receive the same list, so results must be
+        treated as read-only.
+        """
+        key = (table.table_name, options.get('formula'), repr(sorted(options.items())))
+        return self._reads.do(key, self._read, table.table_name, table.get_all, **options)
+        
+    def _read(self, kind, fn, *args, **kwargs):
+        """Run an idempotent read, hedged when hedged reads are enabled"""
+        if self.hedger:
+            return self.hedger.call(kind, fn.__name__, fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+        
+    def iter_records(self, table_name, formula=None, fields=None, page_size=100):
+        """Yield records from a table one page at a time
+
+        Only the current page is held in memory, so this is safe to use for
+        whole-table exports.
+        """
+        tables = {
+            CUSTOMERS_TABLE: self.customers,
+            BOOKINGS_TABLE: self.bookings,
+            INQUIRIES_TABLE: self.inquiries,
+            INQUIRY_HISTORY_TABLE: self.inquiry_history
+        }
+        options = {'page_size': page_size}
+        if formula:
+            options['formula'] = formula
+        if fields:
+            options['fields'] = fields
+        for page in tables[table_name].get_iter(**options):
+            yield from page
         
     def get_all_storage_units(self):
         """Get all storage units"""
@@ -124,8 +222,8 @@ class AirtableService:
                 booking_data['Status'] = 'Scheduled'
             
             # Remove any fields that are not in BOOKING_FIELDS
-            valid_fields = set(BOOKING_FIELDS.keys())
-            booking_data = {k: v for k, v in booking_data.items() if k in valid_fields}
+            booking_data = {k: v for k, v in booking_data.items() if k in BOOKING_FIELD_NAMES}
+            Booking.from_airtable({'fields': booking_data}).validate()
             
             print(f"Final booking data prepared: {booking_data}")
             
@@ -138,10 +236,12 @@ class AirtableService:
             print(f"✅ Booking created in Airtable: {booking}")
             
             # Return standardized response
-            return {
+            booking = {
                 'id': booking.get('id'),
                 'fields': booking.get('fields', {})
             }
+            self._notify_booking(booking)
+            return booking
             
         except Exception as e:
             print(f"\n❌ Error in create_booking:")
@@ -150,24 +250,61 @@ class AirtableService:
             print(f"Booking data: {booking_data}")
             raise
         
+    def create_bookings_batch(self, bookings):
+        """Create several bookings with batched Airtable writes
+
+        Each booking dict is validated and filtered like create_booking.
+        Records are sent 10 per request and returned in input order.
+        """
+        prepared = []
+        for booking_data in bookings:
+            missing_fields = [field for field in ('Customer', 'Start Date') if field not in booking_data]
+            if missing_fields:
+                raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+            booking_data = {k: v for k, v in booking_data.items() if k in BOOKING_FIELD_NAMES}
+            booking_data.setdefault('Status', 'Scheduled')
+            Booking.from_airtable({'fields': booking_data}).validate()
+            prepared.append(booking_data)
+        
+        print(f"\n📝 Creating {len(prepared)} bookings in batches")
+        created = self.bookings.batch_insert(prepared)
+        bookings = [{'id': booking.get('id'), 'fields': booking.get('fields', {})} for booking in created]
+        for booking in bookings:
+            self._notify_booking(booking)
+        return bookings
+        
+    def update_booking_status(self, booking_id, status):
+        """Update booking status, e.g. to cancel it"""
+        if status not in BOOKING_STATUSES:
+            raise ValueError(f"Invalid status. Must be one of: {BOOKING_STATUS_OPTIONS}")
+            
+        booking = self.bookings.update(booking_id, {'Status': status})
+        booking = {'id': booking.get('id'), 'fields': booking.get('fields', {})}
+        self._notify_booking(booking)
+        return booking
+        
+    def get_booking(self, booking_id):
+        """Read one booking record; None if it no longer exists"""
+        try:
+            booking = self._read(self.bookings.table_name, self.bookings.get, booking_id)
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+        return {'id': booking.get('id'), 'fields': booking.get('fields', {})}
+        
+    def _notify_booking(self, booking):
+        for listener in self.booking_listeners:
+            try:
+                listener(booking)
+            except Exception as e:
+                print(f"⚠️ Booking listener failed: {str(e)}")
+        
     def create_customer(self, customer_info):
         """Create a new customer record"""
         try:
             print("\n📝 Creating new customer")
-            # Format dates for Airtable
-            current_time = datetime.now().isoformat(timespec='seconds')
-            
-            # Ensure all date fields are in ISO format
-            customer_data = {
-                'Name': customer_info['name'],
-                'Email': customer_info.get('email'),
-                'Phone': customer_info.get('phone'),
-                'Address': customer_info.get('address', ''),
-                'Status': 'Active'
-            }
-            
-            # Remove None values
-            customer_data = {k: v for k, v in customer_data.items() if v is not None}
+            customer_data = self._new_customer_fields(customer_info)
             
             print(f"Customer data prepared: {customer_data}")
             created = self.customers.insert(customer_data)
@@ -180,23 +317,49 @@ class AirtableService:
             print(f"Customer info: {customer_info}")
             raise
         
-    def find_customer(self, contact):
-        """Find customer by email or phone"""
+    def _new_customer_fields(self, customer_info):
+        customer_data = {
+            'Name': customer_info['name'],
+            'Email': customer_info.get('email'),
+            'Phone': customer_info.get('phone'),
+            'Address': customer_info.get('address', ''),
+            'Status': 'Active'
+        }
+        # Remove None values
+        return {k: v for k, v in customer_data.items() if v is not None}
+        
+    def _contact_formula(self, contact):
+        """Match a customer by email (case-insensitive) or exact phone"""
+        contact = contact.strip()
+        if '@' in contact:
+            return f"LOWER({{Email}}) = '{escape_formula_value(contact.lower())}'"
+        return formula_eq('Phone', contact)
+        
+    def find_customer(self, contact, fields=CUSTOMER_LOOKUP_FIELDS):
+        """Find customer by email or phone, fetching only the lookup fields by default
+
+        Lookups with the default fields are served from the customer index when
+        the contact was seen within CUSTOMER_INDEX_TTL.
+        """
+        indexed = fields == CUSTOMER_LOOKUP_FIELDS
+        if indexed:
+            cached = self.customer_index.get(contact)
+            if cached:
+                print(f"✅ Customer found in index: {cached['id']}")
+                return cached
         try:
-            if '@' in contact:
-                # Search by email (exact match)
-                email = contact.strip().lower()  # Normalize email
-                formula = f"LOWER({{Email}}) = '{email}'"
-            else:
-                # Search by phone (exact match)
-                phone = contact.strip()  # Normalize phone
-                formula = f"{{Phone}} = '{phone}'"
+            formula = self._contact_formula(contact)
             
             print(f"Searching for customer with formula: {formula}")
             try:
-                results = self.customers.get_all(formula=formula)
+                options = {'fields': fields} if fields else {}
+                results = self._get_all(self.customers, formula=formula, **options)
                 print(f"Search results: {results}")
-                return results[0] if results else None
+                if not results:
+                    return None
+                if indexed:
+                    self.customer_index.put(results[0], contact)
+                return results[0]
             except Exception as e:
                 print(f"Error querying Airtable: {str(e)}")
                 if '403' in str(e):
@@ -221,21 +384,14 @@ class AirtableService:
             if existing:
                 print(f"✅ Found existing customer: {existing}")
                 # Update customer info and last contact time
-                update_data = {
-                    'Last Contact': datetime.now(timezone.utc).date().isoformat(),
-                    'Name': customer_info.get('name', existing.get('fields', {}).get('Name')),
-                    'Address': customer_info.get('address', existing.get('fields', {}).get('Address'))
-                }
-                
-                # Only update email/phone if provided
-                if customer_info.get('email'):
-                    update_data['Email'] = customer_info['email']
-                if customer_info.get('phone'):
-                    update_data['Phone'] = customer_info['phone']
+                update_data = self._customer_update(
+                    existing, customer_info, datetime.now(timezone.utc).date().isoformat()
+                )
                 
                 print(f"📝 Updating customer with data: {update_data}")
                 updated = self.customers.update(existing['id'], update_data)
                 print(f"✅ Customer updated: {updated}")
+                self._index_customer(updated, contact)
                 return {
                     'id': updated['id'],
                     'fields': updated['fields']
@@ -244,6 +400,7 @@ class AirtableService:
             print("ℹ️ No existing customer found, creating new one")
             created = self.create_customer(customer_info)
             print(f"✅ New customer created: {created}")
+            self._index_customer(created, contact)
             return {
                 'id': created['id'],
                 'fields': created['fields']
@@ -254,39 +411,189 @@ class AirtableService:
             print(f"Error details: {str(e)}")
             raise
         
+    def _customer_update(self, existing, customer_info, today):
+        current = Customer.from_airtable(existing)
+        update_data = {
+            'Last Contact': today,
+            'Name': customer_info.get('name', current.name),
+            'Address': customer_info.get('address', current.address)
+        }
+        # Only update email/phone if provided
+        if customer_info.get('email'):
+            update_data['Email'] = customer_info['email']
+        if customer_info.get('phone'):
+            update_data['Phone'] = customer_info['phone']
+        return update_data
+        
+    def find_or_create_customers(self, customer_infos):
+        """Find or create many customers with batched reads and writes
+
+        customer_infos are dicts like find_or_create_customer takes. Contacts
+        are looked up LINKED_RECORD_BATCH at a time with one OR() formula,
+        then existing customers are updated and missing ones created 10 per
+        request. Returns {normalized contact: customer id}.
+        """
+        infos = {}
+        for customer_info in customer_infos:
+            customer_info = {k.lower(): v for k, v in customer_info.items()}
+            contact = customer_info.get('email') or customer_info.get('phone')
+            if not contact:
+                raise ValueError("Either email or phone must be provided")
+            infos.setdefault(contact_key(contact), customer_info)
+        
+        try:
+            keys = list(infos)
+            found = {}
+            for i in range(0, len(keys), LINKED_RECORD_BATCH):
+                chunk = keys[i:i + LINKED_RECORD_BATCH]
+                formula = "OR(" + ", ".join(self._contact_formula(key) for key in chunk) + ")"
+                for record in self._get_all(self.customers, formula=formula, fields=CUSTOMER_LOOKUP_FIELDS):
+                    fields = record.get('fields', {})
+                    for contact in (fields.get('Email'), fields.get('Phone')):
+                        if contact and contact_key(contact) in infos:
+                            found.setdefault(contact_key(contact), record)
+            print(f"👥 Found {len(found)} of {len(infos)} customers")
+            
+            today = datetime.now(timezone.utc).date().isoformat()
+            updates = {}
+            for key, existing in found.items():
+                # A customer matched by both email and phone is updated once
+                updates.setdefault(existing['id'], (key, self._customer_update(existing, infos[key], today)))
+            written = []
+            if updates:
+                updated = self.customers.batch_update(
+                    [{'id': record_id, 'fields': fields} for record_id, (_, fields) in updates.items()]
+                )
+                written.extend(zip([key for key, _ in updates.values()], updated))
+            
+            missing = [key for key in keys if key not in found]
+            if missing:
+                print(f"📝 Creating {len(missing)} customers in batches")
+                created = self.customers.batch_insert([self._new_customer_fields(infos[key]) for key in missing])
+                written.extend(zip(missing, created))
+            
+            customer_ids = {key: record['id'] for key, record in found.items()}
+            for key, record in written:
+                self._index_customer(record, key)
+                customer_ids[key] = record['id']
+            return customer_ids
+        except Exception as e:
+            print(f"\n❌ Error in find_or_create_customers: {str(e)}")
+            raise
+        
+    def _index_customer(self, record, contact):
+        fields = record.get('fields', {})
+        projected = {
+            'id': record['id'],
+            'fields': {name: fields[name] for name in CUSTOMER_LOOKUP_FIELDS if name in fields}
+        }
+        self.customer_index.replace(projected, contact, fields.get('Email'), fields.get('Phone'))
+        
+    def revalidate_customer_index(self):
+        """Refresh indexed customers with one projected scan of the Customers table"""
+        try:
+            self.customer_index.revalidate(self.iter_records(CUSTOMERS_TABLE, fields=CUSTOMER_LOOKUP_FIELDS))
+            print(f"✅ Customer index revalidated ({len(self.customer_index)} contacts)")
+        except Exception as e:
+            print(f"⚠️ Failed to revalidate customer index: {str(e)}")
+        
     def update_unit_status(self, unit_id, status):
         """Update storage unit status"""
         return self.storage_units.update(unit_id, {'Status': status})
         
+    def _get_linked_records(self, table, record_ids, formula=None, fields=None):
+        """Fetch records by id using batched RECORD_ID() filters
+
+        Cost is bounded by the number of ids rather than the table size.
+        Records are returned in the order of record_ids. fields limits the
+        fields fetched; None fetches all of them.
+        """
+        options = {'fields': fields} if fields else {}
+        found = {}
+        for i in range(0, len(record_ids), LINKED_RECORD_BATCH):
+            chunk = record_ids[i:i + LINKED_RECORD_BATCH]
+            ids_formula = "OR(" + ", ".join(f"RECORD_ID() = '{record_id}'" for record_id in chunk) + ")"
+            if formula:
+                ids_formula = f"AND({ids_formula}, {formula})"
+            for record in self._get_all(table, formula=ids_formula, **options):
+                found[record['id']] = record
+        return [found[record_id] for record_id in record_ids if record_id in found]
+        
+    def _get_customer_links(self, customer_id, field):
+        """Get the linked record ids stored on a customer record; [] for an unknown customer"""
+        try:
+            customer = self._read(self.customers.table_name, self.customers.get, customer_id)
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                print(f"ℹ️ Customer not found: {customer_id}")
+                return []
+            raise
+        return customer.get('fields', {}).get(field, [])
+        
     def get_customer_bookings(self, customer_id):
         """Get all bookings for a customer"""
-        formula = f"Customer='{customer_id}'"
-        return self.bookings.get_all(formula=formula)
+        booking_ids = self._get_customer_links(customer_id, 'Bookings')
+        return self._get_linked_records(self.bookings, booking_ids)
         
     def create_inquiry(self, customer_id, inquiry_type, subject, message, priority='Medium'):
         """Create a new inquiry"""
-        if inquiry_type not in INQUIRY_TYPE_OPTIONS:
+        if inquiry_type not in INQUIRY_TYPES:
             raise ValueError(f"Invalid inquiry type. Must be one of: {INQUIRY_TYPE_OPTIONS}")
             
-        inquiry_data = {
-            'Customer': [customer_id],
-            'Type': inquiry_type,
-            'Subject': subject,
-            'Message': message,
-            'Status': 'New',
-            'Priority': priority,
-        }
+        inquiry_data = Inquiry(
+            customer=[customer_id],
+            type=inquiry_type,
+            subject=subject,
+            message=message,
+            status='New',
+            priority=priority
+        ).validate()
         
-        inquiry = self.inquiries.insert(inquiry_data)
+        inquiry = self.inquiries.insert(inquiry_data.to_airtable())
+        self.inquiry_stats.record_created(inquiry)
+        self.triage.push(inquiry)
+        self._notify_inquiry(inquiry)
         
         # Record in history
         self.add_inquiry_history(inquiry['id'], 'Created', message)
         
         return inquiry
-        
+
+    def create_inquiries_batch(self, inquiries, created_by="System"):
+        """Create several inquiries with batched Airtable writes
+
+        Each inquiry is a fields dict; Customer is optional. Records are sent
+        BATCH_WRITE_SIZE per request, and their 'Created' history entries go
+        through the write-behind queue, which batches them too. If a request
+        fails, BatchWriteError carries the records already created, which
+        are a prefix of the input.
+        """
+        prepared = []
+        for inquiry_data in inquiries:
+            inquiry_data = {k: v for k, v in inquiry_data.items() if k in INQUIRY_FIELD_NAMES}
+            inquiry_data.setdefault('Status', 'New')
+            Inquiry.from_airtable({'fields': inquiry_data}).validate()
+            prepared.append(inquiry_data)
+
+        print(f"\n📝 Creating {len(prepared)} inquiries in batches")
+        created = []
+        for i in range(0, len(prepared), BATCH_WRITE_SIZE):
+            try:
+                chunk = self.inquiries.batch_insert(prepared[i:i + BATCH_WRITE_SIZE])
+            except Exception as e:
+                print(f"❌ Inquiry batch failed after {len(created)} of {len(prepared)} records: {str(e)}")
+                raise BatchWriteError(str(e), created) from e
+            for inquiry in chunk:
+                self.inquiry_stats.record_created(inquiry)
+                self.triage.push(inquiry)
+                self._notify_inquiry(inquiry)
+                self.add_inquiry_history(inquiry['id'], 'Created', inquiry.get('fields', {}).get('Message'), created_by)
+            created.extend(chunk)
+        return created
+
     def update_inquiry_status(self, inquiry_id, status, message=None):
         """Update inquiry status"""
-        if status not in INQUIRY_STATUS_OPTIONS:
+        if status not in INQUIRY_STATUSES:
             raise ValueError(f"Invalid status. Must be one of: {INQUIRY_STATUS_OPTIONS}")
             
         update_data = {
@@ -295,6 +602,9 @@ class AirtableService:
         }
         
         inquiry = self.inquiries.update(inquiry_id, update_data)
+        self.inquiry_stats.record_status(inquiry, status)
+        self.triage.update_status(inquiry, status)
+        self._notify_inquiry(inquiry)
         
         # Record in history
         self.add_inquiry_history(inquiry_id, f"Status Updated to {status}", message)
@@ -304,40 +614,130 @@ class AirtableService:
     def add_inquiry_response(self, inquiry_id, message, responder="AI Assistant"):
         """Add a response to an inquiry"""
         # Update inquiry
-        self.inquiries.update(inquiry_id, {
+        inquiry = self.inquiries.update(inquiry_id, {
             'Status': 'In Progress',
             'Updated At': datetime.now().isoformat(timespec='seconds')
         })
+        self.inquiry_stats.record_status(inquiry, 'In Progress')
+        self.triage.update_status(inquiry, 'In Progress')
+        self._notify_inquiry(inquiry)
         
         # Record in history
         return self.add_inquiry_history(inquiry_id, 'Responded', message, responder)
         
     def add_inquiry_history(self, inquiry_id, action, message, created_by="System"):
-        """Add an entry to inquiry history"""
-        history_data = {
-            'Inquiry': [inquiry_id],
-            'Action': action,
-            'Message': message,
-            'Created By': created_by
-        }
-        return self.inquiry_history.insert(history_data)
+        """Queue an entry for inquiry history
+
+        The entry is acknowledged once it is stored in the local write-behind
+        queue; the background worker creates the Airtable record.
+        """
+        history_data = HistoryEntry(
+            inquiry=[inquiry_id],
+            action=action,
+            message=message,
+            created_by=created_by
+        ).to_airtable()
+        queued = self.history_queue.enqueue(inquiry_id, history_data)
+        self._notify_inquiry({'id': inquiry_id, 'fields': {}})
+        return queued
+        
+    def _notify_inquiry(self, inquiry):
+        for listener in self.inquiry_listeners:
+            try:
+                listener(inquiry)
+            except Exception as e:
+                print(f"⚠️ Inquiry listener failed: {str(e)}")
+        
+    def _load_triage(self):
+        try:
+            self.triage.load(self.iter_records(
+                INQUIRIES_TABLE, fields=['Status', 'Priority', 'Assigned to']
+            ))
+        except Exception as e:
+            print(f"⚠️ Failed to load triage queue: {str(e)}")
+        
+    def claim_next_inquiry(self, agent, lease_seconds=DEFAULT_LEASE):
+        """Lease the most urgent open inquiry to an agent and record the assignment
+
+        The 'Assigned to' field decides ownership. Each candidate is read and
+        only assigned if it is still open and unassigned, under a lock shared
+        by the workers on this host; anything assigned elsewhere is dropped
+        from the local queue. If the write fails, the lease is given back.
+        """
+        with self.triage.assigning():
+            self._expire_triage_leases()
+            while True:
+                claim = self.triage.claim(agent, lease_seconds)
+                if not claim:
+                    return None
+                inquiry_id = claim['inquiry_id']
+                try:
+                    fields = self._read(INQUIRIES_TABLE, self.inquiries.get, inquiry_id).get('fields', {})
+                    if fields.get('Status') not in TRIAGE_STATUSES or fields.get('Assigned to') not in (None, '', agent):
+                        print(f"ℹ️ Inquiry {inquiry_id} is taken or closed, skipping")
+                        self.triage.forget(inquiry_id)
+                        continue
+                    inquiry = self.inquiries.update(inquiry_id, {'Assigned to': agent})
+                except Exception as e:
+                    print(f"❌ Failed to assign inquiry {inquiry_id} to {agent}: {str(e)}")
+                    self.triage.release(inquiry_id, agent, requeue=True)
+                    raise
+                self._notify_inquiry(inquiry)
+                return claim
+        
+    def _expire_triage_leases(self):
+        """Unassign inquiries whose lease ran out, unless someone else has them now"""
+        for inquiry_id, agent in self.triage.expire_leases():
+            try:
+                fields = self._read(INQUIRIES_TABLE, self.inquiries.get, inquiry_id).get('fields', {})
+                if fields.get('Assigned to') not in (None, '', agent) or fields.get('Status') not in TRIAGE_STATUSES:
+                    self.triage.forget(inquiry_id)
+                    continue
+                if fields.get('Assigned to'):
+                    self._notify_inquiry(self.inquiries.update(inquiry_id, {'Assigned to': None}))
+            except Exception as e:
+                # Still assigned in Airtable: keep it out of the queue until the next scan
+                print(f"⚠️ Failed to clear expired lease on inquiry {inquiry_id}: {str(e)}")
+                self.triage.forget(inquiry_id)
+                continue
+            self.triage.requeue(inquiry_id)
+        
+    def release_inquiry(self, inquiry_id, agent, requeue=True):
+        """Give back a claimed inquiry; with requeue it returns to the queue unassigned"""
+        with self.triage.assigning():
+            released = self.triage.release(inquiry_id, agent, requeue)
+            if released and requeue:
+                self._notify_inquiry(self.inquiries.update(inquiry_id, {'Assigned to': None}))
+        return released
         
-    def get_customer_inquiries(self, customer_id, status=None):
-        """Get all inquiries for a customer"""
-        formula = f"Customer = '{customer_id}'"
+    def get_customer_inquiries(self, customer_id, status=None, fields=None):
+        """Get all inquiries for a customer, optionally only some fields"""
+        formula = None
         if status:
-            if status not in INQUIRY_STATUS_OPTIONS:
+            if status not in INQUIRY_STATUSES:
                 raise ValueError(f"Invalid status. Must be one of: {INQUIRY_STATUS_OPTIONS}")
-            formula += f" AND Status = '{status}'"
+            formula = formula_eq('Status', status)
             
-        return self.inquiries.get_all(formula=formula)
+        inquiry_ids = self._get_customer_links(customer_id, 'Inquiries')
+        return self._get_linked_records(self.inquiries, inquiry_ids, formula, fields)
         
-    def get_inquiry_history(self, inquiry_id):
-        """Get history for an inquiry"""
-        formula = f"Inquiry = '{inquiry_id}'"
-        return self.inquiry_history.get_all(formula=formula, sort=['Created At'])
+    def get_inquiry_history(self, inquiry_id, fields=None):
+        """Get history for an inquiry, optionally only some fields"""
+        formula = formula_eq('Inquiry', inquiry_id)
+        options = {'fields': fields} if fields else {}
+        history = self._get_all(self.inquiry_history, formula=formula, sort=['Created At'], **options)
+        # Include entries still waiting in the write-behind queue
+        pending = self.history_queue.pending_for(inquiry_id)
+        if fields:
+            pending = [
+                {**entry, 'fields': {k: v for k, v in entry['fields'].items() if k in fields}}
+                for entry in pending
+            ]
+        return history + pending
         
-    def search_inquiries(self, query):
-        """Search inquiries by subject or message"""
+    def search_inquiries(self, query, fields=None):
+        """Search inquiries by subject or message, optionally returning only some fields"""
+        query = escape_formula_value(query)
         formula = f"OR(FIND(LOWER('{query}'), LOWER({{Subject}})), FIND(LOWER('{query}'), LOWER({{Message}})))"
-        return self.inquiries.get_all(formula=formula) 
\ No newline at end of file
+        options = {'fields': fields} if fields else {}
+        return self._get_all(self.inquiries, formula=formula, **options) 
\ No newline at end of file
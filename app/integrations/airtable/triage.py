@@ -0,0 +1,176 @@
+"""Priority and SLA ordered inquiry triage queue with leased claims"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from .models import PRIORITY_OPTIONS
+
+try:
+    import fcntl
+except ImportError:  # Windows: assignments are only serialized within the process
+    fcntl = None
+
+# Hours until an inquiry breaches its SLA, by priority
+SLA_HOURS = {
+    'Urgent': 1,
+    'High': 4,
+    'Medium': 24,
+    'Low': 72
+}
+DEFAULT_LEASE = 900  # seconds an agent holds a claimed inquiry
+# Lock file serializing the read-check-write of assignments across workers
+ASSIGN_LOCK_PATH = os.getenv('TRIAGE_LOCK_PATH', 'triage.lock')
+
+# Statuses that still need an agent
+TRIAGE_STATUSES = frozenset(['New', 'In Progress'])
+
+# Urgent first; unknown priorities sort after Low
+_PRIORITY_RANK = {priority: rank for rank, priority in enumerate(reversed(PRIORITY_OPTIONS))}
+
+
+def _created_at(record):
+    created = record.get('createdTime')
+    if not created:
+        return time.time()
+    return datetime.fromisoformat(created.replace('Z', '+00:00')).timestamp()
+
+
+class TriageQueue:
+    """Heap of unassigned inquiries ordered by priority, then SLA deadline
+
+    Removals are lazy: each inquiry has a current entry id, and heap entries
+    whose id no longer matches are skipped when popped. Claims hold a lease;
+    expired leases are handed back by expire_leases() so the caller can clear
+    the assignment in Airtable before requeueing them. The heap is only a
+    local ordering: the 'Assigned to' field in Airtable decides who owns an
+    inquiry, and AirtableService checks it under assigning().
+    """
+
+    def __init__(self, lock_path=ASSIGN_LOCK_PATH):
+        self.lock_path = lock_path
+        self._lock = threading.Lock()
+        self._assign_lock = threading.Lock()
+        self._heap = []  # (rank, deadline, entry_id, inquiry_id)
+        self._entries = {}  # inquiry_id -> current entry id
+        self._info = {}  # inquiry_id -> (priority, deadline)
+        self._leases = {}  # inquiry_id -> (agent, expires_at)
+        self._lease_heap = []  # (expires_at, inquiry_id)
+        self._ids = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self, records):
+        """Queue every open, unassigned inquiry from a scan"""
+        count = 0
+        for record in records:
+            fields = record.get('fields', {})
+            if fields.get('Status') in TRIAGE_STATUSES and not fields.get('Assigned to'):
+                self.push(record)
+                count += 1
+        print(f"✅ Triage queue loaded ({count} inquiries)")
+
+    def push(self, record):
+        """Queue an inquiry record, replacing any existing entry for it"""
+        priority = record.get('fields', {}).get('Priority') or 'Medium'
+        deadline = _created_at(record) + SLA_HOURS.get(priority, SLA_HOURS['Medium']) * 3600
+        with self._lock:
+            self._info[record['id']] = (priority, deadline)
+            if record['id'] not in self._leases:
+                self._push(record['id'])
+
+    def _push(self, inquiry_id):
+        priority, deadline = self._info[inquiry_id]
+        entry_id = next(self._ids)
+        self._entries[inquiry_id] = entry_id
+        heapq.heappush(
+            self._heap,
+            (_PRIORITY_RANK.get(priority, len(_PRIORITY_RANK)), deadline, entry_id, inquiry_id)
+        )
+
+    def update_status(self, record, status):
+        """Follow a status change: open inquiries stay queued, others leave"""
+        if status in TRIAGE_STATUSES:
+            with self._lock:
+                known = record['id'] in self._info
+            if not known:
+                self.push(record)
+            return
+        self.forget(record['id'])
+
+    def expire_leases(self, now=None):
+        """Remove expired leases and return them as (inquiry_id, agent); they are not requeued"""
+        now = now or time.time()
+        expired = []
+        with self._lock:
+            while self._lease_heap and self._lease_heap[0][0] <= now:
+                expires_at, inquiry_id = heapq.heappop(self._lease_heap)
+                lease = self._leases.get(inquiry_id)
+                if lease and lease[1] == expires_at:
+                    del self._leases[inquiry_id]
+                    expired.append((inquiry_id, lease[0]))
+        return expired
+
+    def requeue(self, inquiry_id):
+        """Put a known, unleased inquiry back on the heap"""
+        with self._lock:
+            if inquiry_id in self._info and inquiry_id not in self._leases:
+                self._push(inquiry_id)
+
+    def forget(self, inquiry_id):
+        """Drop an inquiry that is assigned elsewhere or no longer open"""
+        with self._lock:
+            self._entries.pop(inquiry_id, None)
+            self._info.pop(inquiry_id, None)
+            self._leases.pop(inquiry_id, None)
+
+    @contextmanager
+    def assigning(self):
+        """Hold the assignment lock shared by every worker on this host"""
+        with self._assign_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'w') as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def claim(self, agent, lease_seconds=DEFAULT_LEASE):
+        """Lease the most urgent inquiry to an agent; None when the queue is empty"""
+        now = time.time()
+        with self._lock:
+            while self._heap:
+                _, deadline, entry_id, inquiry_id = heapq.heappop(self._heap)
+                if self._entries.get(inquiry_id) != entry_id:
+                    continue
+                del self._entries[inquiry_id]
+                expires_at = now + lease_seconds
+                self._leases[inquiry_id] = (agent, expires_at)
+                heapq.heappush(self._lease_heap, (expires_at, inquiry_id))
+                return {
+                    'inquiry_id': inquiry_id,
+                    'priority': self._info[inquiry_id][0],
+                    'sla_deadline': datetime.fromtimestamp(deadline, timezone.utc).isoformat(timespec='seconds'),
+                    'lease_expires_at': datetime.fromtimestamp(expires_at, timezone.utc).isoformat(timespec='seconds')
+                }
+        return None
+
+    def release(self, inquiry_id, agent, requeue=True):
+        """End an agent's lease; requeue puts the inquiry back for someone else"""
+        with self._lock:
+            lease = self._leases.get(inquiry_id)
+            if not lease or lease[0] != agent:
+                return False
+            del self._leases[inquiry_id]
+            if requeue and inquiry_id in self._info:
+                self._push(inquiry_id)
+            else:
+                self._info.pop(inquiry_id, None)
+            return True
@@ -0,0 +1,231 @@
+"""Capacity-aware scheduling across several collection crews"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from . import config
+
+# Seconds a day's busy intervals are reused; changes made outside this process
+# (people editing the calendar) show up within this long. Off when workers share
+# a response cache: a worker with stale busy time would store stale slots there
+# for everyone, undoing the other workers' invalidations.
+BUSY_CACHE_TTL = 0 if os.getenv('SHARED_CACHE_SOCKET') else int(os.getenv('BUSY_CACHE_TTL', 60))
+
+
+class BusyIntervalCache:
+    """Busy intervals per local day for a set of calendars
+
+    Schedulers for availability, capacity and holds read through it, so a
+    burst of requests for the same day makes one calendar request. Booking
+    writes through GoogleCalendarService drop the affected days. With a ttl
+    of 0 every read goes to the calendar.
+    """
+
+    def __init__(self, calendar_service, ttl=BUSY_CACHE_TTL):
+        self.calendar_service = calendar_service
+        self.ttl = ttl
+        self._days = {}  # (day, calendar ids) -> (fetched_at, {calendar_id: [(start, end)]})
+        self._lock = threading.Lock()
+
+    def get(self, calendar_ids, horizon_start, days, fresh=False):
+        """Busy intervals per calendar for the days from local midnight horizon_start"""
+        if self.ttl <= 0:
+            return self.calendar_service.get_busy_intervals(
+                list(calendar_ids), horizon_start, horizon_start + timedelta(days=days)
+            )
+        ids = tuple(sorted(calendar_ids))
+        day_starts = [horizon_start + timedelta(days=day) for day in range(days)]
+        now = time.monotonic()
+        with self._lock:
+            cached = {
+                day_start: self._days.get((day_start.date(), ids))
+                for day_start in day_starts
+            }
+        missing = [
+            day_start for day_start, entry in cached.items()
+            if fresh or entry is None or entry[0] + self.ttl <= now
+        ]
+        if missing:
+            # One request for the span covering every missing day
+            fetched = self.calendar_service.get_busy_intervals(
+                list(ids), missing[0], missing[-1] + timedelta(days=1)
+            )
+            to_local = self.calendar_service.to_local
+            with self._lock:
+                for day_start in day_starts[day_starts.index(missing[0]):day_starts.index(missing[-1]) + 1]:
+                    day_end = day_start + timedelta(days=1)
+                    entry = (now, {
+                        calendar_id: [
+                            (start, end) for start, end in fetched.get(calendar_id, [])
+                            if to_local(start) < day_end and to_local(end) > day_start
+                        ]
+                        for calendar_id in ids
+                    })
+                    self._days[(day_start.date(), ids)] = cached[day_start] = entry
+        busy = {}
+        for calendar_id in ids:
+            # An interval spanning midnight is stored under both days
+            intervals = {interval for day_start in day_starts for interval in cached[day_start][1][calendar_id]}
+            busy[calendar_id] = sorted(intervals)
+        return busy
+
+    def invalidate(self, day=None):
+        """Drop one local day, or every day when day is None"""
+        with self._lock:
+            if day is None:
+                self._days.clear()
+                return
+            for key in [key for key in self._days if key[0] == day]:
+                del self._days[key]
+
+
+class CapacityScheduler:
+    """Track per-crew busy bitmaps and assign bookings to the least-loaded crew
+
+    Each crew has one row in a boolean matrix of SCHEDULE_TICK-minute cells
+    covering the loaded horizon. Free crews for every candidate slot are
+    computed in one pass with a cumulative sum over that matrix.
+    """
+
+    def __init__(self, calendar_service, crews=None, tick=config.SCHEDULE_TICK):
+        self.calendar_service = calendar_service
+        self.busy_cache = getattr(calendar_service, 'busy_cache', None)
+        self.crews = dict(crews or calendar_service.crew_calendars)
+        self.names = list(self.crews)
+        self.tick = tick
+        self._lock = threading.Lock()
+        self.horizon_start = None
+        self.busy = np.zeros((len(self.names), 0), dtype=bool)
+
+    def _local(self, value):
+        return self.calendar_service.to_local(value)
+
+    def _index(self, value):
+        return int((self._local(value) - self.horizon_start).total_seconds() // (self.tick * 60))
+
+    def load(self, start_date, days=config.ADVANCE_BOOKING_DAYS, fresh=False):
+        """Fetch busy time for every crew and rebuild the bitmaps for the horizon
+
+        Busy time comes from the calendar service's cache unless fresh is
+        set; bookings load fresh so a crew is never assigned from stale data.
+        """
+        horizon_start = self._local(start_date).replace(hour=0, minute=0, second=0, microsecond=0)
+        horizon_end = horizon_start + timedelta(days=days)
+        if self.busy_cache is not None:
+            busy_by_calendar = self.busy_cache.get(list(self.crews.values()), horizon_start, days, fresh=fresh)
+        else:
+            busy_by_calendar = self.calendar_service.get_busy_intervals(
+                list(self.crews.values()), horizon_start, horizon_end
+            )
+
+        busy = np.zeros((len(self.names), days * 24 * 60 // self.tick), dtype=bool)
+        with self._lock:
+            self.horizon_start = horizon_start
+            for row, name in enumerate(self.names):
+                for start, end in busy_by_calendar.get(self.crews[name], []):
+                    self._mark(busy, row, start, end)
+            self.busy = busy
+        return self
+
+    def _mark(self, busy, row, start, end):
+        # Round outwards to whole cells so partial overlaps count as busy
+        first = max(self._index(start), 0)
+        last = min(-(-int((self._local(end) - self.horizon_start).total_seconds()) // (self.tick * 60)), busy.shape[1])
+        if first < last:
+            busy[row, first:last] = True
+
+    def _candidate_slots(self, not_before=None):
+        """Tick indices of every working-hours slot start in the horizon"""
+        days = self.busy.shape[1] * self.tick // (24 * 60)
+        day_starts = np.array([
+            day for day in range(days)
+            if (self.horizon_start + timedelta(days=day)).weekday() < 5
+        ], dtype=np.int64) * (24 * 60 // self.tick)
+        offsets = np.arange(
+            config.WORKING_HOURS['start'] * 60,
+            config.WORKING_HOURS['end'] * 60,
+            config.TIME_SLOT_INTERVAL
+        ) // self.tick
+        starts = (day_starts[:, None] + offsets[None, :]).ravel()
+        if not_before is not None:
+            starts = starts[starts >= self._index(not_before)]
+        return starts
+
+    def _free_matrix(self, starts):
+        """Boolean (crews x slots) matrix: True where the crew can take the slot"""
+        buffer = config.BUFFER_TIME // self.tick
+        duration = -(-config.BOOKING_DURATION // self.tick)
+        width = self.busy.shape[1]
+        # A booking needs the crew clear of other work, including the buffer either side
+        lo = np.clip(starts - buffer, 0, width)
+        hi = np.clip(starts + duration + buffer, 0, width)
+        cumulative = np.zeros((self.busy.shape[0], width + 1), dtype=np.int32)
+        np.cumsum(self.busy, axis=1, out=cumulative[:, 1:])
+        return (cumulative[:, hi] - cumulative[:, lo]) == 0
+
+    def free_crews(self, not_before=None):
+        """Return every slot in the horizon with the number of crews free for it"""
+        with self._lock:
+            starts = self._candidate_slots(not_before)
+            counts = self._free_matrix(starts).sum(axis=0)
+        slots = []
+        for start, count in zip(starts.tolist(), counts.tolist()):
+            slot_start = self.horizon_start + timedelta(minutes=start * self.tick)
+            slots.append({
+                'start': slot_start.isoformat(),
+                'end': (slot_start + timedelta(minutes=config.BOOKING_DURATION)).isoformat(),
+                'duration': config.BOOKING_DURATION,
+                'free_crews': count
+            })
+        return slots
+
+    def free_count(self, start_time):
+        """Number of crews free for a booking starting at start_time"""
+        with self._lock:
+            return int(self._free_matrix(np.array([self._checked_index(start_time)]))[:, 0].sum())
+
+    def _ranked_free(self, index, exclude=()):
+        """Rows free at a tick index, least booked time that day first"""
+        free = self._free_matrix(np.array([index]))[:, 0]
+        day_cells = 24 * 60 // self.tick
+        day_start = index - index % day_cells
+        load = self.busy[:, day_start:day_start + day_cells].sum(axis=1)
+        return [
+            row for row in np.argsort(load, kind='stable').tolist()
+            if free[row] and self.names[row] not in exclude
+        ]
+
+    def _checked_index(self, start_time):
+        index = self._index(start_time)
+        if self.horizon_start is None or not 0 <= index < self.busy.shape[1]:
+            raise ValueError("Start time is outside the loaded scheduling horizon")
+        return index
+
+    def free_crew_names(self, start_time):
+        """Names of the crews free for a booking at start_time, least loaded first"""
+        with self._lock:
+            return [self.names[row] for row in self._ranked_free(self._checked_index(start_time))]
+
+    def assign(self, start_time, crew=None, exclude=()):
+        """Mark a crew busy for a booking at start_time
+
+        With crew, that crew is booked if it is still free, usually the crew
+        a slot hold reserved. Otherwise the least-loaded free crew not in
+        exclude (crews reserved by other holds) is picked. Load is the
+        crew's booked time on the same day. Returns {'crew': name,
+        'calendar_id': id}, or None when no suitable crew is free.
+        """
+        with self._lock:
+            ranked = self._ranked_free(self._checked_index(start_time), exclude)
+            if crew is not None:
+                ranked = [row for row in ranked if self.names[row] == crew]
+            if not ranked:
+                return None
+            row = ranked[0]
+            start = self._local(start_time)
+            self._mark(self.busy, row, start, start + timedelta(minutes=config.BOOKING_DURATION))
+
+        name = self.names[row]
+        return {'crew': name, 'calendar_id': self.crews[name]}
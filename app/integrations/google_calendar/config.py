@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 CALENDAR_ID = os.getenv('GOOGLE_CALENDAR_ID', 'primary')
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 CREDENTIALS_FILE = 'credentials.json'  # This file should be in the root directory
+TOKEN_FILE = 'token.json'
+TOKEN_REFRESH_MARGIN = 300  # seconds before expiry to refresh the access token
 PORT = os.getenv('FLASK_RUN_PORT', '5001') 
 
 print(f"\n🔧 Google Calendar Configuration:")
@@ -28,6 +30,22 @@ TIME_SLOT_INTERVAL = 30  # minutes
 ADVANCE_BOOKING_DAYS = 14  # How many days in advance can book
 MIN_BOOKING_NOTICE = 24  # Minimum hours notice required
 
+# Collection crews, each with its own calendar: "crew-a:calendar-id,crew-b:calendar-id".
+# Defaults to a single crew working from CALENDAR_ID.
+CREW_CALENDARS = dict(
+    entry.strip().split(':', 1)
+    for entry in os.getenv('GOOGLE_CREW_CALENDARS', '').split(',')
+    if ':' in entry
+) or {'default': CALENDAR_ID}
+SCHEDULE_TICK = 5  # minutes per cell in the crew busy bitmaps
+
+# Where busy time comes from: 'freebusy' (busy intervals only) or 'events' (full event list)
+BUSY_SOURCE = os.getenv('GOOGLE_BUSY_SOURCE', 'freebusy')
+FREEBUSY_MAX_CALENDARS = 50  # calendars per freebusy query
+
+# Batch settings
+CALENDAR_BATCH_SIZE = 50  # Requests per batch HTTP call (Google allows up to 1000)
+
 def get_available_time_slots(start_date=None):
     """Get available time slots for the next two weeks"""
     if start_date is None:
@@ -0,0 +1,156 @@
+"""Google OAuth credential management with proactive background refresh"""
+
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.transport.requests import Request
+from googleapiclient.discovery_cache import get_static_doc
+from . import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are only coordinated within the process
+    fcntl = None
+
+
+@lru_cache(maxsize=None)
+def discovery_document(service_name='calendar', version='v3'):
+    """Load the discovery document bundled with googleapiclient once per process"""
+    document = get_static_doc(service_name, version)
+    if document is None:
+        raise ValueError(f"No bundled discovery document for {service_name} {version}")
+    return document
+
+
+class CredentialManager:
+    """Keep OAuth credentials fresh without refreshing on the request path
+
+    A daemon thread refreshes the access token TOKEN_REFRESH_MARGIN before it
+    expires. The credentials object is updated in place, so API clients built
+    from it pick up the new token. Refreshes are serialized across processes
+    with a lock file; a process that finds a newer token on disk adopts it
+    instead of refreshing again.
+    """
+
+    def __init__(self, token_file=config.TOKEN_FILE, scopes=config.SCOPES,
+                 refresh_margin=config.TOKEN_REFRESH_MARGIN):
+        self.token_file = token_file
+        self.lock_file = f"{token_file}.lock"
+        self.scopes = scopes
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.creds = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def load(self):
+        """Load stored credentials, refreshing or running the OAuth flow if needed"""
+        if self.creds:
+            # Already loaded: services sharing this manager share one credentials object
+            return self.creds
+        if os.path.exists(self.token_file):
+            print(f"Found existing {self.token_file}")
+            self.creds = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+
+        if not self.creds or not self.creds.valid:
+            print("Credentials not found or invalid, starting OAuth flow...")
+            if self.creds and self.creds.expired and self.creds.refresh_token:
+                print("Refreshing expired credentials...")
+                self.refresh()
+            else:
+                print(f"Starting new OAuth flow with credentials from {config.CREDENTIALS_FILE}")
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    config.CREDENTIALS_FILE,
+                    config.SCOPES
+                )
+                print("Running local server for OAuth...")
+                self.creds = flow.run_local_server(
+                    port=5001,
+                    access_type='offline',
+                    prompt='consent'
+                )
+                with self._file_lock():
+                    self._save()
+        return self.creds
+
+    def start(self):
+        """Start refreshing in the background"""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name='google-token-refresh', daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
+    def refresh(self):
+        """Refresh the access token now, unless another process already has"""
+        with self._lock, self._file_lock():
+            if self._adopt_newer_token():
+                print("✅ Adopted Google token refreshed by another process")
+                return
+            self.creds.refresh(Request())
+            self._save()
+            print(f"✅ Google token refreshed, valid until {self.creds.expiry}")
+
+    def _seconds_until_refresh(self):
+        if not self.creds or not self.creds.expiry:
+            return None
+        due = self.creds.expiry - self.refresh_margin - datetime.utcnow()
+        return max(due.total_seconds(), 0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self._seconds_until_refresh()
+            if wait is None:
+                return
+            if self._stop.wait(wait):
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Background Google token refresh failed: {str(e)}")
+                self._stop.wait(30)
+
+    def _adopt_newer_token(self):
+        """Copy a token from disk if it expires later than the one in memory"""
+        if not os.path.exists(self.token_file):
+            return False
+        stored = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+        if not stored.token or not stored.expiry:
+            return False
+        if self.creds.expiry and stored.expiry <= self.creds.expiry:
+            return False
+        if stored.expiry - self.refresh_margin <= datetime.utcnow():
+            return False
+        # Update in place so clients already holding these credentials see the token
+        self.creds.token = stored.token
+        self.creds.expiry = stored.expiry
+        return True
+
+    def _save(self):
+        """Write the token atomically so readers never see a partial file"""
+        temp_file = f"{self.token_file}.tmp"
+        with open(temp_file, 'w') as token:
+            token.write(self.creds.to_json())
+        os.replace(temp_file, self.token_file)
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, 'w') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
@@ -1,20 +1,30 @@
 """Google Calendar Service"""
 
-import os.path
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
 from datetime import datetime, timedelta
 import pytz
 from . import config
+from .capacity import BusyIntervalCache
+from .credentials import CredentialManager, discovery_document
 
 class GoogleCalendarService:
-    def __init__(self):
-        """Initialize the Google Calendar service"""
+    def __init__(self, calendar_id=None, crew_calendars=None, credentials=None):
+        """Initialize the Google Calendar service
+
+        calendar_id and crew_calendars default to the configured
+        GOOGLE_CALENDAR_ID and GOOGLE_CREW_CALENDARS. Services for several
+        calendars on the same Google account can share one CredentialManager.
+        """
+        self.calendar_id = calendar_id or config.CALENDAR_ID
+        self.crew_calendars = dict(crew_calendars or (
+            config.CREW_CALENDARS if calendar_id is None else {'default': calendar_id}
+        ))
         self.creds = None
+        self.credentials = credentials or CredentialManager()
         self.service = None
         self.timezone = pytz.timezone('America/Los_Angeles')
+        # Busy time per day for the crew schedulers; booking writes below drop it
+        self.busy_cache = BusyIntervalCache(self)
         print("🔄 Initializing Google Calendar service...")
         self.initialize_service()
 
@@ -23,34 +33,12 @@ class GoogleCalendarService:
         try:
             print("\n🔄 Initializing Google Calendar service...")
             
-            if os.path.exists('token.json'):
-                print("Found existing token.json")
-                self.creds = Credentials.from_authorized_user_file('token.json', config.SCOPES)
-
-            if not self.creds or not self.creds.valid:
-                print("Credentials not found or invalid, starting OAuth flow...")
-                if self.creds and self.creds.expired and self.creds.refresh_token:
-                    print("Refreshing expired credentials...")
-                    self.creds.refresh(Request())
-                else:
-                    print(f"Starting new OAuth flow with credentials from {config.CREDENTIALS_FILE}")
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        config.CREDENTIALS_FILE, 
-                        config.SCOPES
-                    )
-                    print("Running local server for OAuth...")
-                    self.creds = flow.run_local_server(
-                        port=5001,
-                        access_type='offline',
-                        prompt='consent'
-                    )
-                
-                print("Saving new token...")
-                with open('token.json', 'w') as token:
-                    token.write(self.creds.to_json())
+            self.creds = self.credentials.load()
+            # Refresh ahead of expiry so requests never wait on a token refresh
+            self.credentials.start()
 
             print("Building Google Calendar service...")
-            self.service = build('calendar', 'v3', credentials=self.creds)
+            self.service = build_from_document(discovery_document(), credentials=self.creds)
             print("✅ Google Calendar service initialized successfully")
             
         except Exception as e:
@@ -65,16 +53,15 @@ class GoogleCalendarService:
             
             end_date = start_date + timedelta(days=days)
             
-            # 获取现有预约
-            events_result = self.service.events().list(
-                calendarId=config.CALENDAR_ID,
-                timeMin=start_date.isoformat() + 'Z',
-                timeMax=end_date.isoformat() + 'Z',
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
+            # 获取忙碌时间段（只取开始和结束时间）
+            busy = self.get_busy_intervals([self.calendar_id], start_date, end_date)[self.calendar_id]
+            events = [
+                {
+                    'start': {'dateTime': self.to_local(busy_start).isoformat()},
+                    'end': {'dateTime': self.to_local(busy_end).isoformat()}
+                }
+                for busy_start, busy_end in busy
+            ]
             
             # 生成可用时间槽
             available_slots = self._generate_available_slots(start_date, end_date, events)
@@ -90,39 +77,156 @@ class GoogleCalendarService:
                 'message': str(e)
             }
 
-    def create_booking(self, start_time, customer_info):
+    def get_busy_intervals(self, calendar_ids, start_time, end_time):
+        """Get busy (start, end) datetimes per calendar between two times"""
+        if config.BUSY_SOURCE == 'events':
+            return self._get_busy_intervals_from_events(calendar_ids, start_time, end_time)
+        return self._get_busy_intervals_from_freebusy(calendar_ids, start_time, end_time)
+
+    def _get_busy_intervals_from_freebusy(self, calendar_ids, start_time, end_time):
+        """Ask the freebusy API for busy intervals only, many calendars per request"""
+        busy = {}
+        for offset in range(0, len(calendar_ids), config.FREEBUSY_MAX_CALENDARS):
+            chunk = calendar_ids[offset:offset + config.FREEBUSY_MAX_CALENDARS]
+            result = self.service.freebusy().query(body={
+                'timeMin': self._to_rfc3339(start_time),
+                'timeMax': self._to_rfc3339(end_time),
+                'timeZone': str(self.timezone),
+                'items': [{'id': calendar_id} for calendar_id in chunk]
+            }).execute()
+
+            for calendar_id in chunk:
+                calendar = result.get('calendars', {}).get(calendar_id, {})
+                if calendar.get('errors'):
+                    raise ValueError(f"Free/busy lookup failed for {calendar_id}: {calendar['errors']}")
+                busy[calendar_id] = [
+                    (
+                        datetime.fromisoformat(period['start'].replace('Z', '+00:00')),
+                        datetime.fromisoformat(period['end'].replace('Z', '+00:00'))
+                    )
+                    for period in calendar.get('busy', [])
+                ]
+        return busy
+
+    def _get_busy_intervals_from_events(self, calendar_ids, start_time, end_time):
+        """Derive busy intervals from the full event list of each calendar"""
+        busy = {}
+        for calendar_id in calendar_ids:
+            events_result = self.service.events().list(
+                calendarId=calendar_id,
+                timeMin=self._to_rfc3339(start_time),
+                timeMax=self._to_rfc3339(end_time),
+                singleEvents=True,
+                orderBy='startTime',
+                fields='items(start,end,transparency)'
+            ).execute()
+            busy[calendar_id] = [
+                (
+                    datetime.fromisoformat(event['start']['dateTime'].replace('Z', '+00:00')),
+                    datetime.fromisoformat(event['end']['dateTime'].replace('Z', '+00:00'))
+                )
+                for event in events_result.get('items', [])
+                if 'dateTime' in event.get('start', {}) and event.get('transparency') != 'transparent'
+            ]
+        return busy
+
+    def to_local(self, value):
+        """Convert to naive calendar-local time; naive values are returned unchanged"""
+        if value.tzinfo is not None:
+            value = value.astimezone(self.timezone).replace(tzinfo=None)
+        return value
+
+    def _to_rfc3339(self, value):
+        """Format a datetime for the API, treating naive values as calendar local time"""
+        if value.tzinfo is None:
+            value = self.timezone.localize(value)
+        return value.isoformat()
+
+    def _build_event(self, start_time, customer_info):
+        """Build the event body for a collection booking"""
+        return {
+            'summary': f'Storage Collection - {customer_info["name"]}',
+            'description': f'Collection service booking\nContact: {customer_info["contact"]}\nAddress: {customer_info["address"]}',
+            'start': {
+                'dateTime': start_time.isoformat(),
+                'timeZone': 'America/Los_Angeles',
+            },
+            'end': {
+                'dateTime': (start_time + timedelta(minutes=config.BOOKING_DURATION)).isoformat(),
+                'timeZone': 'America/Los_Angeles',
+            },
+        }
+
+    def _booking_result(self, event):
+        return {
+            'status': 'success',
+            'event_id': event['id'],
+            'start_time': event['start']['dateTime'],
+            'end_time': event['end']['dateTime']
+        }
+
+    def create_booking(self, start_time, customer_info, calendar_id=None):
         """Create a new booking"""
         try:
-            event = {
-                'summary': f'Storage Collection - {customer_info["name"]}',
-                'description': f'Collection service booking\nContact: {customer_info["contact"]}\nAddress: {customer_info["address"]}',
-                'start': {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': 'America/Los_Angeles',
-                },
-                'end': {
-                    'dateTime': (start_time + timedelta(minutes=config.BOOKING_DURATION)).isoformat(),
-                    'timeZone': 'America/Los_Angeles',
-                },
-            }
-
             event = self.service.events().insert(
-                calendarId=config.CALENDAR_ID,
-                body=event
+                calendarId=calendar_id or self.calendar_id,
+                body=self._build_event(start_time, customer_info)
             ).execute()
+            self.busy_cache.invalidate(self.to_local(start_time).date())
             
-            return {
-                'status': 'success',
-                'event_id': event['id'],
-                'start_time': event['start']['dateTime'],
-                'end_time': event['end']['dateTime']
-            }
+            return self._booking_result(event)
         except Exception as e:
             return {
                 'status': 'error',
                 'message': str(e)
             }
 
+    def create_bookings_batch(self, bookings):
+        """Create several bookings using batched HTTP requests
+
+        bookings is a list of (start_time, customer_info, calendar_id) tuples;
+        a calendar_id of None books the default calendar. Returns one result
+        dict per booking, in the same order, shaped like create_booking.
+        """
+        results = [None] * len(bookings)
+
+        def handle(request_id, response, exception):
+            index = int(request_id)
+            if exception is not None:
+                results[index] = {'status': 'error', 'message': str(exception)}
+            else:
+                results[index] = self._booking_result(response)
+
+        for offset in range(0, len(bookings), config.CALENDAR_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=handle)
+            for index, (start_time, customer_info, calendar_id) in enumerate(
+                bookings[offset:offset + config.CALENDAR_BATCH_SIZE], start=offset
+            ):
+                batch.add(
+                    self.service.events().insert(
+                        calendarId=calendar_id or self.calendar_id,
+                        body=self._build_event(start_time, customer_info)
+                    ),
+                    request_id=str(index)
+                )
+            try:
+                batch.execute()
+            except Exception as e:
+                for index in range(offset, min(offset + config.CALENDAR_BATCH_SIZE, len(bookings))):
+                    if results[index] is None:
+                        results[index] = {'status': 'error', 'message': str(e)}
+
+        self.busy_cache.invalidate()
+        return results
+
+    def delete_event(self, event_id, calendar_id=None):
+        """Delete a calendar event, from a crew calendar if calendar_id is given"""
+        self.service.events().delete(
+            calendarId=calendar_id or self.calendar_id,
+            eventId=event_id
+        ).execute()
+        self.busy_cache.invalidate()
+
     def _generate_available_slots(self, start_date, end_date, existing_events):
         """Generate available time slots considering existing events"""
         available_slots = []
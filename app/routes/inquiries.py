@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
-from app.integrations.airtable.service import AirtableService
-from app.integrations.airtable.models import INQUIRY_TYPE_OPTIONS, INQUIRY_STATUS_OPTIONS
+from app.integrations.airtable.models import (
+    INQUIRY_TYPE_OPTIONS, INQUIRY_STATUS_OPTIONS, INQUIRY_TYPES, INQUIRY_STATUSES,
+    INQUIRY_FIELD_NAMES, INQUIRY_HISTORY_FIELD_NAMES, parse_field_list
+)
+from app.core.tenants import airtable_service as airtable, response_cache
+from app.core.http_cache import conditional_json
 
 inquiries = Blueprint('inquiries', __name__)
-airtable = AirtableService()
 
 @inquiries.route('/api/inquiries', methods=['POST'])
 def create_inquiry():
@@ -16,7 +19,7 @@ def create_inquiry():
         if not all(field in data for field in required):
             return jsonify({'error': 'Missing required fields'}), 400
             
-        if data['type'] not in INQUIRY_TYPE_OPTIONS:
+        if data['type'] not in INQUIRY_TYPES:
             return jsonify({'error': f'Invalid inquiry type. Must be one of: {INQUIRY_TYPE_OPTIONS}'}), 400
             
         # Find or create customer
@@ -33,7 +36,6 @@ def create_inquiry():
             inquiry_type=data['type'],
             subject=data['subject'],
             message=data['message'],
-            channel=data.get('channel', 'Chat'),
             priority=data.get('priority', 'Medium')
         )
         
@@ -51,7 +53,7 @@ def update_inquiry_status(inquiry_id):
         if 'status' not in data:
             return jsonify({'error': 'Status is required'}), 400
             
-        if data['status'] not in INQUIRY_STATUS_OPTIONS:
+        if data['status'] not in INQUIRY_STATUSES:
             return jsonify({'error': f'Invalid status. Must be one of: {INQUIRY_STATUS_OPTIONS}'}), 400
             
         inquiry = airtable.update_inquiry_status(
@@ -87,34 +89,55 @@ def add_inquiry_response(inquiry_id):
 
 @inquiries.route('/api/customers/<customer_id>/inquiries')
 def get_customer_inquiries(customer_id):
-    """Get all inquiries for a customer"""
+    """Get all inquiries for a customer; ?fields=Subject,Status limits the fields returned"""
+    try:
+        fields = parse_field_list(request.args.get('fields'), INQUIRY_FIELD_NAMES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         status = request.args.get('status')
-        inquiries = airtable.get_customer_inquiries(customer_id, status)
-        return jsonify(inquiries)
+        return conditional_json(
+            response_cache, 'customer-inquiries', [customer_id, status, ','.join(fields or ())],
+            [f"customer:{customer_id}"],
+            lambda: airtable.get_customer_inquiries(customer_id, status, fields)
+        )
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @inquiries.route('/api/inquiries/<inquiry_id>/history')
 def get_inquiry_history(inquiry_id):
-    """Get history for an inquiry"""
+    """Get history for an inquiry; ?fields= limits the fields returned"""
+    try:
+        fields = parse_field_list(request.args.get('fields'), INQUIRY_HISTORY_FIELD_NAMES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
-        history = airtable.get_inquiry_history(inquiry_id)
-        return jsonify(history)
+        return conditional_json(
+            response_cache, 'inquiry-history', [inquiry_id, ','.join(fields or ())],
+            [f"inquiry:{inquiry_id}"],
+            lambda: airtable.get_inquiry_history(inquiry_id, fields)
+        )
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @inquiries.route('/api/inquiries/search')
 def search_inquiries():
-    """Search inquiries"""
+    """Search inquiries; ?fields= limits the fields returned"""
+    try:
+        fields = parse_field_list(request.args.get('fields'), INQUIRY_FIELD_NAMES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         query = request.args.get('q')
         if not query:
             return jsonify({'error': 'Search query is required'}), 400
             
-        results = airtable.search_inquiries(query)
+        results = airtable.search_inquiries(query, fields)
         return jsonify(results)
         
     except Exception as e:
@@ -0,0 +1 @@
+"""Microbenchmarks for pure hot paths, with saved baselines"""
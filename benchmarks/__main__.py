@@ -0,0 +1,120 @@
+"""Run the microbenchmarks and compare them with the saved baseline
+
+    python -m benchmarks run [--save] [--filter TEXT]
+    python -m benchmarks compare [--threshold 0.25] [--filter TEXT]
+
+compare exits with status 1 when any case is slower than the baseline by
+more than the threshold.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+from .cases import CASES
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+ROUND_TIME = 0.05  # seconds per timed round
+ROUNDS = 7
+REGRESSION_THRESHOLD = 0.25  # fraction slower than baseline that counts as a regression
+
+
+def measure(fn):
+    """Best per-call time over ROUNDS rounds of a calibrated number of calls"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= ROUND_TIME:
+            break
+        number *= 2
+
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return {'seconds': best, 'calls': number}
+
+
+def run(name_filter=None):
+    results = {}
+    # The code under test logs every call; keep that out of the terminal
+    with open(os.devnull, 'w') as devnull:
+        for name, setup in CASES.items():
+            if name_filter and name_filter not in name:
+                continue
+            with contextlib.redirect_stdout(devnull):
+                results[name] = measure(setup())
+            print(f"{name:45} {results[name]['seconds'] * 1e6:12.2f} µs")
+    return results
+
+
+def load_baseline():
+    with open(BASELINE_FILE) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(results):
+    baseline = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+    with open(BASELINE_FILE, 'w') as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+    print(f"💾 Baseline saved to {BASELINE_FILE}")
+
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline per case; return the names of regressed cases"""
+    regressions = []
+    print(f"\n{'case':45} {'baseline µs':>12} {'current µs':>12} {'change':>8}")
+    for name, result in results.items():
+        saved = baseline['results'].get(name)
+        if not saved:
+            print(f"{name:45} {'-':>12} {result['seconds'] * 1e6:12.2f} {'new':>8}")
+            continue
+        change = result['seconds'] / saved['seconds'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = ' ❌'
+        print(f"{name:45} {saved['seconds'] * 1e6:12.2f} {result['seconds'] * 1e6:12.2f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('command', choices=['run', 'compare'])
+    parser.add_argument('--save', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--filter', help='only run cases whose name contains this text')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run(args.filter)
+    if args.command == 'run':
+        if args.save:
+            save_baseline(results)
+        return 0
+
+    baseline = load_baseline()
+    if baseline.get('python') != platform.python_version():
+        print(f"⚠️ Baseline was recorded on Python {baseline.get('python')}; "
+              f"running {platform.python_version()}")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
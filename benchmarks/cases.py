@@ -0,0 +1,102 @@
+"""Benchmark cases: each setup returns a zero-argument callable to time"""
+
+import importlib
+import os
+import sys
+import types
+from datetime import timedelta
+from . import generators
+
+
+def _import_core_module(name):
+    """Import an app.core module without running app/core/__init__
+
+    The package imports the routes, which start every tenant's Airtable and
+    calendar services; the benchmarks only need the module itself.
+    """
+    if 'app.core' not in sys.modules:
+        import app
+        core = types.ModuleType('app.core')
+        core.__path__ = [os.path.join(os.path.dirname(app.__file__), 'core')]
+        sys.modules['app.core'] = core
+    return importlib.import_module(name)
+
+
+class _FakeTable:
+    """In-memory stand-in for an Airtable table, so no request leaves the process"""
+
+    def insert(self, fields):
+        return {'id': 'recBenchmark', 'fields': fields}
+
+    def update(self, record_id, fields):
+        return {'id': record_id, 'fields': fields}
+
+
+def _airtable_service():
+    from app.integrations.airtable.service import AirtableService
+    from app.integrations.airtable.customer_index import CustomerIndex
+    service = AirtableService.__new__(AirtableService)
+    service.bookings = _FakeTable()
+    service.customers = _FakeTable()
+    service.customer_index = CustomerIndex()
+    service.booking_listeners = []
+    return service
+
+
+def available_slots(events, days):
+    def setup():
+        from app.integrations.google_calendar.service import GoogleCalendarService
+        calendar = GoogleCalendarService.__new__(GoogleCalendarService)
+        existing = generators.calendar_events(events, days)
+        end = generators.START_DATE + timedelta(days=days)
+        return lambda: calendar._generate_available_slots(generators.START_DATE, end, existing)
+    return setup
+
+
+def create_booking(extra_fields):
+    def setup():
+        service = _airtable_service()
+        payload = generators.booking_payload(extra_fields)
+        # create_booking fills in Status on the caller's dict, so pass a copy
+        return lambda: service.create_booking(dict(payload))
+    return setup
+
+
+def find_or_create_customer(extra_fields):
+    def setup():
+        service = _airtable_service()
+        info = generators.customer_info(extra_fields)
+        existing = {'id': 'recExisting', 'fields': {'Name': info['Name'], 'Address': info['Address']}}
+        service.find_customer = lambda contact: existing
+        return lambda: service.find_or_create_customer(info)
+    return setup
+
+
+def prompt_assembly(context_length):
+    def setup():
+        os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+        os.environ.setdefault('OPENAI_PROJECT_ID', 'benchmark')
+        StorageAssistant = _import_core_module('app.core.assistant').StorageAssistant
+        assistant = StorageAssistant()
+        context = generators.chat_context(context_length)
+
+        def run():
+            assistant.context = list(context)
+            return assistant._build_request("Do you have a 10x10 unit with climate control?")
+        return run
+    return setup
+
+
+CASES = {
+    'available_slots[events=0,days=14]': available_slots(0, 14),
+    'available_slots[events=50,days=14]': available_slots(50, 14),
+    'available_slots[events=500,days=14]': available_slots(500, 14),
+    'available_slots[events=200,days=60]': available_slots(200, 60),
+    'create_booking[extra=0]': create_booking(0),
+    'create_booking[extra=50]': create_booking(50),
+    'find_or_create_customer[extra=0]': find_or_create_customer(0),
+    'find_or_create_customer[extra=50]': find_or_create_customer(50),
+    'prompt_assembly[context=2]': prompt_assembly(2),
+    'prompt_assembly[context=10]': prompt_assembly(10),
+    'prompt_assembly[context=100]': prompt_assembly(100),
+}
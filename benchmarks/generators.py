@@ -0,0 +1,78 @@
+"""Deterministic synthetic data for the benchmarks"""
+
+import random
+from datetime import datetime, timedelta
+
+SEED = 1234
+
+# A Monday far enough ahead that no benchmark touches "today" handling
+START_DATE = datetime(2031, 3, 3)
+
+FIRST_NAMES = ['Ana', 'Ben', 'Chen', 'Dana', 'Eli', 'Fatima', 'Gus', 'Hana']
+LAST_NAMES = ['Lopez', 'Nguyen', 'Smith', 'Kim', 'Patel', 'Garcia', 'Wong']
+STREETS = ['Main St', 'Oak Ave', 'Pine Rd', 'Mission Blvd', 'Elm Ct']
+
+
+def calendar_events(count, days, seed=SEED):
+    """Busy events scattered over working hours, in the shape the calendar API returns"""
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        start = START_DATE + timedelta(
+            days=rng.randrange(days),
+            hours=rng.randrange(9, 17),
+            minutes=rng.choice([0, 15, 30, 45])
+        )
+        end = start + timedelta(minutes=rng.choice([30, 60, 90, 120]))
+        events.append({
+            'start': {'dateTime': start.isoformat()},
+            'end': {'dateTime': end.isoformat()}
+        })
+    return events
+
+
+def booking_payload(extra_fields=0, seed=SEED):
+    """Booking data as the booking route builds it, plus fields Airtable would reject"""
+    rng = random.Random(seed)
+    start = START_DATE + timedelta(days=rng.randrange(14), hours=rng.randrange(9, 17))
+    payload = {
+        'Customer': [f"rec{rng.randrange(10**9):09d}"],
+        'Start Date': start.strftime("%Y-%m-%d"),
+        'Status': 'Scheduled',
+        'Calendar Event ID': f"evt{rng.randrange(10**9):09d}",
+        'Notes': (
+            f"Time: {start.strftime('%I:%M %p')}\n"
+            f"Address: {rng.randrange(1, 999)} {rng.choice(STREETS)}\n"
+            f"Contact: {rng.randrange(10**9, 10**10)}"
+        )
+    }
+    for index in range(extra_fields):
+        payload[f"Unknown Field {index}"] = rng.random()
+    return payload
+
+
+def customer_info(extra_fields=0, seed=SEED):
+    """Customer info with mixed-case keys, as the routes pass it"""
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    info = {
+        'Name': name,
+        'Email': f"{name.replace(' ', '.').lower()}@example.com",
+        'Address': f"{rng.randrange(1, 999)} {rng.choice(STREETS)}"
+    }
+    for index in range(extra_fields):
+        info[f"Extra{index}"] = rng.random()
+    return info
+
+
+def chat_context(length, seed=SEED):
+    """Alternating user and assistant turns"""
+    rng = random.Random(seed)
+    words = ['storage', 'unit', 'price', 'climate', 'access', 'move', 'boxes', 'month', 'size', 'pickup']
+    return [
+        {
+            'role': 'user' if index % 2 == 0 else 'assistant',
+            'content': ' '.join(rng.choice(words) for _ in range(rng.randrange(8, 60)))
+        }
+        for index in range(length)
+    ]
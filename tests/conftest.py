@@ -0,0 +1,18 @@
+import importlib
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def import_core_module(name):
+    """Import an app.core module without running app/core/__init__, which starts every tenant"""
+    if 'app.core' not in sys.modules:
+        import app
+        core = types.ModuleType('app.core')
+        core.__path__ = [os.path.join(os.path.dirname(app.__file__), 'core')]
+        sys.modules['app.core'] = core
+    return importlib.import_module(name)
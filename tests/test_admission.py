@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+from conftest import import_core_module
+
+admission = import_core_module('app.core.admission')
+
+CLASSES = {
+    'booking': {'weight': 8, 'queue': 4, 'wait': 2, 'rate': 1, 'burst': 2},
+    'chat': {'weight': 1, 'queue': 1, 'wait': 2, 'rate': 1, 'burst': 2},
+}
+
+
+def test_client_over_its_budget_is_rejected_with_retry_after():
+    controller = admission.AdmissionController(classes=CLASSES)
+    client = admission.client_key('203.0.113.7')
+    for _ in range(2):
+        controller.check_rate(client, 'chat')
+
+    with pytest.raises(admission.Rejected) as rejected:
+        controller.check_rate(client, 'chat')
+    assert 0 < rejected.value.retry_after <= 1
+    # Budgets are per client and per route class
+    controller.check_rate(admission.client_key('203.0.113.8'), 'chat')
+    controller.check_rate(client, 'booking')
+
+
+def test_full_queue_is_rejected():
+    controller = admission.AdmissionController(max_in_flight=1, classes=CLASSES)
+    controller.acquire('chat')
+    waiter = threading.Thread(target=controller.acquire, args=('chat',))
+    waiter.start()
+    while controller.queue_lengths()['chat'] == 0:
+        time.sleep(0.001)
+
+    with pytest.raises(admission.Rejected):
+        controller.acquire('chat')
+    controller.release()
+    waiter.join()
+
+
+def test_freed_slots_are_shared_by_weight():
+    classes = {
+        'booking': {**CLASSES['booking'], 'queue': 8},
+        'chat': {**CLASSES['chat'], 'queue': 2},
+    }
+    controller = admission.AdmissionController(max_in_flight=1, classes=classes)
+    controller.acquire('booking')
+    admitted = []
+
+    def wait_for_slot(route_class):
+        controller.acquire(route_class)
+        admitted.append(route_class)
+
+    threads = [threading.Thread(target=wait_for_slot, args=('chat',)) for _ in range(2)]
+    threads += [threading.Thread(target=wait_for_slot, args=('booking',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while sum(controller.queue_lengths().values()) < 10:
+        time.sleep(0.001)
+
+    for count in range(1, 11):
+        controller.release()
+        while len(admitted) < count:
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+
+    # Bookings weigh 8 against chat's 1: one chat per eight bookings
+    assert admitted[:9].count('chat') == 1
+    assert admitted[9] == 'chat'
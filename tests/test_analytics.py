@@ -0,0 +1,51 @@
+import threading
+import time
+from conftest import import_core_module
+
+analytics = import_core_module('app.core.analytics')
+
+
+class SlowBookings:
+    """Bookings table whose scan takes a while and can be written to meanwhile"""
+
+    def __init__(self, records, during_scan=None):
+        self.records = records
+        self.during_scan = during_scan
+        self.booking_listeners = []
+        self.scans = 0
+
+    def iter_records(self, table_name, fields=None):
+        self.scans += 1
+        time.sleep(0.05)
+        yield from self.records
+        if self.during_scan:
+            self.during_scan()
+
+
+def booking(record_id, status='Scheduled'):
+    return {'id': record_id, 'fields': {'Start Date': '2026-03-02', 'Notes': 'Time: 10:00 AM', 'Status': status}}
+
+
+def test_concurrent_first_requests_share_one_scan():
+    airtable = SlowBookings([booking('recA')])
+    stats = analytics.BookingAnalytics(airtable)
+    threads = [threading.Thread(target=stats.columns) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert airtable.scans == 1
+
+
+def test_writes_during_a_rescan_are_kept():
+    airtable = SlowBookings([booking('recA')])
+    stats = analytics.BookingAnalytics(airtable)
+    stats.load()
+
+    def cancel_during_scan():
+        stats.on_booking_changed({'id': 'recA', 'fields': {'Status': 'Cancelled'}})
+
+    airtable.during_scan = cancel_during_scan
+    stats.load()
+    report = stats.utilization('2026-03-02', '2026-03-02')
+    assert report['cancel_rate'] == 1.0
@@ -0,0 +1,122 @@
+import json
+import sys
+import types
+
+import anyio
+import pytest
+from conftest import import_core_module
+
+pytest.importorskip('a2wsgi')
+admission = import_core_module('app.core.admission')
+import_core_module('app.core.tenants')
+from flask import Flask
+from app import asgi
+
+
+class FakeAssistant:
+    async def get_response_async(self, message):
+        return f"echo: {message}"
+
+
+class FakeSessions:
+    def __init__(self):
+        self.recorded = []
+
+    def record(self, session_id, message, response):
+        self.recorded.append((session_id, message, response))
+
+
+class FakeTenants:
+    """One 'north' tenant whose references are counted"""
+
+    def __init__(self):
+        self.north = types.SimpleNamespace(chat_sessions=FakeSessions())
+        self.users = 0
+
+    def resolve(self, tenant_id=None, host=None):
+        return tenant_id if tenant_id == 'north' else None
+
+    def acquire(self, tenant_id):
+        self.users += 1
+        return self.north
+
+    def release(self, services):
+        self.users -= 1
+
+
+@pytest.fixture
+def app(monkeypatch):
+    routes = types.ModuleType('app.core.routes')
+    routes.tenants = FakeTenants()
+    routes.storage_assistant = FakeAssistant()
+    routes.admission = admission.AdmissionController()
+    monkeypatch.setitem(sys.modules, 'app.core.routes', routes)
+
+    flask_app = Flask(__name__)
+    flask_app.add_url_rule('/ping', 'ping', lambda: 'pong')
+    monkeypatch.setattr(asgi, 'create_app', lambda: flask_app)
+    application = asgi.create_asgi_app()
+    application.tenants = routes.tenants
+    return application
+
+
+def call(app, method, path, body=b'', headers=()):
+    """Send one HTTP request through the ASGI app; returns (status, headers, body)"""
+    sent = []
+    received = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+    async def receive():
+        return received.pop(0) if received else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': b'',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+        'client': ('203.0.113.7', 5000), 'server': ('testserver', 80),
+    }
+    anyio.run(app, scope, receive, send)
+    start = next(message for message in sent if message['type'] == 'http.response.start')
+    response_headers = {name.decode(): value.decode() for name, value in start['headers']}
+    return start['status'], response_headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def chat(app, message='hi', headers=()):
+    return call(app, 'POST', '/chat', json.dumps({'message': message}).encode(),
+                [('content-type', 'application/json'), *headers])
+
+
+def test_chat_replies_and_records_the_session_for_its_tenant(app):
+    status, headers, body = chat(app, headers=[('X-Tenant-ID', 'north')])
+
+    reply = json.loads(body)
+    assert status == 200
+    assert reply['response'] == 'echo: hi'
+    assert f"chat_session={reply['session_id']}" in headers['set-cookie']
+    assert app.tenants.north.chat_sessions.recorded == [(reply['session_id'], 'hi', 'echo: hi')]
+    assert app.tenants.users == 0
+
+
+def test_chat_keeps_a_valid_session_cookie(app):
+    session_id = 'a1b2c3d4e5f6'
+    _, _, body = chat(app, headers=[('cookie', f"chat_session={session_id}")])
+
+    assert json.loads(body)['session_id'] == session_id
+
+
+def test_chat_over_the_client_budget_gets_429(app):
+    burst = admission.ROUTE_CLASSES['chat']['burst']
+    statuses = [chat(app)[0] for _ in range(burst)]
+    status, headers, _ = chat(app)
+
+    assert statuses == [200] * burst
+    assert status == 429
+    assert float(headers['retry-after']) > 0
+
+
+def test_other_routes_are_served_by_flask(app):
+    status, _, body = call(app, 'GET', '/ping')
+
+    assert (status, body) == (200, b'pong')
@@ -0,0 +1,153 @@
+import io
+import json
+
+from conftest import import_core_module
+from test_capacity import FakeCalendar, MONDAY
+from app.integrations.airtable.customer_index import CustomerIndex, contact_key
+from app.integrations.airtable.service import AirtableService
+
+booking_import = import_core_module('app.core.booking_import')
+
+TEN = MONDAY.replace(hour=10).isoformat()
+
+
+class ImportCalendar(FakeCalendar):
+    """FakeCalendar that records batched inserts and deletes"""
+
+    def __init__(self, busy=None):
+        super().__init__(busy or {})
+        self.inserted = []
+        self.deleted = []
+
+    def create_bookings_batch(self, bookings):
+        results = []
+        for start_time, customer_info, calendar_id in bookings:
+            self.inserted.append((calendar_id, start_time))
+            results.append({'status': 'success', 'event_id': f"evt-{len(self.inserted)}"})
+        return results
+
+    def delete_event(self, event_id, calendar_id=None):
+        self.deleted.append((calendar_id, event_id))
+
+
+class FakeAirtable:
+    def __init__(self, fail_bookings=False):
+        self.fail_bookings = fail_bookings
+        self.customer_lookups = 0
+
+    def find_or_create_customers(self, customer_infos):
+        self.customer_lookups += 1
+        return {
+            contact_key(info.get('Email') or info.get('Phone')): f"cus-{self.customer_lookups}-{index}"
+            for index, info in enumerate(customer_infos)
+        }
+
+    def create_bookings_batch(self, bookings):
+        if self.fail_bookings:
+            raise RuntimeError('Airtable is down')
+        return [{'id': f"rec-{index}"} for index, _ in enumerate(bookings)]
+
+
+def run_import(lines, calendar, airtable=None, fmt='ndjson'):
+    importer = booking_import.BookingImporter(airtable or FakeAirtable(), calendar)
+    stream = io.BytesIO(('\n'.join(lines) + '\n').encode())
+    return list(importer.run(booking_import.iter_rows(stream, fmt)))
+
+
+def row(start, contact='a@example.com'):
+    return json.dumps({'start_time': start, 'name': 'Ann', 'contact': contact})
+
+
+def test_rows_at_one_time_go_to_different_crews_until_none_is_free():
+    calendar = ImportCalendar()
+    results = run_import([row(TEN), row(TEN), row(TEN)], calendar)
+
+    assert [result['status'] for result in results] == ['error', 'success', 'success']
+    assert results[0] == {'row': 3, 'status': 'error', 'error': 'No collection crews are available for this time slot'}
+    assert sorted(calendar_id for calendar_id, _ in calendar.inserted) == ['cal-a', 'cal-b']
+    # One calendar load for the whole chunk
+    assert calendar.requests == 1
+
+
+def test_busy_crew_is_skipped():
+    start = MONDAY.replace(hour=9)
+    calendar = ImportCalendar({'cal-a': [(start, start.replace(hour=12))]})
+    run_import([row(TEN)], calendar)
+
+    assert [calendar_id for calendar_id, _ in calendar.inserted] == ['cal-b']
+
+
+def test_failed_airtable_write_deletes_events_from_crew_calendars():
+    calendar = ImportCalendar()
+    results = run_import([row(TEN)], calendar, FakeAirtable(fail_bookings=True))
+
+    assert results[0]['status'] == 'error'
+    assert 'Airtable is down' in results[0]['error']
+    assert calendar.deleted == [(calendar.inserted[0][0], 'evt-1')]
+
+
+def test_bad_rows_are_reported_without_stopping_the_import():
+    calendar = ImportCalendar()
+    results = run_import(['{not json', json.dumps({'name': 'Ann'}), row(TEN)], calendar)
+
+    errors = {result['row']: result['error'] for result in results if result['status'] == 'error'}
+    assert errors[1].startswith('Invalid JSON')
+    assert errors[2] == 'Missing required fields: start_time, contact'
+    assert [result['row'] for result in results if result['status'] == 'success'] == [3]
+
+
+def test_csv_rows_are_parsed():
+    calendar = ImportCalendar()
+    results = run_import(['start_time,name,contact', f"{TEN},Ann,555-0100"], calendar, fmt='csv')
+
+    assert results[0]['status'] == 'success'
+
+
+def test_customers_are_resolved_once_per_chunk():
+    airtable = FakeAirtable()
+    results = run_import([row(TEN), row(TEN, 'B@example.com'), row(TEN, 'a@example.com')], ImportCalendar(), airtable)
+
+    assert airtable.customer_lookups == 1
+    customer_ids = [result.get('customer_id') for result in results if result['status'] == 'success']
+    assert customer_ids == ['cus-1-0', 'cus-1-1']
+
+
+class FakeCustomersTable:
+    table_name = 'Customers'
+
+    def __init__(self, records):
+        self.records = records
+        self.updated = []
+        self.inserted = []
+
+    def batch_update(self, records):
+        self.updated.extend(records)
+        return [{'id': record['id'], 'fields': record['fields']} for record in records]
+
+    def batch_insert(self, records):
+        self.inserted.extend(records)
+        return [{'id': f"new-{index}", 'fields': fields} for index, fields in enumerate(records)]
+
+
+def test_find_or_create_customers_looks_up_with_one_formula():
+    existing = {'id': 'rec-ann', 'fields': {'Name': 'Ann', 'Email': 'ann@example.com'}}
+    service = AirtableService.__new__(AirtableService)
+    service.customers = FakeCustomersTable([existing])
+    service.customer_index = CustomerIndex()
+    formulas = []
+
+    def get_all(table, formula=None, fields=None):
+        formulas.append(formula)
+        return [existing]
+    service._get_all = get_all
+
+    customer_ids = service.find_or_create_customers([
+        {'Name': 'Ann', 'Email': 'ANN@example.com'},
+        {'Name': "O'Brien", 'Phone': '555-0100'},
+    ])
+
+    assert customer_ids == {'ann@example.com': 'rec-ann', '555-0100': 'new-0'}
+    assert formulas == ["OR(LOWER({Email}) = 'ann@example.com', {Phone} = '555-0100')"]
+    assert [record['id'] for record in service.customers.updated] == ['rec-ann']
+    assert service.customers.inserted == [{'Name': "O'Brien", 'Phone': '555-0100', 'Address': '', 'Status': 'Active'}]
+    assert service.customer_index.get('555-0100')['id'] == 'new-0'
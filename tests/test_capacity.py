@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+from app.integrations.google_calendar.capacity import BusyIntervalCache, CapacityScheduler
+
+MONDAY = datetime(2026, 3, 2)
+
+
+class FakeCalendar:
+    """Crew calendars with fixed busy periods, counting free/busy requests"""
+
+    def __init__(self, busy):
+        self.crew_calendars = {'crew-a': 'cal-a', 'crew-b': 'cal-b'}
+        self.busy = busy
+        self.requests = 0
+        self.busy_cache = BusyIntervalCache(self)
+
+    def to_local(self, value):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def get_busy_intervals(self, calendar_ids, start_time, end_time):
+        self.requests += 1
+        return {
+            calendar_id: [
+                (start, end) for start, end in self.busy.get(calendar_id, [])
+                if self.to_local(start) < end_time and self.to_local(end) > start_time
+            ]
+            for calendar_id in calendar_ids
+        }
+
+
+def utc(value):
+    return value.replace(tzinfo=timezone.utc)
+
+
+def test_schedulers_for_the_same_day_share_one_request():
+    calendar = FakeCalendar({'cal-a': [(utc(MONDAY.replace(hour=9)), utc(MONDAY.replace(hour=12)))]})
+    slot = MONDAY.replace(hour=10)
+    for _ in range(3):
+        assert CapacityScheduler(calendar).load(slot, days=1).free_count(slot) == 1
+    assert calendar.requests == 1
+
+
+def test_invalidated_and_fresh_loads_refetch():
+    calendar = FakeCalendar({})
+    slot = MONDAY.replace(hour=10)
+    CapacityScheduler(calendar).load(slot, days=1)
+
+    calendar.busy['cal-b'] = [(utc(MONDAY.replace(hour=9)), utc(MONDAY.replace(hour=12)))]
+    calendar.busy_cache.invalidate(MONDAY.date())
+    assert CapacityScheduler(calendar).load(slot, days=1).free_count(slot) == 1
+
+    calendar.busy['cal-a'] = list(calendar.busy['cal-b'])
+    assert CapacityScheduler(calendar).load(slot, days=1, fresh=True).free_count(slot) == 0
+    assert calendar.requests == 3
+
+
+def test_interval_across_midnight_is_not_duplicated():
+    overnight = (utc(MONDAY.replace(hour=22)), utc(MONDAY.replace(hour=22) + timedelta(hours=4)))
+    calendar = FakeCalendar({'cal-a': [overnight]})
+    busy = calendar.busy_cache.get(['cal-a', 'cal-b'], MONDAY, 2)
+    assert busy == {'cal-a': [overnight], 'cal-b': []}
+
+
+def test_zero_ttl_reads_the_calendar_every_time():
+    calendar = FakeCalendar({})
+    calendar.busy_cache = BusyIntervalCache(calendar, ttl=0)
+    for _ in range(2):
+        CapacityScheduler(calendar).load(MONDAY, days=1)
+    assert calendar.requests == 2
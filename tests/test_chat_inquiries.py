@@ -0,0 +1,134 @@
+import pytest
+from conftest import import_core_module
+
+chat_inquiries = import_core_module('app.core.chat_inquiries')
+from app.integrations.airtable.service import BatchWriteError
+
+NOW = 1_000_000.0
+LATER = NOW + chat_inquiries.SESSION_IDLE + 1
+
+
+class FakeAirtable:
+    """Records create_inquiries_batch calls; subjects listed in bad fail every write"""
+
+    def __init__(self, customers=None, bad=(), fail_batches_after=None):
+        self.customers = customers or {}
+        self.bad = set(bad)
+        self.fail_batches_after = fail_batches_after
+        self.created = []
+        self.calls = 0
+
+    def find_customer(self, contact):
+        return self.customers.get(contact)
+
+    def create_inquiries_batch(self, inquiries, created_by='System'):
+        self.calls += 1
+        written = []
+        for inquiry in inquiries:
+            if inquiry['Subject'] in self.bad or (
+                self.fail_batches_after is not None and len(written) == self.fail_batches_after
+            ):
+                self.created.extend(written)
+                raise BatchWriteError('write failed', written)
+            written.append({'id': f"rec{len(self.created) + len(written)}", 'fields': inquiry})
+        self.created.extend(written)
+        return written
+
+
+class CountingClassifier(chat_inquiries.StubClassifier):
+    def __init__(self):
+        self.conversations = 0
+
+    def classify(self, conversations):
+        self.conversations += len(conversations)
+        return super().classify(conversations)
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(chat_inquiries.time, 'time', lambda: NOW)
+    return chat_inquiries.ChatSessionLog(str(tmp_path / 'chat.db'))
+
+
+def subjects(airtable):
+    return sorted(record['fields']['Subject'] for record in airtable.created)
+
+
+def test_finished_sessions_become_linked_inquiries(sessions):
+    sessions.record('conv-aaaaaaaa', 'How much is a 10x10? I am ann@example.com', 'It is $120 a month.')
+    sessions.record('conv-bbbbbbbb', 'Is anything available next week?', 'Yes, several units.')
+    airtable = FakeAirtable(customers={'ann@example.com': {'id': 'recAnn'}})
+    pipeline = chat_inquiries.ChatInquiryPipeline(airtable, sessions, chat_inquiries.StubClassifier())
+
+    assert pipeline.run_once(now=LATER) == 2
+    by_type = {record['fields']['Type']: record['fields'] for record in airtable.created}
+    assert by_type['Pricing Inquiry']['Customer'] == ['recAnn']
+    assert 'Customer' not in by_type['Availability Check']
+    assert pipeline.run_once(now=LATER) == 0
+
+
+def test_sessions_still_in_progress_are_left_alone(sessions):
+    sessions.record('conv-aaaaaaaa', 'Can I book a unit?', 'Sure.')
+    airtable = FakeAirtable()
+    pipeline = chat_inquiries.ChatInquiryPipeline(airtable, sessions, chat_inquiries.StubClassifier())
+
+    assert pipeline.run_once(now=NOW + 10) == 0
+    assert airtable.calls == 0
+
+
+def test_bad_record_is_retried_without_reclassifying_then_parked(sessions):
+    sessions.record('conv-aaaaaaaa', 'Can I book a unit?', 'Sure.')
+    sessions.record('conv-bbbbbbbb', 'What does it cost?', 'From $50.')
+    airtable = FakeAirtable(bad={'What does it cost?'})
+    classifier = CountingClassifier()
+    pipeline = chat_inquiries.ChatInquiryPipeline(airtable, sessions, classifier)
+
+    assert pipeline.run_once(now=LATER) == 1
+    assert subjects(airtable) == ['Can I book a unit?']
+    assert classifier.conversations == 2
+
+    # Retried with backoff, reusing the saved classification
+    now = LATER
+    for attempt in range(1, chat_inquiries.MAX_ATTEMPTS):
+        now += chat_inquiries.CLASSIFY_INTERVAL * 2 ** attempt
+        assert pipeline.run_once(now=now) == 0
+    assert classifier.conversations == 2
+    assert sessions.parked_count() == 1
+    assert pipeline.run_once(now=now + 10 ** 6) == 0
+
+
+def test_partially_written_batch_is_not_created_twice(sessions):
+    for i in range(3):
+        sessions.record(f"conv-{i}aaaaaaa", f"Question {i} about storage", 'Answer.')
+    airtable = FakeAirtable(fail_batches_after=1)
+    pipeline = chat_inquiries.ChatInquiryPipeline(airtable, sessions, chat_inquiries.StubClassifier())
+
+    pipeline.run_once(now=LATER)
+    airtable.fail_batches_after = None
+    pipeline.run_once(now=LATER + 10 ** 4)
+    assert subjects(airtable) == [f"Question {i} about storage" for i in range(3)]
+
+
+def test_messages_after_the_claim_start_a_new_session(sessions, monkeypatch):
+    sessions.record('conv-aaaaaaaa', 'Can I book a unit?', 'Sure.')
+    claims = sessions.claim_finished(10, now=LATER)
+    monkeypatch.setattr(chat_inquiries.time, 'time', lambda: LATER + 1)
+    sessions.record('conv-aaaaaaaa', 'Also, is there a discount?', 'Yes, 10% off.')
+    sessions.complete(claims)
+
+    later = sessions.claim_finished(10, now=LATER + chat_inquiries.SESSION_IDLE + 2)
+    assert [message['content'] for message in later[0].messages] == ['Also, is there a discount?', 'Yes, 10% off.']
+
+
+def test_chat_session_id_rejects_malformed_ids():
+    assert chat_inquiries.chat_session_id('conv-aaaaaaaa') == 'conv-aaaaaaaa'
+    assert chat_inquiries.chat_session_id('../../etc') != '../../etc'
+    assert len(chat_inquiries.chat_session_id(None)) == 32
+
+
+def test_record_failure_does_not_reach_the_chat_reply(sessions):
+    class Broken:
+        def record(self, *args):
+            raise chat_inquiries.sqlite3.OperationalError('database is locked')
+
+    chat_inquiries.record_chat(Broken(), 'conv-aaaaaaaa', 'hi', 'hello')
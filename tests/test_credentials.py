@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from google.oauth2.credentials import Credentials
+
+from app.integrations.google_calendar.credentials import CredentialManager, discovery_document
+
+
+def credentials(token, expires_in):
+    return Credentials(
+        token=token, refresh_token='refresh', client_id='client', client_secret='secret',
+        token_uri='https://oauth2.googleapis.com/token',
+        expiry=datetime.utcnow().replace(microsecond=0) + expires_in
+    )
+
+
+def test_discovery_document_is_loaded_once():
+    assert discovery_document() is discovery_document()
+    assert '"name": "calendar"' in discovery_document()
+
+
+def test_refresh_is_scheduled_ahead_of_expiry(tmp_path):
+    manager = CredentialManager(token_file=str(tmp_path / 'token.json'), refresh_margin=300)
+    manager.creds = credentials('current', timedelta(minutes=15))
+
+    assert 590 <= manager._seconds_until_refresh() <= 600
+    manager.creds = credentials('current', timedelta(minutes=2))
+    assert manager._seconds_until_refresh() == 0
+
+
+def test_token_refreshed_by_another_process_is_adopted(tmp_path):
+    token_file = tmp_path / 'token.json'
+    token_file.write_text(credentials('newer', timedelta(hours=1)).to_json())
+    manager = CredentialManager(token_file=str(token_file), refresh_margin=300)
+    manager.creds = credentials('older', timedelta(minutes=2))
+    in_use = manager.creds
+
+    def no_network(request):
+        raise AssertionError('should not refresh')
+    manager.creds.refresh = no_network
+    manager.refresh()
+
+    # Updated in place, so API clients built from these credentials see it
+    assert in_use.token == 'newer'
+
+
+def test_expired_token_on_disk_is_not_adopted(tmp_path):
+    token_file = tmp_path / 'token.json'
+    token_file.write_text(credentials('stale', timedelta(minutes=1)).to_json())
+    manager = CredentialManager(token_file=str(token_file), refresh_margin=300)
+    manager.creds = credentials('older', timedelta(seconds=30))
+
+    assert not manager._adopt_newer_token()
+    assert manager.creds.token == 'older'
@@ -0,0 +1,60 @@
+import gzip
+import json
+
+import pytest
+from conftest import import_core_module
+
+export = import_core_module('app.core.export')
+
+
+class FakeRecords:
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    def iter_records(self, table_name, formula=None, fields=None):
+        self.calls.append((table_name, formula))
+        yield from self.records
+
+
+BOOKING = {'id': 'rec1', 'fields': {'Customer': ['cusA', 'cusB'], 'Start Date': '2026-03-02', 'Status': 'Scheduled'}}
+
+
+def test_csv_export_yields_one_chunk_per_row():
+    chunks = list(export.export_table(FakeRecords([BOOKING, BOOKING]), 'bookings'))
+
+    assert len(chunks) == 2
+    header, first = chunks[0].splitlines()
+    assert header.startswith('id,')
+    row = dict(zip(header.split(','), first.split(',')))
+    assert row['id'] == 'rec1' and row['Customer'] == 'cusA;cusB' and row['Status'] == 'Scheduled'
+
+
+def test_empty_csv_export_is_just_the_header():
+    chunks = list(export.export_table(FakeRecords([]), 'customers'))
+
+    assert len(chunks) == 1 and chunks[0].startswith('id,')
+
+
+def test_ndjson_export_filters_by_inclusive_date_range():
+    airtable = FakeRecords([BOOKING])
+    lines = list(export.export_table(airtable, 'bookings', fmt='ndjson', start='2026-03-01', end='2026-03-31'))
+
+    assert json.loads(lines[0]) == BOOKING
+    assert airtable.calls == [(
+        'Bookings',
+        "AND(NOT(IS_BEFORE({Start Date}, '2026-03-01')), IS_BEFORE({Start Date}, '2026-04-01'))"
+    )]
+
+
+def test_unknown_table_format_or_date_is_rejected():
+    for kwargs in ({'name': 'payments'}, {'name': 'bookings', 'fmt': 'xml'}, {'name': 'bookings', 'start': '03/01/2026'}):
+        with pytest.raises(ValueError):
+            export.export_table(FakeRecords([]), **kwargs)
+
+
+def test_gzip_stream_round_trips():
+    chunks = export.export_table(FakeRecords([BOOKING] * 3), 'bookings', fmt='ndjson')
+
+    body = gzip.decompress(b''.join(export.gzip_stream(chunks))).decode()
+    assert body.count('\n') == 3
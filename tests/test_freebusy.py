@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytz
+
+from app.integrations.google_calendar import config
+from app.integrations.google_calendar.service import GoogleCalendarService
+
+
+class FakeFreebusy:
+    """Stands in for service.freebusy(), answering from fixed busy periods"""
+
+    def __init__(self, busy, errors=None):
+        self.busy = busy
+        self.errors = errors or {}
+        self.bodies = []
+
+    def freebusy(self):
+        return self
+
+    def query(self, body):
+        self.bodies.append(body)
+        self.body = body
+        return self
+
+    def execute(self):
+        return {'calendars': {
+            item['id']: {'busy': self.busy.get(item['id'], []), 'errors': self.errors.get(item['id'], [])}
+            for item in self.body['items']
+        }}
+
+
+def calendar_service(api):
+    service = GoogleCalendarService.__new__(GoogleCalendarService)
+    service.service = api
+    service.timezone = pytz.timezone('America/Los_Angeles')
+    return service
+
+
+def test_busy_time_for_many_days_and_calendars_is_one_query():
+    api = FakeFreebusy({'cal-a': [{'start': '2026-03-02T18:00:00Z', 'end': '2026-03-02T19:00:00Z'}]})
+    start = datetime(2026, 3, 2)
+
+    busy = calendar_service(api).get_busy_intervals(['cal-a', 'cal-b'], start, start + timedelta(days=14))
+
+    assert len(api.bodies) == 1
+    # Naive times are calendar local
+    assert api.bodies[0]['timeMin'] == '2026-03-02T00:00:00-08:00'
+    assert busy == {
+        'cal-a': [(datetime(2026, 3, 2, 18, tzinfo=timezone.utc), datetime(2026, 3, 2, 19, tzinfo=timezone.utc))],
+        'cal-b': []
+    }
+
+
+def test_calendars_are_split_across_queries(monkeypatch):
+    monkeypatch.setattr(config, 'FREEBUSY_MAX_CALENDARS', 2)
+    api = FakeFreebusy({})
+    start = datetime(2026, 3, 2)
+
+    busy = calendar_service(api).get_busy_intervals(['a', 'b', 'c'], start, start + timedelta(days=1))
+
+    assert [[item['id'] for item in body['items']] for body in api.bodies] == [['a', 'b'], ['c']]
+    assert set(busy) == {'a', 'b', 'c'}
+
+
+def test_calendar_errors_are_raised():
+    api = FakeFreebusy({}, errors={'cal-a': [{'reason': 'notFound'}]})
+    start = datetime(2026, 3, 2)
+
+    with pytest.raises(ValueError, match='cal-a'):
+        calendar_service(api).get_busy_intervals(['cal-a'], start, start + timedelta(days=1))
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from app.integrations.airtable import hedging
+from app.integrations.airtable.hedging import HedgedReader
+from app.integrations.airtable.rate_limit import RateLimiter
+
+
+def warm(reader, table, operation, seconds=0.0):
+    """Give reader enough samples of a fixed latency to start hedging"""
+    for _ in range(hedging.MIN_SAMPLES):
+        reader.call(table, operation, time.sleep, seconds)
+
+
+def test_latencies_are_kept_per_table_and_operation():
+    reader = HedgedReader()
+    warm(reader, 'Bookings', 'get')
+    warm(reader, 'Bookings', 'get_all', 0.06)
+
+    delays = reader.snapshot()['delays_ms']
+    assert delays['Bookings.get'] == hedging.MIN_HEDGE_DELAY * 1000
+    assert delays['Bookings.get_all'] >= 60
+    reader.stop()
+
+
+def test_slow_read_is_hedged_and_the_first_answer_wins():
+    reader = HedgedReader(budget=1)
+    warm(reader, 'Bookings', 'get')
+    calls = []
+
+    def read():
+        calls.append(None)
+        # Only the first attempt is slow; the hedge answers straight away
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return 'primary'
+        return 'hedge'
+
+    started = time.monotonic()
+    assert reader.call('Bookings', 'get', read) == 'hedge'
+    assert time.monotonic() - started < 0.4
+    assert reader.stats['hedge_won'] == 1
+    reader.stop()
+
+
+def test_no_hedge_while_the_limiter_is_backlogged():
+    limiter = RateLimiter(rate=1000)
+    reader = HedgedReader(limiter, budget=1)
+    warm(reader, 'Bookings', 'get')
+    calls = []
+
+    def read():
+        calls.append(None)
+        limiter.acquire()
+        # Another request is now queued for a token
+        limiter.tokens = 0
+        limiter.waiting += 1
+        time.sleep(0.2)
+        limiter.waiting -= 1
+        return 'primary'
+
+    assert reader.call('Bookings', 'get', read) == 'primary'
+    assert len(calls) == 1
+    assert reader.stats['backlogged'] == 1
+    reader.stop()
+
+
+def test_time_waiting_for_a_token_is_not_counted():
+    limiter = RateLimiter(rate=5, burst=1)
+    reader = HedgedReader(limiter)
+    limiter.acquire()  # empty the bucket, so the read waits about 0.2s for a token
+
+    reader.call('Bookings', 'get', limiter.acquire)
+    assert reader._latencies[('Bookings', 'get')][0] < 0.1
+    reader.stop()
+
+
+def test_limiter_reports_token_waits_to_the_tracking_thread():
+    limiter = RateLimiter(rate=5, burst=1)
+    waits = []
+    limiter.acquire()
+    with limiter.tracking(waits.append):
+        limiter.acquire()
+    # Other threads are not tracked
+    thread = threading.Thread(target=limiter.acquire)
+    thread.start()
+    thread.join()
+
+    assert len(waits) == 1 and waits[0] > 0.1
@@ -0,0 +1,70 @@
+from app.integrations.airtable import history_queue
+from app.integrations.airtable.history_queue import HistoryWriteQueue
+
+
+class FakeHistoryTable:
+    """Fails batches that contain a bad message, and single inserts of it"""
+
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.written = []
+
+    def batch_insert(self, records):
+        if any(record['Message'] in self.bad for record in records):
+            raise RuntimeError('422 invalid record')
+        self.written.extend(record['Message'] for record in records)
+
+    def insert(self, record):
+        self.batch_insert([record])
+
+
+def test_failed_batch_is_retried_one_row_at_a_time(tmp_path):
+    table = FakeHistoryTable(bad={'bad'})
+    queue = HistoryWriteQueue(table, str(tmp_path / 'queue.db'))
+    queue.enqueue('recA', {'Message': 'a1'})
+    queue.enqueue('recB', {'Message': 'bad'})
+    queue.enqueue('recB', {'Message': 'b2'})
+    queue.enqueue('recC', {'Message': 'c1'})
+
+    assert queue._flush_batch() == 2
+    # b2 waits behind the failed entry for the same inquiry
+    assert table.written == ['a1', 'c1']
+    assert [entry['fields']['Message'] for entry in queue.pending_for('recB')] == ['bad', 'b2']
+
+
+def test_parked_entries_are_not_reported_as_pending(tmp_path):
+    table = FakeHistoryTable(bad={'bad'})
+    queue = HistoryWriteQueue(table, str(tmp_path / 'queue.db'))
+    queue.enqueue('recB', {'Message': 'bad'})
+    for _ in range(history_queue.MAX_ATTEMPTS):
+        queue._flush_batch()
+
+    assert queue.pending_for('recB') == []
+    assert queue.requeue_failed() == 1
+
+
+def test_claimed_rows_are_not_sent_by_another_worker(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    first = HistoryWriteQueue(FakeHistoryTable(), path)
+    second_table = FakeHistoryTable()
+    second = HistoryWriteQueue(second_table, path)
+    first.enqueue('recA', {'Message': 'a1'})
+    second.enqueue('recA', {'Message': 'a2'})
+
+    claimed = first._claim_batch()
+    assert len(claimed) == 2
+    assert second._flush_batch() == 0
+    assert second_table.written == []
+
+
+def test_stale_claims_are_taken_over(tmp_path, monkeypatch):
+    path = str(tmp_path / 'queue.db')
+    crashed = HistoryWriteQueue(FakeHistoryTable(), path)
+    crashed.enqueue('recA', {'Message': 'a1'})
+    crashed._claim_batch()
+
+    now = history_queue.time.time()
+    monkeypatch.setattr(history_queue.time, 'time', lambda: now + history_queue.CLAIM_TTL + 1)
+    table = FakeHistoryTable()
+    assert HistoryWriteQueue(table, path)._flush_batch() == 1
+    assert table.written == ['a1']
@@ -0,0 +1,71 @@
+import pytest
+from flask import Flask
+from conftest import import_core_module
+
+http_cache = import_core_module('app.core.http_cache')
+shared_cache = import_core_module('app.core.shared_cache')
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+class Counter:
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.payload
+
+
+def inquiries(app, cache, compute, etag=None):
+    headers = {'If-None-Match': f'"{etag}"'} if etag else {}
+    with app.test_request_context(headers=headers):
+        return http_cache.conditional_json(
+            cache, 'customer-inquiries', ('cusA',), ['customer:cusA'], compute
+        )
+
+
+def test_repeat_poll_is_answered_with_304_from_the_cache(app):
+    cache = http_cache.ResponseCache()
+    compute = Counter({'inquiries': [1, 2]})
+
+    first = inquiries(app, cache, compute)
+    etag = first.get_etag()[0]
+    second = inquiries(app, cache, compute, etag)
+
+    assert first.status_code == 200 and first.get_json() == {'inquiries': [1, 2]}
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    assert second.status_code == 304 and second.get_etag()[0] == etag
+    assert compute.calls == 1
+
+
+def test_inquiry_write_invalidates_its_customers_entries(app):
+    cache = http_cache.ResponseCache()
+    compute = Counter({'inquiries': [1]})
+    etag = inquiries(app, cache, compute).get_etag()[0]
+
+    cache.on_inquiry_changed({'id': 'inqX', 'fields': {'Customer': ['cusA']}})
+    compute.payload = {'inquiries': [1, 2]}
+    response = inquiries(app, cache, compute, etag)
+
+    assert compute.calls == 2
+    assert response.status_code == 200 and response.get_etag()[0] != etag
+
+
+def test_tenants_sharing_a_store_are_kept_apart(app):
+    store = shared_cache.LocalStore()
+    north = http_cache.ResponseCache(store=store, namespace='north')
+    south = http_cache.ResponseCache(store=store, namespace='south')
+    inquiries(app, north, Counter({'tenant': 'north'}))
+
+    south_compute = Counter({'tenant': 'south'})
+    assert inquiries(app, south, south_compute).get_json() == {'tenant': 'south'}
+    # Invalidating one tenant's customer leaves the other's entry alone
+    south.on_inquiry_changed({'id': 'inqX', 'fields': {'Customer': ['cusA']}})
+    north_compute = Counter({'tenant': 'changed'})
+    assert inquiries(app, north, north_compute).get_json() == {'tenant': 'north'}
+    assert north_compute.calls == 0
@@ -0,0 +1,21 @@
+from app.integrations.airtable.service import AirtableService
+
+
+class NoPendingHistory:
+    def pending_for(self, inquiry_id):
+        return []
+
+
+def test_inquiry_id_is_escaped_in_the_history_formula():
+    service = AirtableService.__new__(AirtableService)
+    service.inquiry_history = None
+    service.history_queue = NoPendingHistory()
+    formulas = []
+
+    def get_all(table, formula=None, **options):
+        formulas.append(formula)
+        return []
+    service._get_all = get_all
+
+    service.get_inquiry_history("rec1' OR '1'='1")
+    assert formulas == ["{Inquiry} = 'rec1\\' OR \\'1\\'=\\'1'"]
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+from app.integrations.airtable.inquiry_stats import InquiryStats
+
+
+def inquiry(record_id, status='New', days_old=0):
+    created = datetime.now(timezone.utc) - timedelta(days=days_old)
+    return {
+        'id': record_id,
+        'createdTime': created.isoformat().replace('+00:00', 'Z'),
+        'fields': {'Status': status, 'Priority': 'Medium', 'Type': 'Other'}
+    }
+
+
+def test_changes_during_a_reconcile_scan_are_kept():
+    stats = InquiryStats(lambda: [])
+    scanned = [inquiry('recOld')]
+
+    def scan():
+        yield scanned[0]
+        # Written while the scan is still paging through the table
+        stats.record_created(inquiry('recNew'))
+        stats.record_status(scanned[0], 'Resolved')
+
+    stats.scan = scan
+    stats.reconcile()
+    counts = stats.snapshot()
+    assert counts['total'] == 2
+    assert counts['by_status']['Resolved'] == 1
+    assert counts['by_status']['New'] == 1
+
+
+def test_open_age_buckets_follow_updates():
+    stats = InquiryStats(lambda: [inquiry('recA', days_old=10), inquiry('recB')])
+    stats.reconcile()
+    assert stats.snapshot()['open_by_age']['over_7_days'] == 1
+
+    stats.record_status(inquiry('recA'), 'Closed')
+    stats.record_created(inquiry('recC', days_old=2))
+    ages = stats.snapshot()['open_by_age']
+    assert ages['over_7_days'] == 0
+    assert ages['1_to_3_days'] == 1
+    assert ages['under_1_day'] == 1
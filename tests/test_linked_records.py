@@ -0,0 +1,57 @@
+import re
+
+import requests
+
+from app.integrations.airtable import service as airtable_module
+from app.integrations.airtable.service import AirtableService
+
+
+class FakeTable:
+    def __init__(self, table_name, records):
+        self.table_name = table_name
+        self.records = {record['id']: record for record in records}
+
+    def get(self, record_id):
+        if record_id not in self.records:
+            response = requests.Response()
+            response.status_code = 404
+            raise requests.exceptions.HTTPError('404 Not Found', response=response)
+        return self.records[record_id]
+
+
+def linked_service(customers, bookings):
+    service = AirtableService.__new__(AirtableService)
+    service.hedger = None
+    service.customers = FakeTable('Customers', customers)
+    service.bookings = FakeTable('Bookings', bookings)
+    service.formulas = []
+
+    def get_all(table, formula=None, **options):
+        service.formulas.append(formula)
+        wanted = re.findall(r"RECORD_ID\(\) = '(\w+)'", formula)
+        return [table.records[record_id] for record_id in reversed(wanted) if record_id in table.records]
+    service._get_all = get_all
+    return service
+
+
+def test_customer_bookings_are_fetched_by_id_in_link_order(monkeypatch):
+    monkeypatch.setattr(airtable_module, 'LINKED_RECORD_BATCH', 2)
+    bookings = [{'id': f"rec{index}", 'fields': {}} for index in range(3)]
+    service = linked_service(
+        [{'id': 'cusA', 'fields': {'Bookings': ['rec2', 'rec0', 'recGone', 'rec1']}}],
+        bookings
+    )
+
+    found = service.get_customer_bookings('cusA')
+
+    # Deleted bookings are skipped; the rest keep the customer's order
+    assert [booking['id'] for booking in found] == ['rec2', 'rec0', 'rec1']
+    assert len(service.formulas) == 2
+    assert service.formulas[0] == "OR(RECORD_ID() = 'rec2', RECORD_ID() = 'rec0')"
+
+
+def test_unknown_customer_has_no_bookings():
+    service = linked_service([], [])
+
+    assert service.get_customer_bookings('cusMissing') == []
+    assert service.formulas == []
@@ -0,0 +1,36 @@
+import pytest
+
+from app.integrations.airtable.models import (
+    CUSTOMER_LOOKUP_FIELDS, INQUIRY_FIELD_NAMES, Booking, Customer, Inquiry, parse_field_list
+)
+
+
+def test_field_list_is_sorted_and_deduplicated():
+    assert parse_field_list('Subject, Status,Subject', INQUIRY_FIELD_NAMES) == ['Status', 'Subject']
+    assert parse_field_list('', INQUIRY_FIELD_NAMES) is None
+    assert parse_field_list(' , ', INQUIRY_FIELD_NAMES) is None
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError, match='Password'):
+        parse_field_list('Subject,Password', INQUIRY_FIELD_NAMES)
+
+
+def test_projections_name_only_the_lookup_fields():
+    assert CUSTOMER_LOOKUP_FIELDS == ['Name', 'Email', 'Phone', 'Address', 'Status']
+    assert 'Notes' not in CUSTOMER_LOOKUP_FIELDS and 'Bookings' not in CUSTOMER_LOOKUP_FIELDS
+
+
+def test_records_round_trip_and_omit_unset_fields():
+    record = {'id': 'rec1', 'fields': {'Subject': 'Late pickup', 'Status': 'New'}}
+    inquiry = Inquiry.from_airtable(record)
+
+    assert inquiry.subject == 'Late pickup' and inquiry.message is None
+    assert inquiry.to_record() == record
+
+
+def test_invalid_options_and_unknown_attributes_are_rejected():
+    with pytest.raises(ValueError, match='Invalid status'):
+        Booking(status='Lost').validate()
+    with pytest.raises(TypeError):
+        Customer(nickname='Al')
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from flask import Flask, g
+from conftest import import_core_module
+
+profiling = import_core_module('app.core.profiling')
+
+
+def busy_wait(stop):
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+def test_profile_collapses_other_threads_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_wait, args=(stop,))
+    worker.start()
+    try:
+        stacks = profiling.SamplingProfiler(interval=0.001).run(0.05)
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = [line for line in stacks.splitlines() if 'busy_wait' in line]
+    assert lines
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    # Outermost frame first
+    assert stack.index('run (threading.py') < stack.index('busy_wait (test_profiling.py')
+
+
+def test_only_one_profile_runs_at_a_time():
+    profiler = profiling.SamplingProfiler()
+    results = []
+    first = threading.Thread(target=lambda: results.append(profiler.run(0.1)))
+    first.start()
+    time.sleep(0.02)
+
+    assert profiler.run(0.01) is None
+    first.join()
+    assert results[0] is not None
+
+
+def test_slow_requests_are_logged_with_phase_timings():
+    app = Flask(__name__)
+    log = profiling.SlowRequestLog(threshold=0.01)
+    with app.test_request_context():
+        with profiling.phase('calendar_insert'):
+            time.sleep(0.02)
+        log.record('POST', '/booking', 201, 0.05, g.phases)
+        log.record('GET', '/fast', 200, 0.001, {})
+
+    [entry] = log.recent()
+    assert entry['path'] == '/booking' and entry['total_ms'] == 50.0
+    assert entry['phases_ms']['calendar_insert'] >= 20
+    assert abs(entry['phases_ms']['other'] + entry['phases_ms']['calendar_insert'] - 50) <= 0.1
@@ -0,0 +1,96 @@
+import time
+from datetime import datetime, timedelta
+from conftest import import_core_module
+
+reminders = import_core_module('app.core.reminders')
+
+
+class FakeBookings:
+    def __init__(self, records):
+        self.records = {record['id']: record for record in records}
+        self.booking_listeners = []
+
+    def iter_records(self, table_name, formula=None, fields=None):
+        return [record for record in self.records.values() if record['fields']['Status'] == 'Scheduled']
+
+    def get_booking(self, booking_id):
+        return self.records.get(booking_id)
+
+
+class RecordingNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, booking_id, start, fields):
+        self.sent.append(booking_id)
+
+
+def booking(booking_id, start, status='Scheduled'):
+    return {'id': booking_id, 'fields': {
+        'Start Date': start.strftime('%Y-%m-%d'),
+        'Notes': f"Time: {start.strftime('%I:%M %p')}",
+        'Status': status
+    }}
+
+
+def soon():
+    return (datetime.now(reminders.BOOKING_TIMEZONE) + timedelta(hours=2)).replace(minute=0, second=0, microsecond=0)
+
+
+def test_cancelled_booking_gets_no_reminder(tmp_path):
+    start = soon()
+    airtable = FakeBookings([booking('recKeep', start), booking('recCancel', start)])
+    notifier = RecordingNotifier()
+    scheduler = reminders.ReminderScheduler(airtable, notifier, path=str(tmp_path / 'reminders.db'))
+    scheduler.load()
+    # Cancelled in Airtable directly, so no listener fires
+    airtable.records['recCancel']['fields']['Status'] = 'Cancelled'
+
+    for booking_id, due_start, fields in scheduler.wheel.advance(time.time() + 5):
+        scheduler.send(booking_id, due_start, fields)
+    assert notifier.sent == ['recKeep']
+
+
+def test_reminder_is_sent_once_across_workers_and_reloads(tmp_path):
+    path = str(tmp_path / 'reminders.db')
+    airtable = FakeBookings([booking('recA', soon())])
+    notifier = RecordingNotifier()
+    for _ in range(2):
+        scheduler = reminders.ReminderScheduler(airtable, notifier, path=path)
+        scheduler.load()
+        for booking_id, start, fields in scheduler.wheel.advance(time.time() + 5):
+            scheduler.send(booking_id, start, fields)
+    assert notifier.sent == ['recA']
+
+
+def test_only_one_worker_runs_the_wheel(tmp_path):
+    path = str(tmp_path / 'reminders.db')
+    first = reminders.ReminderScheduler(FakeBookings([]), RecordingNotifier(), path=path)
+    second = reminders.ReminderScheduler(FakeBookings([]), RecordingNotifier(), path=path)
+    first.start()
+    try:
+        deadline = time.time() + 2
+        while not first.owner and time.time() < deadline:
+            time.sleep(0.01)
+        second.start()
+        time.sleep(0.2)
+        assert [first.owner, second.owner] == [True, False]
+    finally:
+        first.stop()
+        second.stop()
+
+
+def test_booking_start_is_local_and_aware():
+    start = reminders.booking_start({'Start Date': '2026-03-02', 'Notes': 'Time: 2:30 pm'})
+    assert start == reminders.BOOKING_TIMEZONE.localize(datetime(2026, 3, 2, 14, 30))
+    default = reminders.booking_start({'Start Date': '2026-03-02'})
+    assert default.hour == 9 and default.utcoffset() == timedelta(hours=-8)
+
+
+def test_booking_start_converts_utc_start_dates():
+    # 02:00 UTC on the 3rd is 18:00 on the 2nd in Los Angeles
+    start = reminders.booking_start({'Start Date': '2026-03-03T02:00:00.000Z'})
+    assert start == reminders.BOOKING_TIMEZONE.localize(datetime(2026, 3, 2, 18, 0))
+    with_notes = reminders.booking_start({'Start Date': '2026-03-03T02:00:00.000Z', 'Notes': 'Time: 10:00 AM'})
+    assert with_notes == reminders.BOOKING_TIMEZONE.localize(datetime(2026, 3, 2, 10, 0))
+    assert reminders.booking_start({'Start Date': 'next tuesday'}) is None
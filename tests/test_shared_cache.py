@@ -0,0 +1,11 @@
+from conftest import import_core_module
+
+shared_cache = import_core_module('app.core.shared_cache')
+
+
+def test_without_fcntl_the_store_stays_in_process(monkeypatch, tmp_path):
+    monkeypatch.setattr(shared_cache, 'fcntl', None)
+    monkeypatch.setattr(shared_cache, 'SHARED_CACHE_SOCKET', str(tmp_path / 'cache.sock'))
+    monkeypatch.setattr(shared_cache, '_store', None)
+
+    assert isinstance(shared_cache.shared_store(), shared_cache.LocalStore)
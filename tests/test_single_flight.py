@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from app.integrations.airtable.single_flight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers=5):
+    """Start callers on one key while the leader is blocked; return their outcomes"""
+    results = [None] * callers
+    threads = []
+
+    def caller(index):
+        try:
+            results[index] = flight.do(key, fn)
+        except Exception as e:
+            results[index] = e
+
+    for index in range(callers):
+        threads.append(threading.Thread(target=caller, args=(index,)))
+        threads[-1].start()
+    return threads, results
+
+
+def wait_for_waiters(flight, key, count):
+    while True:
+        with flight._lock:
+            call = flight._calls.get(key)
+            if call and call.waiters == count:
+                return
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def read():
+        calls.append(None)
+        release.wait()
+        return ['record']
+
+    threads, results = run_concurrently(flight, ('Bookings', None), read)
+    wait_for_waiters(flight, ('Bookings', None), 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_error_reaches_every_waiter_and_is_not_kept():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing_read():
+        release.wait()
+        raise RuntimeError('timeout')
+
+    threads, results = run_concurrently(flight, ('Bookings', None), failing_read, callers=3)
+    wait_for_waiters(flight, ('Bookings', None), 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # Nothing is cached once the call completes
+    assert flight.do(('Bookings', None), lambda: 'fresh') == 'fresh'
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight()
+    release = threading.Event()
+    threads, _ = run_concurrently(flight, ('Bookings', None), release.wait, callers=1)
+
+    assert flight.do(('Customers', None), lambda: 'customers') == 'customers'
+    release.set()
+    threads[0].join()
+    with pytest.raises(ZeroDivisionError):
+        flight.do(('Customers', None), lambda: 1 / 0)
@@ -0,0 +1,68 @@
+import pytest
+from conftest import import_core_module
+from test_capacity import FakeCalendar, MONDAY
+from app.integrations.google_calendar.capacity import CapacityScheduler
+
+slot_holds = import_core_module('app.core.slot_holds')
+
+SLOT = MONDAY.replace(hour=10)
+
+
+@pytest.fixture
+def holds(tmp_path):
+    return slot_holds.SlotHoldStore(str(tmp_path / 'holds.db'))
+
+
+def test_two_holds_on_one_slot_book_different_crews(holds):
+    calendar = FakeCalendar({})
+    # Each request loads its own scheduler, as create_booking does
+    first = CapacityScheduler(calendar).load(SLOT, days=1, fresh=True)
+    second = CapacityScheduler(calendar).load(SLOT, days=1, fresh=True)
+    first_hold = holds.place(SLOT, first.free_crew_names(SLOT))
+    second_hold = holds.place(SLOT, second.free_crew_names(SLOT))
+
+    first_crew = holds.claim(first_hold['hold_id'], SLOT)
+    second_crew = holds.claim(second_hold['hold_id'], SLOT)
+    assigned = [
+        first.assign(SLOT, crew=first_crew)['calendar_id'],
+        second.assign(SLOT, crew=second_crew)['calendar_id']
+    ]
+    assert sorted(assigned) == ['cal-a', 'cal-b']
+
+
+def test_slot_is_full_once_every_free_crew_is_held(holds):
+    assert holds.place(SLOT, ['crew-a'])['crew'] == 'crew-a'
+    assert holds.place(SLOT, ['crew-a']) is None
+    # A neighbouring slot whose window overlaps is full too
+    assert holds.place(SLOT.replace(minute=30), ['crew-a']) is None
+    assert holds.place(SLOT.replace(hour=15), ['crew-a'])['crew'] == 'crew-a'
+
+
+def test_replacing_a_hold_frees_its_crew(holds):
+    hold = holds.place(SLOT, ['crew-a'])
+    moved = holds.place(SLOT, ['crew-a'], replaces=hold['hold_id'])
+    assert moved['crew'] == 'crew-a'
+    assert holds.claim(hold['hold_id'], SLOT) is None
+
+
+def test_expired_hold_cannot_be_claimed_and_frees_the_slot(holds, monkeypatch):
+    hold = holds.place(SLOT, ['crew-a'])
+    later = slot_holds.time.time() + slot_holds.HOLD_TTL + 1
+    monkeypatch.setattr(slot_holds.time, 'time', lambda: later)
+
+    assert holds.claim(hold['hold_id'], SLOT) is None
+    assert holds.reserved_crews(SLOT) == set()
+    assert holds.place(SLOT, ['crew-a'])['crew'] == 'crew-a'
+
+
+def test_claim_checks_the_slot_and_only_succeeds_once(holds):
+    hold = holds.place(SLOT, ['crew-b'])
+    assert holds.claim(hold['hold_id'], SLOT.replace(hour=11)) is None
+    assert holds.claim(hold['hold_id'], SLOT) == 'crew-b'
+    assert holds.claim(hold['hold_id'], SLOT) is None
+
+
+def test_assign_skips_crews_reserved_by_holds():
+    scheduler = CapacityScheduler(FakeCalendar({})).load(SLOT, days=1)
+    assert scheduler.assign(SLOT, exclude={'crew-a'})['crew'] == 'crew-b'
+    assert scheduler.assign(SLOT, exclude={'crew-a'}) is None
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+from conftest import import_core_module
+
+tenants = import_core_module('app.core.tenants')
+
+
+class FakeServices:
+    def __init__(self, tenant_id, settings, credentials, verify=True):
+        self.tenant_id = tenant_id
+        self.verify = verify
+        self.users = 0
+        self.retired = False
+        self.stopped = threading.Event()
+        self.airtable = self
+
+    def verify_tables(self):
+        pass
+
+    def stop(self):
+        self.stopped.set()
+
+
+class NoSnapshot:
+    def load(self):
+        pass
+
+    def restore(self, tenant_id, services):
+        pass
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(tenants, 'TenantServices', FakeServices)
+    monkeypatch.setattr(tenants, 'CacheSnapshot', NoSnapshot)
+    return tenants.TenantRegistry({
+        'default': {'pinned': True},
+        'north': {'hosts': ['north.example.com']},
+        'south': {'hosts': ['south.example.com']},
+    }, max_active=2)
+
+
+def test_requests_resolve_by_header_then_host(registry):
+    assert registry.resolve('south', 'north.example.com') == 'south'
+    assert registry.resolve(None, 'NORTH.example.com:5001') == 'north'
+    assert registry.resolve(None, 'unknown.example.com') == 'default'
+    assert registry.resolve('west') is None
+
+
+def test_least_recently_used_tenant_is_stopped_but_pinned_ones_stay(registry):
+    default = registry.get('default')
+    north = registry.get('north')
+    registry.get('south')
+
+    assert north.stopped.wait(1)
+    assert not default.stopped.is_set()
+    assert set(registry.active_services()) == {'default', 'south'}
+    # Only pinned tenants are checked against Airtable on the request path
+    assert default.verify and not north.verify
+
+
+def test_evicted_tenant_stops_when_its_last_request_finishes(registry):
+    registry.get('default')
+    north = registry.acquire('north')
+    registry.get('south')
+
+    assert north.retired and not north.stopped.is_set()
+    registry.release(north)
+    assert north.stopped.wait(1)
+
+
+def test_concurrent_first_requests_share_one_instance(registry):
+    acquired = []
+    threads = [threading.Thread(target=lambda: acquired.append(registry.acquire('north'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(services) for services in acquired}) == 1
+    assert acquired[0].users == 4
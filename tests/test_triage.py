@@ -0,0 +1,82 @@
+import pytest
+from app.integrations.airtable.service import AirtableService
+from app.integrations.airtable.triage import TriageQueue
+
+
+class FakeInquiries:
+    """One Airtable table shared by several workers"""
+
+    table_name = 'Inquiries'
+
+    def __init__(self, records):
+        self.records = {record['id']: record for record in records}
+        self.fail_updates = False
+
+    def get(self, record_id):
+        return self.records[record_id]
+
+    def update(self, record_id, fields):
+        if self.fail_updates:
+            raise RuntimeError('503 Service Unavailable')
+        self.records[record_id]['fields'].update(fields)
+        return self.records[record_id]
+
+
+def inquiry(record_id, assigned=None):
+    return {'id': record_id, 'createdTime': '2026-01-01T00:00:00.000Z',
+            'fields': {'Status': 'New', 'Priority': 'High', 'Assigned to': assigned}}
+
+
+def worker(table, lock_path):
+    """An AirtableService as another worker process would have it, with its own queue"""
+    service = AirtableService.__new__(AirtableService)
+    service.inquiries = table
+    service.hedger = None
+    service.inquiry_listeners = []
+    service.triage = TriageQueue(lock_path)
+    service.triage.load([inquiry(record_id) for record_id in table.records])
+    return service
+
+
+@pytest.fixture
+def lock_path(tmp_path):
+    return str(tmp_path / 'triage.lock')
+
+
+def test_two_workers_never_hand_out_the_same_inquiry(lock_path):
+    table = FakeInquiries([inquiry('recA')])
+    first, second = worker(table, lock_path), worker(table, lock_path)
+
+    assert first.claim_next_inquiry('ana')['inquiry_id'] == 'recA'
+    assert second.claim_next_inquiry('ben') is None
+    assert table.records['recA']['fields']['Assigned to'] == 'ana'
+
+
+def test_failed_assignment_gives_the_lease_back(lock_path):
+    table = FakeInquiries([inquiry('recA')])
+    service = worker(table, lock_path)
+    table.fail_updates = True
+    with pytest.raises(RuntimeError):
+        service.claim_next_inquiry('ana')
+
+    table.fail_updates = False
+    assert service.claim_next_inquiry('ben')['inquiry_id'] == 'recA'
+
+
+def test_expired_lease_is_unassigned_before_requeueing(lock_path):
+    table = FakeInquiries([inquiry('recA')])
+    service = worker(table, lock_path)
+    service.claim_next_inquiry('ana', lease_seconds=-1)
+
+    assert service.claim_next_inquiry('ben')['inquiry_id'] == 'recA'
+    assert table.records['recA']['fields']['Assigned to'] == 'ben'
+
+
+def test_expired_lease_taken_over_elsewhere_is_dropped(lock_path):
+    table = FakeInquiries([inquiry('recA')])
+    service = worker(table, lock_path)
+    service.claim_next_inquiry('ana', lease_seconds=-1)
+    table.records['recA']['fields']['Assigned to'] = 'carla'
+
+    assert service.claim_next_inquiry('ben') is None
+    assert table.records['recA']['fields']['Assigned to'] == 'carla'